@@ -1,8 +1,9 @@
-from Canvas import Canvas
-from ShapeManager import ShapeManager
-from Shapes import *
-from UndoRedoManager import *
-from Drawer import *
+from Core.Canvas import Canvas
+from Core.ShapeManager import ShapeManager
+from Core.UndoRedoManager import UndoRedoManager, DrawAction
+from Core.Drawer import DrawingTool
+from Core.Profiler import StageProfiler
+from InputCoalescer import MouseEventCoalescer
 import cv2 as cv
 
 
@@ -13,15 +14,17 @@ class Drawer:
     and supports undo/redo functionality.
 
     Attributes:
-        canvas (Canvas): The canvas on which the drawing is performed.
+        canvas (Canvas or TiledCanvas): The canvas on which the drawing is performed.
         draw_color (tuple): The color used for drawing shapes.
         shape_manager (ShapeManager): Manages all the shapes drawn on the canvas.
         undo_redo_manager (UndoRedoManager): Manages undo and redo actions for shapes.
         drawer_tool (DrawingTool): Tool that handles shape drawing, erasing, and cropping.
         active_mode (str): The current drawing mode (e.g., circle, rectangle, polygon).
+        input (MouseEventCoalescer): Buffers mouse moves so previews render at most preview_rate times a second.
     """
 
-    def __init__(self, width=800, height=800, background=(255, 255, 255)):
+    def __init__(self, width=800, height=800, background=(255, 255, 255), headless=False,
+                 preview_rate=60, profiler=None, tile_size=None, view_size=None):
         """
         Initializes the drawing application with a canvas, shape manager, undo/redo manager, 
         and a drawing tool for handling shapes.
@@ -30,8 +33,23 @@ class Drawer:
             width (int): The width of the canvas.
             height (int): The height of the canvas.
             background (tuple): The background color of the canvas.
+            headless (bool): If True, no window is opened; shown frames are only kept on the canvas.
+            preview_rate (float): Maximum number of preview renders per second while dragging.
+            profiler (StageProfiler, optional): Records the input-to-pixel latency of mouse events.
+                Defaults to a disabled profiler.
+            tile_size (int, optional): If given, the canvas is stored as tiles of this size
+                (see TiledCanvas), for canvases too large to keep as one array.
+            view_size (tuple, optional): The (width, height) of the area shown from a tiled canvas.
+                Defaults to the whole canvas.
         """
-        self.canvas = Canvas(width, height, background)
+        self.headless = headless
+        if tile_size:
+            # only needed for very large drawings, so it is not imported at start-up
+            from Core.TiledCanvas import TiledCanvas
+            self.canvas = TiledCanvas(width, height, background, headless=headless,
+                                      tile_size=tile_size, view_size=view_size)
+        else:
+            self.canvas = Canvas(width, height, background, headless=headless)
         self.draw_color = self._get_opposite_color(background)
         self.shape_manager = ShapeManager()
         self.undo_redo_manager = UndoRedoManager()
@@ -39,7 +57,10 @@ class Drawer:
             self.canvas, self.shape_manager, self.undo_redo_manager, self.draw_color)
         self.active_mode = None
         self.undo_redo_manager.add_action(DrawAction(
-            self.shape_manager.get_shapes(), self.canvas.get_canvas()))
+            self.shape_manager.get_shapes(), self.canvas.snapshot()))
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.input = MouseEventCoalescer(
+            self._handle_mouse, preview_rate, self.profiler)
 
     def run(self):
         """
@@ -47,37 +68,79 @@ class Drawer:
         interactively draw shapes, crop, erase, rotate the canvas, and manage undo/redo actions.
 
         This method runs an OpenCV window that responds to user inputs and updates the canvas.
+        The window is polled once per preview tick so buffered mouse moves get rendered.
         """
         cv.namedWindow(self.canvas.canvas_name)
         cv.setMouseCallback(self.canvas.canvas_name, self._mouse_callback)
+        tick_ms = max(1, int(self.input.interval * 1000))
 
+        self.step()
         while True:
-            self.canvas.draw_canvas()
-            key = cv.waitKey()
-
-            if key == ord('q'):
+            key = cv.waitKey(tick_ms)
+            if key == -1:
+                self.input.tick()
+                continue
+            # moves made before the key press are handled before it
+            self.input.flush()
+            if not self.dispatch_key(key):
                 break
-            elif key == ord('c'):
-                self.active_mode = "circle"
-            elif key == ord('r'):
-                self.active_mode = "rectangle"
-            elif key == ord('p'):
-                self.active_mode = "polygon"
-            elif key == ord('s') and self.active_mode == "polygon":
-                self.drawer_tool.finalize_polygon()
-            elif key == ord('x'):
-                self.active_mode = "crop"
-            elif key == ord('e'):
-                self.active_mode = "erase"
-            elif key == ord('a'):
-                self.drawer_tool.rotate_canvas(-90)
-            elif key == ord('d'):
-                self.drawer_tool.rotate_canvas(90)
-            elif key == ord('z'):
-                self.undo_redo_manager.undo(self.canvas, self.shape_manager)
-            elif key == ord('y'):
-                self.undo_redo_manager.redo(self.canvas, self.shape_manager)
-        cv.destroyAllWindows()
+            self.step()
+        self.cleanup()
+
+    def cleanup(self):
+        """
+        Writes the collected latency metrics and closes the window.
+        """
+        self.profiler.dump()
+        if not self.headless:
+            cv.destroyAllWindows()
+
+    def step(self):
+        """
+        Shows the current state of the canvas.
+
+        Returns:
+            bool: Always True; the drawing canvas has no input that can run out.
+        """
+        self.canvas.draw_canvas()
+        return True
+
+    def dispatch_key(self, key):
+        """
+        Performs the action bound to a key: switching modes, finalizing polygons,
+        rotating, undo and redo.
+
+        Args:
+            key (int): The key code returned by cv.waitKey, or -1 for no key.
+
+        Returns:
+            bool: False if the key asks to quit, True otherwise.
+        """
+        if key == ord('q'):
+            return False
+        elif key == ord('c'):
+            self.active_mode = "circle"
+        elif key == ord('r'):
+            self.active_mode = "rectangle"
+        elif key == ord('p'):
+            self.active_mode = "polygon"
+        elif key == ord('s') and self.active_mode == "polygon":
+            self.drawer_tool.finalize_polygon()
+        elif key == ord('x'):
+            self.active_mode = "crop"
+        elif key == ord('e'):
+            self.active_mode = "erase"
+        elif key == ord('v'):
+            self.active_mode = "vector_erase"
+        elif key == ord('a'):
+            self.drawer_tool.rotate_canvas(-90)
+        elif key == ord('d'):
+            self.drawer_tool.rotate_canvas(90)
+        elif key == ord('z'):
+            self.undo_redo_manager.undo(self.canvas, self.shape_manager)
+        elif key == ord('y'):
+            self.undo_redo_manager.redo(self.canvas, self.shape_manager)
+        return True
 
     def _get_opposite_color(self, bgr):
         """
@@ -92,6 +155,19 @@ class Drawer:
         return tuple(255 - c for c in bgr)
 
     def _mouse_callback(self, event, x, y, flags, param):
+        """
+        Receives mouse events from HighGUI and passes them on through the event coalescer.
+
+        Args:
+            event (int): The OpenCV mouse event type.
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+            flags (int): The OpenCV event flags.
+            param: Additional parameters passed to the callback (not used).
+        """
+        self.input.push(event, x, y, flags, param)
+
+    def _handle_mouse(self, event, x, y, flags, param):
         """
         Handles mouse events for drawing shapes, erasing, cropping, and other actions based on 
         the active drawing mode. It calls the appropriate method from the DrawingTool.
@@ -110,6 +186,8 @@ class Drawer:
             self.drawer_tool.handle_crop_mode(event, x, y)
         elif self.active_mode == "erase":
             self.drawer_tool.handle_erase_mode(event, x, y)
+        elif self.active_mode == "vector_erase":
+            self.drawer_tool.handle_vector_erase_mode(event, x, y)
         elif self.active_mode == "circle":
             self.drawer_tool.draw_circle(event, x, y)
         elif self.active_mode == "rectangle":
@@ -0,0 +1,58 @@
+import os
+import sys
+
+# the shared Core package lives next to the application folders
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+from Core.Headless import ScriptedRun, load_events
+from Core.Profiler import StageProfiler
+from DrawerProgram import Drawer
+
+
+def build_app(args):
+    """
+    Creates a headless Drawer with the requested canvas size.
+
+    Args:
+        args (argparse.Namespace): The parsed command line.
+
+    Returns:
+        Drawer: The application to drive.
+    """
+    profiler = StageProfiler(dump_path=args.metrics) if args.metrics else None
+    return Drawer(args.width, args.height, headless=True, profiler=profiler,
+                  tile_size=args.tile_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a scripted event file against the application without a window.")
+    parser.add_argument("events", help="JSON Lines file of scheduled mouse/key events")
+    parser.add_argument("--frames", type=int,
+                        help="number of frames to run (default: one past the last event)")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=800)
+    parser.add_argument("--tile-size", type=int,
+                        help="store the canvas as tiles of this size")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--output-dir", default="./headless_output")
+    parser.add_argument("--save-frames", action="store_true",
+                        help="save every shown frame as a PNG")
+    parser.add_argument("--video-out", help="file name for a video of the shown frames")
+    parser.add_argument("--report", help="write the timing report to this JSON file")
+    parser.add_argument("--metrics", help="record input latency timings to this CSV/JSON file")
+    args = parser.parse_args()
+
+    events = load_events(args.events)
+    frame_count = args.frames or (max(events) + 1 if events else 1)
+    app = build_app(args)
+    run = ScriptedRun(app, events, frame_count=frame_count, fps=args.fps,
+                      output_dir=args.output_dir, save_frames=args.save_frames,
+                      video_path=args.video_out)
+    report = run.run()
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
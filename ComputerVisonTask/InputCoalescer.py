@@ -0,0 +1,90 @@
+import time
+import cv2 as cv
+
+
+class MouseEventCoalescer:
+    """
+    Sits between the HighGUI mouse callback and the drawing tools. Mouse-move events are
+    buffered and only the latest one is delivered per display tick, so a burst of moves
+    causes one preview render instead of one per event. Clicks and releases are delivered
+    immediately, after any pending move, so the event order seen by the tools is preserved.
+    """
+
+    def __init__(self, handler, max_rate=60, profiler=None):
+        """
+        Initializes the coalescer.
+
+        Args:
+            handler (callable): Called as handler(event, x, y, flags, param) for each delivered event.
+            max_rate (float): Maximum number of move events delivered per second. Defaults to 60.
+            profiler (StageProfiler, optional): Receives the input-to-pixel latency of every delivery
+                as the 'input_latency' stage.
+        """
+        self.handler = handler
+        self.interval = 1.0 / max_rate
+        self.profiler = profiler
+        self.received = 0
+        self.delivered = 0
+        self._pending_move = None  # (x, y, flags, param)
+        self._pending_since = None  # arrival time of the oldest move in the pending batch
+        self._last_delivery = 0.0
+
+    def push(self, event, x, y, flags, param):
+        """
+        Receives one event from the mouse callback.
+
+        Args:
+            event (int): The OpenCV mouse event type.
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+            flags (int): The OpenCV event flags.
+            param: Additional parameters passed to the callback.
+        """
+        now = time.perf_counter()
+        self.received += 1
+        if event == cv.EVENT_MOUSEMOVE:
+            self._pending_move = (x, y, flags, param)
+            if self._pending_since is None:
+                self._pending_since = now
+        else:
+            self.flush()
+            self._deliver(event, x, y, flags, param, now)
+
+    def tick(self):
+        """
+        Called once per display tick; delivers the pending move if the rate limit allows it.
+        """
+        if self._pending_move is not None and \
+                time.perf_counter() - self._last_delivery >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Delivers the pending move immediately, regardless of the rate limit.
+        """
+        if self._pending_move is None:
+            return
+        x, y, flags, param = self._pending_move
+        arrived = self._pending_since
+        self._pending_move = None
+        self._pending_since = None
+        self._deliver(cv.EVENT_MOUSEMOVE, x, y, flags, param, arrived)
+
+    def _deliver(self, event, x, y, flags, param, arrived):
+        """
+        Passes an event to the handler and records how long it took from its arrival until
+        the handler returned (by then the tools have handed the new pixels to HighGUI).
+
+        Args:
+            event (int): The OpenCV mouse event type.
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+            flags (int): The OpenCV event flags.
+            param: Additional parameters passed to the callback.
+            arrived (float): perf_counter() value at which the (oldest coalesced) event arrived.
+        """
+        self.handler(event, x, y, flags, param)
+        self.delivered += 1
+        self._last_delivery = time.perf_counter()
+        if self.profiler is not None and self.profiler.enabled:
+            self.profiler.record("input_latency", self._last_delivery - arrived)
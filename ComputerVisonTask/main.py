@@ -1,7 +1,27 @@
+import importlib
+import os
+import sys
+import threading
+
+# the shared Core package lives next to the application folders
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_drawer(*args):
+    """
+    Starts the drawing application.
+
+    Args:
+        *args: The canvas width, height and background color, or nothing for the defaults.
+    """
+    from DrawerProgram import Drawer
+    app = Drawer(*args)
+    app.run()
 
-from DrawerProgram import Drawer
 
 if __name__ == "__main__":
+    # OpenCV and NumPy take most of the start-up time; they are loaded while the user types
+    threading.Thread(target=importlib.import_module, args=("DrawerProgram",), daemon=True).start()
     try:
         width = int(input("Enter canvas width: "))
         height = int(input("Enter canvas height: "))
@@ -21,15 +41,11 @@ if __name__ == "__main__":
         if not all(0 <= c <= 255 for c in color):
             raise ValueError("Color components must be in the range 0-255.")
 
-        app = Drawer(width, height, color)
-        app.run()
+        run_drawer(width, height, color)
 
     except ValueError as e:
         print(f"Invalid input: {e} \nRunning with Default values")
-        app = Drawer()
-        app.run()
+        run_drawer()
     except Exception as e:
-        print(f"An unexpected error occurred: {
-              e} \nRunning with Default values")
-        app = Drawer()
-        app.run()
+        print(f"An unexpected error occurred: {e} \nRunning with Default values")
+        run_drawer()
@@ -0,0 +1,393 @@
+import asyncio
+import glob
+import os
+import time
+import cv2 as cv
+from Core.DetectionLog import open_results
+
+
+class AsyncFrameSource:
+    """
+    Base class of the asyncio frame sources. A source is an async iterator of
+    (frame index, timestamp, frame) tuples:
+
+        async for index, timestamp, frame in CameraSource(0):
+            ...
+
+    The blocking OpenCV calls run in an executor, so one event loop can serve many
+    streams. A background task reads ahead into a bounded asyncio.Queue; when the consumer
+    falls behind, reading pauses (back-pressure), or for live sources with drop=True the
+    oldest queued frame is dropped instead, so a slow consumer always gets recent frames.
+
+    Subclasses implement _open, _read and _close, which are called in the executor.
+    """
+
+    def __init__(self, max_queued=4, drop=False, executor=None):
+        """
+        Initializes the source.
+
+        Args:
+            max_queued (int): Number of frames read ahead of the consumer.
+            drop (bool): If True, drop the oldest queued frame instead of pausing the reading.
+            executor (concurrent.futures.Executor, optional): Where the blocking calls run.
+                Defaults to the event loop's default thread pool.
+        """
+        self.max_queued = max_queued
+        self.drop = drop
+        self.executor = executor
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self._queue = None
+        self._reader = None
+
+    def _open(self):
+        """Opens the source. Runs in the executor."""
+
+    def _read(self):
+        """
+        Reads the next frame. Runs in the executor. This is an abstract method and must be
+        implemented by subclasses.
+
+        Returns:
+            tuple: (timestamp, frame), or None at the end of the source.
+        """
+
+    def _close(self):
+        """Releases the source. Runs in the executor."""
+
+    async def _run_blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _read_ahead(self):
+        """Reads frames into the queue until the source ends or the iteration is closed."""
+        try:
+            await self._run_blocking(self._open)
+            while True:
+                item = await self._run_blocking(self._read)
+                if item is None:
+                    break
+                item = (self.frames_read,) + tuple(item)
+                self.frames_read += 1
+                if self.drop and self._queue.full():
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                await self._queue.put(item)
+        except Exception as error:
+            await self._queue.put(error)
+            return
+        finally:
+            await self._run_blocking(self._close)
+        await self._queue.put(None)
+
+    def __aiter__(self):
+        # one extra place for the end marker, so the reader never waits to finish
+        self._queue = asyncio.Queue(self.max_queued + 1)
+        self._reader = asyncio.get_running_loop().create_task(self._read_ahead())
+        return self
+
+    async def __anext__(self):
+        item = await self._queue.get()
+        if item is None:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def aclose(self):
+        """Stops reading ahead and releases the source."""
+        if self._reader is not None and not self._reader.done():
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+
+
+class CameraSource(AsyncFrameSource):
+    """
+    Frames from a camera, a video file or a stream URL, read with cv.VideoCapture.
+    """
+
+    def __init__(self, source=0, max_queued=4, drop=None, executor=None):
+        """
+        Initializes the source.
+
+        Args:
+            source (int or str): Camera index, video file or stream URL.
+            max_queued (int): Number of frames read ahead of the consumer.
+            drop (bool, optional): Drop the oldest queued frame when the consumer falls behind.
+                Defaults to True for cameras and streams and False for files.
+            executor (concurrent.futures.Executor, optional): Where the blocking calls run.
+        """
+        if drop is None:
+            drop = not (isinstance(source, str) and os.path.isfile(source))
+        super().__init__(max_queued, drop, executor)
+        self.source = source
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open video source: {self.source!r}")
+
+    def _read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        return time.monotonic(), frame
+
+    def _close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class FileSource(CameraSource):
+    """
+    Frames from a video file, timestamped with their position in the file instead of the
+    time they were read, and never dropped.
+    """
+
+    def __init__(self, path, max_queued=4, executor=None):
+        """
+        Initializes the source.
+
+        Args:
+            path (str): The video file.
+            max_queued (int): Number of frames read ahead of the consumer.
+            executor (concurrent.futures.Executor, optional): Where the blocking calls run.
+        """
+        super().__init__(path, max_queued, False, executor)
+
+    def _read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        return self.cap.get(cv.CAP_PROP_POS_MSEC) / 1000, frame
+
+
+class ImageDirectorySource(AsyncFrameSource):
+    """
+    The images of a directory as frames, in file name order, timestamped with their
+    index at a nominal frame rate.
+    """
+
+    def __init__(self, directory, pattern="*.png", fps=1.0, max_queued=4, executor=None):
+        """
+        Initializes the source.
+
+        Args:
+            directory (str): The directory to read.
+            pattern (str): Glob pattern of the image files.
+            fps (float): Nominal frame rate used for the timestamps.
+            max_queued (int): Number of images read ahead of the consumer.
+            executor (concurrent.futures.Executor, optional): Where the blocking calls run.
+        """
+        super().__init__(max_queued, False, executor)
+        self.directory = directory
+        self.pattern = pattern
+        self.fps = fps
+        self.paths = []
+
+    def _open(self):
+        self.paths = sorted(glob.glob(os.path.join(self.directory, self.pattern)))
+        self._position = 0
+
+    def _read(self):
+        while self._position < len(self.paths):
+            path = self.paths[self._position]
+            self._position += 1
+            frame = cv.imread(path)
+            if frame is not None:
+                return (self._position - 1) / self.fps, frame
+            print(f"Skipping unreadable image: {path}")
+        return None
+
+
+class AsyncFrameSink:
+    """
+    Base class of the asyncio frame sinks. Frames handed to put() go through a bounded
+    asyncio.Queue to a task that passes them to the blocking _write in the executor, one at
+    a time and in order. put() waits while the queue is full, which slows the pipeline
+    down to the pace of its slowest sink instead of letting frames pile up in memory.
+
+    Subclasses implement _open, _write and _close, which are called in the executor.
+    """
+
+    def __init__(self, max_queued=8, executor=None):
+        """
+        Initializes the sink.
+
+        Args:
+            max_queued (int): Number of frames that may wait for the sink.
+            executor (concurrent.futures.Executor, optional): Where the blocking calls run.
+                Defaults to the event loop's default thread pool.
+        """
+        self.max_queued = max_queued
+        self.executor = executor
+        self.frames_written = 0
+        self._queue = None
+        self._writer = None
+
+    def _open(self):
+        """Prepares the sink. Runs in the executor."""
+
+    def _write(self, index, timestamp, frame):
+        """
+        Handles one frame. Runs in the executor. This is an abstract method and must be
+        implemented by subclasses.
+
+        Args:
+            index (int): The frame index.
+            timestamp (float): The capture time of the frame.
+            frame (np.ndarray): The frame.
+        """
+
+    def _close(self):
+        """Finishes the sink. Runs in the executor."""
+
+    async def _run_blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def start(self):
+        """Opens the sink and starts its writer task."""
+        await self._run_blocking(self._open)
+        self._queue = asyncio.Queue(self.max_queued)
+        self._writer = asyncio.get_running_loop().create_task(self._write_queued())
+
+    async def _write_queued(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            await self._run_blocking(self._write, *item)
+            self.frames_written += 1
+
+    async def put(self, index, timestamp, frame):
+        """
+        Queues a frame, waiting while the sink is max_queued frames behind.
+
+        Args:
+            index (int): The frame index.
+            timestamp (float): The capture time of the frame.
+            frame (np.ndarray): The frame. The sink keeps a reference until it is written,
+                so the caller must not modify it afterwards.
+        """
+        if self._writer is None:
+            await self.start()
+        await self._queue_item((index, timestamp, frame))
+
+    async def _queue_item(self, item):
+        """
+        Queues an item, waiting while the queue is full. If the writer fails in the meantime,
+        its error is raised instead of waiting for a queue nobody empties any more.
+        """
+        if not self._writer.done():
+            queued = asyncio.ensure_future(self._queue.put(item))
+            try:
+                await asyncio.wait({queued, self._writer}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                queued.cancel()
+            if queued.done() and not queued.cancelled():
+                return
+        self._writer.result()
+
+    async def close(self):
+        """Writes the queued frames and finishes the sink."""
+        if self._writer is None:
+            return
+        try:
+            # a writer that failed no longer takes the end marker
+            if not self._writer.done():
+                await self._queue_item(None)
+            await self._writer
+        finally:
+            self._writer = None
+            await self._run_blocking(self._close)
+
+
+class RecorderSink(AsyncFrameSink):
+    """
+    Records the frames with a Recorder (or any object with its start_recording, write_frame
+    and stop_recording methods). The recording starts with the first frame, at its size.
+    """
+
+    def __init__(self, recorder, fps=30, max_queued=8, executor=None):
+        """
+        Initializes the sink.
+
+        Args:
+            recorder (Recorder): The recorder to write to.
+            fps (int): The frame rate of the recording.
+            max_queued (int): Number of frames that may wait for the recorder.
+            executor (concurrent.futures.Executor, optional): Where the blocking calls run.
+        """
+        super().__init__(max_queued, executor)
+        self.recorder = recorder
+        self.fps = fps
+
+    def _write(self, index, timestamp, frame):
+        if not self.recorder.is_recording:
+            self.recorder.start_recording(frame.shape[1], frame.shape[0], self.fps)
+        self.recorder.write_frame(frame, timestamp)
+
+    def _close(self):
+        self.recorder.stop_recording()
+
+
+class DetectionSink(AsyncFrameSink):
+    """
+    Runs a detector on every frame and writes what it finds with a DetectionLog writer:
+    JSON Lines, one line per frame, or Parquet for paths ending in .parquet.
+
+        {"frame": 12, "timestamp": 0.4, "shapes": [{"type": "circle", "bbox": [...], ...}]}
+    """
+
+    def __init__(self, detect, path, max_queued=2, executor=None):
+        """
+        Initializes the sink.
+
+        Args:
+            detect (callable): Returns the detected shapes of a frame, for example
+                ShapeDetector().detect_frame.
+            path (str): The JSON Lines or Parquet file to write.
+            max_queued (int): Number of frames that may wait for detection.
+            executor (concurrent.futures.Executor, optional): Where detection runs.
+        """
+        super().__init__(max_queued, executor)
+        self.detect = detect
+        self.path = path
+        self._results = None
+
+    def _open(self):
+        self._results = open_results(self.path)
+
+    def _write(self, index, timestamp, frame):
+        self._results.write(index, timestamp, self.detect(frame))
+
+    def _close(self):
+        if self._results is not None:
+            self._results.close()
+
+
+async def run_pipeline(source, *sinks):
+    """
+    Passes every frame of a source to all sinks, then closes the sinks.
+
+    Args:
+        source (AsyncFrameSource): Where the frames come from.
+        *sinks (AsyncFrameSink): Where they go.
+
+    Returns:
+        int: The number of frames passed on.
+    """
+    count = 0
+    try:
+        async for index, timestamp, frame in source:
+            for sink in sinks:
+                await sink.put(index, timestamp, frame)
+            count += 1
+    finally:
+        await source.aclose()
+        for sink in sinks:
+            await sink.close()
+    return count
@@ -0,0 +1,533 @@
+import os
+import sys
+
+# the benchmark can be started as a script from anywhere or as "python -m Core.Benchmark"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "ComputerVisonTask"), os.path.join(ROOT, "VideoRecoderTask"),
+             os.path.join(ROOT, "ShapeDetector")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import json
+import multiprocessing
+import subprocess
+import tempfile
+import time
+import cv2 as cv
+import numpy as np
+from Core.Canvas import Canvas
+from Core.FrameRing import FrameRing
+from Core.Headless import ScriptedRun, SyntheticCapture
+from Core.ShapeManager import ShapeManager
+from Core.Shapes import Circle, Rectangle, Polygon
+
+
+def _timings(samples):
+    """
+    Summarizes repeated measurements.
+
+    Args:
+        samples (list): Durations in seconds.
+
+    Returns:
+        dict: Mean, median and worst duration in milliseconds.
+    """
+    times_ms = np.array(samples) * 1000
+    return {
+        "runs": len(samples),
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "max_ms": float(times_ms.max()),
+    }
+
+
+def _measure(function, repeat):
+    """
+    Calls a function repeatedly and times every call.
+
+    Args:
+        function (callable): The code to measure, called without arguments.
+        repeat (int): Number of timed calls.
+
+    Returns:
+        dict: The timings, see _timings.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return _timings(samples)
+
+
+def _drag(frame, mode_key, start, end, steps=8):
+    """
+    Builds the scripted events of one mouse drag.
+
+    Args:
+        frame (int): The frame the drag starts at; every event takes one frame.
+        mode_key (str): The key selecting the drawing mode, or None to keep the current one.
+        start (tuple): The (x, y) press position.
+        end (tuple): The (x, y) release position.
+        steps (int): Number of mouse moves between press and release.
+
+    Returns:
+        list: The events, each with a "frame" key.
+    """
+    events = [{"frame": frame, "key": mode_key}] if mode_key else []
+    events.append({"frame": frame, "mouse": "LBUTTONDOWN", "x": start[0], "y": start[1]})
+    for step in range(1, steps + 1):
+        x = start[0] + (end[0] - start[0]) * step // steps
+        y = start[1] + (end[1] - start[1]) * step // steps
+        events.append({"frame": frame + step, "mouse": "MOUSEMOVE", "x": x, "y": y})
+    events.append({"frame": frame + steps + 1, "mouse": "LBUTTONUP", "x": end[0], "y": end[1]})
+    return events
+
+
+def _drawing_session(width, height, shape_count, seed=0):
+    """
+    Builds a scripted session that draws circles and rectangles, erases across them,
+    rotates the canvas and steps through undo and redo.
+
+    Args:
+        width (int): The canvas width.
+        height (int): The canvas height.
+        shape_count (int): Number of shapes to draw.
+        seed (int): Seed of the random shape positions.
+
+    Returns:
+        tuple: The events keyed by frame index and the number of frames of the session.
+    """
+    random = np.random.default_rng(seed)
+    events = []
+    frame = 0
+    for index in range(shape_count):
+        x, y = int(random.integers(40, width - 40)), int(random.integers(40, height - 40))
+        size = int(random.integers(10, 40))
+        events += _drag(frame, "c" if index % 2 == 0 else "r", (x, y), (x + size, y + size))
+        frame += 10
+    for mode_key in ("e", "v"):
+        events += _drag(frame, mode_key, (0, height // 2), (width - 1, height // 2), steps=30)
+        frame += 32
+    for key in ("d", "a", "z", "z", "y"):
+        events.append({"frame": frame, "key": key})
+        frame += 1
+
+    scheduled = {}
+    for event in events:
+        scheduled.setdefault(event.pop("frame"), []).append(event)
+    return scheduled, frame + 1
+
+
+def bench_drawer(repeat, size=800, shape_count=40):
+    """
+    Hot path of the drawing canvas: scripted drawing, erasing, rotating and undo in a
+    headless Drawer.
+
+    Args:
+        repeat (int): Number of sessions to run.
+        size (int): Width and height of the canvas.
+        shape_count (int): Shapes drawn per session.
+
+    Returns:
+        dict: Per-frame latency of the sessions.
+    """
+    from DrawerProgram import Drawer
+
+    samples = []
+    for _ in range(repeat):
+        events, frame_count = _drawing_session(size, size, shape_count)
+        run = ScriptedRun(Drawer(size, size, headless=True), events, frame_count=frame_count)
+        run.run()
+        samples += run.frame_times
+    return _timings(samples)
+
+
+def bench_recorder(repeat, width=640, height=480, frame_count=120):
+    """
+    Hot path of the video recorder: reading synthetic camera frames, drawing the shapes on
+    them and recording them in a headless Program.
+
+    Args:
+        repeat (int): Number of runs.
+        width (int): The frame width.
+        height (int): The frame height.
+        frame_count (int): Frames per run.
+
+    Returns:
+        dict: Per-frame latency of the runs.
+    """
+    from Program import Program
+
+    events, _ = _drawing_session(width, height, 10)
+    events.setdefault(0, []).insert(0, {"key": "1"})
+    samples = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            app = Program(capture=SyntheticCapture(width, height, frame_count + 1), headless=True,
+                          recorder_options={"output_dir": output_dir})
+            run = ScriptedRun(app, events, frame_count=frame_count)
+            run.run()
+            app.video_recorder.stop_recording()
+            samples += run.frame_times
+    return _timings(samples)
+
+
+def _detector_image(width, height, seed=0):
+    """
+    Draws a test image with filled circles, squares and triangles on a white background.
+
+    Args:
+        width (int): The image width.
+        height (int): The image height.
+        seed (int): Seed of the random shape positions.
+
+    Returns:
+        np.ndarray: The BGR image.
+    """
+    random = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cell = 160
+    for row in range(height // cell):
+        for column in range(width // cell):
+            x, y = column * cell + cell // 2, row * cell + cell // 2
+            size = int(random.integers(30, 60))
+            kind = (row + column) % 3
+            if kind == 0:
+                cv.circle(image, (x, y), size, (0, 0, 0), -1)
+            elif kind == 1:
+                cv.rectangle(image, (x - size, y - size), (x + size, y + size), (0, 0, 0), -1)
+            else:
+                triangle = np.array([(x, y - size), (x - size, y + size), (x + size, y + size)])
+                cv.fillPoly(image, [triangle], (0, 0, 0))
+    return image
+
+
+def bench_detector(repeat, width=1280, height=720):
+    """
+    Hot path of the shape detector: finding, drawing and labelling the shapes of one image.
+
+    Args:
+        repeat (int): Number of detections.
+        width (int): The image width.
+        height (int): The image height.
+
+    Returns:
+        dict: Latency of one detection.
+    """
+    from ShapeDetector import ShapeDetector
+
+    # circles outside the detected radius range are skipped, not labelled as N-gons
+    large_circle = np.full((400, 400, 3), 255, dtype=np.uint8)
+    cv.circle(large_circle, (200, 200), 150, (0, 0, 0), -1)
+    for method in ("hough", "contour"):
+        detector = ShapeDetector()
+        detector.CIRCLE_METHOD = method
+        labels = [shape.label for shape in detector.detect_frame(large_circle)]
+        assert all(label == "Circle" for label in labels), (method, labels)
+
+    image = _detector_image(width, height)
+
+    def detect():
+        detector = ShapeDetector(canvas=image.copy())
+        detector.find_shapes()
+        detector.draw_detected_shapes()
+        detector.draw_labels()
+
+    return _measure(detect, repeat)
+
+
+def bench_preprocess(repeat, resolutions=((640, 480), (1280, 720), (1920, 1080))):
+    """
+    The detector's preprocessing stage and a whole detection per resolution, with the
+    default settings, with one shared blur, with an Otsu threshold and with circles found
+    from the contours instead of the Hough transform (no second blur at all).
+
+    Args:
+        repeat (int): Number of timed calls per variant.
+        resolutions (tuple): The (width, height) image sizes.
+
+    Returns:
+        dict: Timings of "preprocess" and "detect" per variant, keyed by resolution.
+    """
+    from ShapeDetector import ShapeDetector
+
+    variants = {
+        "default": {},
+        "shared_blur": {"SHARED_BLUR": True},
+        "otsu": {"THRESHOLD_METHOD": "otsu", "SHARED_BLUR": True},
+        "contour_circles": {"CIRCLE_METHOD": "contour"},
+    }
+    results = {}
+    for width, height in resolutions:
+        image = _detector_image(width, height)
+        timings = {}
+        for name, settings in variants.items():
+            detector = ShapeDetector()
+            for setting, value in settings.items():
+                setattr(detector, setting, value)
+            detector.detect_frame(image)
+            timings[name] = {
+                "preprocess": _measure(lambda: detector.preprocess(image), repeat),
+                "detect": _measure(lambda: detector.detect_frame(image), repeat),
+            }
+        results[f"{width}x{height}"] = timings
+    return results
+
+
+def bench_core(repeat, size=2000, shape_count=5000):
+    """
+    The shared building blocks on their own: canvas snapshot, draw and reset, moving all
+    shapes at once and hit-testing the shape index.
+
+    Args:
+        repeat (int): Number of timed calls per operation.
+        size (int): Width and height of the canvas.
+        shape_count (int): Number of shapes in the shape manager.
+
+    Returns:
+        dict: Timings keyed by operation.
+    """
+    random = np.random.default_rng(0)
+    canvas = Canvas(size, size, headless=True)
+    circle = Circle((size // 2, size // 2), 50, (0, 0, 0))
+
+    def snapshot_draw_reset():
+        canvas.snapshot()
+        circle.draw(canvas)
+        canvas.reset_canvas()
+
+    manager = ShapeManager()
+    positions = random.integers(0, size - 40, (shape_count, 2))
+    for index, (x, y) in enumerate(positions.tolist()):
+        if index % 3 == 0:
+            manager.add_shape(Circle((x + 20, y + 20), 20, (0, 0, 0)))
+        elif index % 3 == 1:
+            manager.add_shape(Rectangle((x, y), (x + 40, y + 40), (0, 0, 0)))
+        else:
+            manager.add_shape(Polygon([(x, y), (x + 40, y), (x + 20, y + 40)], (0, 0, 0)))
+    rotation = np.array([[0, -1, size - 1], [1, 0, 0]], dtype=np.float64)
+    queries = random.integers(0, size - 20, (100, 2)).tolist()
+
+    def query():
+        for x, y in queries:
+            manager.query((x, y, x + 20, y + 20))
+
+    query()  # builds the index, which later queries reuse
+    return {
+        "snapshot_draw_reset": _measure(snapshot_draw_reset, repeat),
+        "query_x100": _measure(query, repeat),
+        "transform": _measure(lambda: manager.transform(rotation), repeat),
+        "draw_all": _measure(lambda: manager.draw_all(canvas), repeat),
+    }
+
+
+# Code run in a fresh interpreter by bench_startup, up to the first frame each application shows.
+# The image and video paths are filled in with str.format.
+STARTUP_SCRIPTS = {
+    "drawer": ("ComputerVisonTask", "DrawerProgram", (
+        "from DrawerProgram import Drawer\n"
+        "app = Drawer(headless=True)\n"
+        "app.step()\n")),
+    "recorder": ("VideoRecoderTask", "Program", (
+        "from Program import Program\n"
+        "app = Program(source={video!r}, headless=True)\n"
+        "app.step()\n"
+        "shown = time.time()\n"
+        "while not app.connected:\n"
+        "    time.sleep(0.001)\n"
+        "app.step()\n"
+        "app.cleanup()\n")),
+    "detector": ("ShapeDetector", "ShapeDetector", (
+        "from ShapeDetector import ShapeDetector\n"
+        "detector = ShapeDetector(file_path={image!r})\n"
+        "detector.find_shapes()\n")),
+}
+
+
+def _module_import_ms(importtime_log, module):
+    """
+    Reads the cumulative import time of a top-level module from "python -X importtime" output.
+
+    Args:
+        importtime_log (str): The standard error of the interpreter.
+        module (str): The module name.
+
+    Returns:
+        float: The import time in milliseconds, or None if the module was not imported.
+    """
+    for line in importtime_log.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module and not fields[2].startswith("  "):
+            return int(fields[1]) / 1000
+    return None
+
+
+def bench_startup(repeat):
+    """
+    Cold start of each application in a new interpreter: the import time of its main module
+    and the time from starting the interpreter until its first frame is shown. For the
+    recorder, the time until the first camera frame is reported separately, since the window
+    does not wait for the camera.
+
+    Args:
+        repeat (int): Number of interpreter starts per application.
+
+    Returns:
+        dict: Timings keyed by application.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        image = os.path.join(work_dir, "shapes.png")
+        cv.imwrite(image, _detector_image(1280, 720))
+        video = os.path.join(work_dir, "video.avi")
+        capture = SyntheticCapture(640, 480, 30)
+        writer = cv.VideoWriter(video, cv.VideoWriter_fourcc(*"MJPG"), 30, (640, 480))
+        while True:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            writer.write(frame)
+        writer.release()
+
+        for name, (folder, module, script) in STARTUP_SCRIPTS.items():
+            code = ("import sys, time\n"
+                    f"sys.path[:0] = [{ROOT!r}, {os.path.join(ROOT, folder)!r}]\n"
+                    "shown = None\n"
+                    + script.format(image=image, video=video) +
+                    "print(shown or time.time(), time.time())\n")
+            imports, shown, ready = [], [], []
+            for _ in range(repeat):
+                started = time.time()
+                process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                         capture_output=True, text=True, cwd=work_dir, check=True)
+                first_shown, first_ready = map(float, process.stdout.split()[-2:])
+                imports.append(_module_import_ms(process.stderr, module) / 1000)
+                shown.append(first_shown - started)
+                ready.append(first_ready - started)
+            results[name] = {"import": _timings(imports), "first_frame": _timings(shown)}
+            if name == "recorder":
+                results[name]["camera_frame"] = _timings(ready)
+    return results
+
+
+def _ring_consumer(ring, cursor, copy, ready, results):
+    """Receives frames from a FrameRing until the stream is closed, see bench_transport."""
+    reader = ring.reader(cursor=cursor, start="oldest")
+    ready.wait()
+    received = 0
+    while reader.get(copy=copy) is not None:
+        received += 1
+    reader.release()
+    results.put(received)
+
+
+def _queue_consumer(frames, ready, results):
+    """Receives pickled frames from a queue until the None sentinel, see bench_transport."""
+    ready.wait()
+    received = 0
+    while frames.get() is not None:
+        received += 1
+    results.put(received)
+
+
+def bench_transport(repeat, width=1920, height=1080, frame_count=120, consumers=2):
+    """
+    Throughput of handing frames from one producer process to several consumer processes:
+    through a FrameRing, with the consumers copying each frame out or reading it in place,
+    and through one multiprocessing queue per consumer, which pickles every frame.
+
+    Args:
+        repeat (int): Number of runs per transport.
+        width (int): The frame width.
+        height (int): The frame height.
+        frame_count (int): Frames sent per run.
+        consumers (int): Number of consumer processes, each receiving every frame.
+
+    Returns:
+        dict: Frames per second and megabytes per second per transport.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+
+    def run(transport):
+        ready = context.Barrier(consumers + 1)
+        results = context.Queue()
+        if transport == "queue":
+            queues = [context.Queue(maxsize=8) for _ in range(consumers)]
+            processes = [context.Process(target=_queue_consumer, args=(frames, ready, results))
+                         for frames in queues]
+        else:
+            ring = FrameRing(frame.shape, slots=8, max_readers=consumers)
+            processes = [context.Process(target=_ring_consumer,
+                                         args=(ring, index, transport == "ring_copy", ready, results))
+                         for index in range(consumers)]
+        for process in processes:
+            process.start()
+        ready.wait()
+        started = time.perf_counter()
+        for index in range(frame_count):
+            frame[0, 0, 0] = index % 256
+            if transport == "queue":
+                for frames in queues:
+                    frames.put(frame)
+            else:
+                ring.put(frame, block=True)
+        if transport == "queue":
+            for frames in queues:
+                frames.put(None)
+        else:
+            ring.close_stream()
+        received = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+        if transport != "queue":
+            ring.close()
+        assert received == [frame_count] * consumers, received
+        return elapsed
+
+    results = {}
+    for transport in ("queue", "ring_copy", "ring_view"):
+        times = [run(transport) for _ in range(repeat)]
+        best = min(times)
+        results[transport] = {
+            "fps": frame_count / best,
+            "mb_per_s": frame_count * frame.nbytes * consumers / best / 1e6,
+            "run": _timings(times),
+        }
+    return results
+
+
+BENCHMARKS = {
+    "drawer": bench_drawer,
+    "recorder": bench_recorder,
+    "detector": bench_detector,
+    "preprocess": bench_preprocess,
+    "core": bench_core,
+    "startup": bench_startup,
+    "transport": bench_transport,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the hot path of each application on synthetic input.")
+    parser.add_argument("benchmarks", nargs="*",
+                        help="benchmarks to run: " + ", ".join(BENCHMARKS) + " (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--report", help="write the results to this JSON file")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmark: " + ", ".join(sorted(unknown)))
+
+    results = {}
+    for name in args.benchmarks or BENCHMARKS:
+        results[name] = BENCHMARKS[name](args.repeat)
+        print(name, json.dumps(results[name], indent=2))
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(results, report_file, indent=2)
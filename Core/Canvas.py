@@ -0,0 +1,247 @@
+import cv2 as cv
+import numpy as np
+
+
+class Canvas:
+    """
+    Represents a drawing canvas with specified width, height, 
+    and background color, providing methods to draw and reset the canvas.
+
+    Snapshots taken with snapshot() are read-only views that share the canvas array. The canvas
+    copies its array before the next change made through its methods (copy-on-write), so a
+    snapshot that is only read, like most undo states and recorded frames, is never copied.
+
+    A blank template of the canvas is kept for resets, and the canvas remembers the region
+    changed through its methods since it was last blank, so a reset only copies that region
+    of the template back in place. Changes made to the canvas array directly are not tracked.
+    """
+
+    def __init__(self, width, height, backgroundColor=(255, 255, 255), canvas=None, canvas_name="Canvas",
+                 headless=False):
+        """
+        Initializes the canvas with the given dimensions and background color.
+
+        Parameters:
+            width (int): The width of the canvas.
+            height (int): The height of the canvas.
+            backgroundColor (tuple): The RGB color tuple for the background color.
+            canvas (np.ndarray, optional): An existing canvas to use instead of creating a new one.
+            headless (bool, optional): If True, nothing is shown in a window; the last shown image
+                is only kept in last_shown.
+        """
+        self.width = width
+        self.height = height
+        self.backgroundColor = backgroundColor
+        self._template = None  # blank canvas copied from on resets, built on first use
+        if canvas is not None:
+            self.canvas = canvas
+            self._dirty = (0, 0, width, height)
+        else:
+            self.canvas = self._create_blank_canvas()
+            self._dirty = None  # (x1, y1, x2, y2) region changed since the canvas was blank
+        self.canvas_name = canvas_name
+        self.headless = headless
+        self.last_shown = None
+        self.generation = 0  # incremented on every change made through the canvas methods
+        self.reset_count = 0  # resets may happen in place, so the array alone does not show them
+        self._shared = False  # True while a snapshot may share the canvas array
+
+    def _create_blank_canvas(self):
+        """
+        Creates a blank canvas of the specified size with the background color.
+
+        Returns:
+            np.ndarray: A NumPy array representing the blank canvas.
+        """
+        return self._blank_template().copy()
+
+    def _blank_template(self):
+        """
+        Returns the blank template for the current canvas size, creating it when needed.
+        Copying it is much faster than filling a new array with the background color.
+
+        Returns:
+            np.ndarray: The template; it must not be modified.
+        """
+        if self._template is None or self._template.shape[:2] != (self.height, self.width):
+            self._template = np.full((self.height, self.width, 3),
+                                     self.backgroundColor, dtype=np.uint8)
+        return self._template
+
+    def _mark_dirty(self, x1, y1, x2, y2):
+        """
+        Adds a region to the area changed since the canvas was last blank.
+
+        Parameters:
+            x1 (int): The left edge of the region.
+            y1 (int): The top edge of the region.
+            x2 (int): The right edge of the region, exclusive.
+            y2 (int): The bottom edge of the region, exclusive.
+        """
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.width, x2), min(self.height, y2)
+        if x1 >= x2 or y1 >= y2:
+            return
+        if self._dirty is not None:
+            dx1, dy1, dx2, dy2 = self._dirty
+            x1, y1, x2, y2 = min(x1, dx1), min(y1, dy1), max(x2, dx2), max(y2, dy2)
+        self._dirty = (x1, y1, x2, y2)
+
+    def draw_canvas(self):
+        """Displays the canvas in a window."""
+
+        self.show(self.canvas)
+
+    def show(self, image):
+        """
+        Displays an image (the canvas or a preview of it) in the canvas window.
+
+        Parameters:
+            image (np.ndarray): The image to display.
+        """
+        self.last_shown = image
+        if not self.headless:
+            cv.imshow(self.canvas_name, image)
+
+    def reset_canvas(self):
+        """
+        Resets the canvas to a blank state with the initial background color. Only the region
+        changed since the last reset is copied back from the template, in place, unless a
+        snapshot shares the array; then the canvas starts over on a copy of the template.
+        """
+        template = self._blank_template()
+        if self._shared or not self.canvas.flags.writeable or self.canvas.shape != template.shape:
+            self.set_canvas(template.copy())
+        else:
+            if self._dirty is not None:
+                x1, y1, x2, y2 = self._dirty
+                np.copyto(self.canvas[y1:y2, x1:x2], template[y1:y2, x1:x2])
+            self.generation += 1
+        self._dirty = None
+        self.reset_count += 1
+
+    def get_canvas(self):
+        """
+        Returns a copy of the current canvas. Use snapshot() instead when the copy is only read.
+
+        Returns:
+            np.ndarray: A copy of the canvas.
+        """
+        return self.canvas.copy()
+
+    def snapshot(self):
+        """
+        Returns the current state of the canvas without copying it.
+
+        Returns:
+            np.ndarray: A read-only view of the canvas array. It keeps showing this state: the
+            canvas copies its array before it is changed again. Compare generation before and
+            after to tell whether the canvas changed since.
+        """
+        self._shared = True
+        view = self.canvas.view()
+        view.setflags(write=False)
+        return view
+
+    def _prepare_write(self):
+        """
+        Called before the canvas array is changed in place. Gives the canvas its own copy of
+        the array if a snapshot shares it, or if the array itself is a restored snapshot.
+        """
+        if self._shared or not self.canvas.flags.writeable:
+            self.canvas = self.canvas.copy()
+            self._shared = False
+        self.generation += 1
+
+    def set_canvas(self, newCanvas):
+        """
+        Sets the canvas value to new canvas. The size of the canvas follows the new array,
+        which may differ after a rotation or crop.
+
+        Parameters:
+            newCanvas (np.ndarray): The new canvas to be set. A read-only snapshot may be set
+                as well; it is copied before it is drawn on.
+        """
+        self.canvas = newCanvas
+        self.height, self.width = newCanvas.shape[:2]
+        self._dirty = (0, 0, self.width, self.height)
+        self._shared = False
+        self.generation += 1
+
+    def view(self):
+        """
+        Returns the pixels shown in the window. Tools read from it to build their previews.
+
+        Returns:
+            np.ndarray: The canvas array itself.
+        """
+        return self.canvas
+
+    def draw_shape(self, shape, rect=None):
+        """
+        Draws a shape on the canvas, optionally limited to a region.
+
+        Parameters:
+            shape (Shape): The shape to draw.
+            rect (tuple, optional): The (x1, y1, x2, y2) region to draw in, x2 and y2 exclusive.
+                Pixels outside it are left untouched.
+        """
+        self._prepare_write()
+        x1, y1, x2, y2 = shape.bounds()
+        if rect is None:
+            self._mark_dirty(x1, y1, x2 + 1, y2 + 1)
+            shape.render(self.canvas)
+        else:
+            self._mark_dirty(max(x1, rect[0]), max(y1, rect[1]),
+                             min(x2 + 1, rect[2]), min(y2 + 1, rect[3]))
+            x1, y1, x2, y2 = rect
+            shape.render(self.canvas[y1:y2, x1:x2], (x1, y1))
+
+    def rotate(self, rotation):
+        """
+        Rotates the canvas by a multiple of 90 degrees.
+
+        Parameters:
+            rotation (int): A cv.ROTATE_* code.
+        """
+        self.set_canvas(cv.rotate(self.canvas, rotation))
+
+    def crop(self, x1, y1, x2, y2):
+        """
+        Keeps only a region of the canvas.
+
+        Parameters:
+            x1 (int): The left edge of the region.
+            y1 (int): The top edge of the region.
+            x2 (int): The right edge of the region, exclusive.
+            y2 (int): The bottom edge of the region, exclusive.
+        """
+        self.set_canvas(self.canvas[y1:y2, x1:x2].copy())
+
+    def fill_rect(self, top_left, bottom_right, color):
+        """
+        Fills a rectangular area of the canvas with a color.
+
+        Parameters:
+            top_left (tuple): The (x1, y1) corner.
+            bottom_right (tuple): The (x2, y2) corner, exclusive.
+            color (tuple): The color to fill with.
+        """
+        (x1, y1), (x2, y2) = top_left, bottom_right
+        self._prepare_write()
+        self._mark_dirty(x1, y1, x2, y2)
+        self.canvas[y1:y2, x1:x2] = color
+
+    def paste(self, top_left, image):
+        """
+        Copies an image onto the canvas.
+
+        Parameters:
+            top_left (tuple): The (x, y) canvas position of the image's top-left pixel.
+            image (np.ndarray): The pixels to copy; it must lie inside the canvas.
+        """
+        x1, y1 = top_left
+        x2, y2 = x1 + image.shape[1], y1 + image.shape[0]
+        self._prepare_write()
+        self._mark_dirty(x1, y1, x2, y2)
+        self.canvas[y1:y2, x1:x2] = image
@@ -0,0 +1,249 @@
+import json
+import numpy as np
+
+
+def shape_record(shape):
+    """
+    Describes a detected shape with plain JSON types, the same fields for every type.
+
+    Args:
+        shape (Shape): A Circle, Rectangle or Polygon.
+
+    Returns:
+        dict: type, label (e.g. "Square", "Pentagon"), bbox (x, y, width, height), center,
+        radius (circles only), vertices (rectangles and polygons) and confidence (None where
+        the detector gives none).
+    """
+    data = shape.get_data()
+    center = radius = vertices = None
+    if data['type'] == 'circle':
+        center = [float(value) for value in data['center']]
+        radius = float(data['radius'])
+        bbox = [center[0] - radius, center[1] - radius, 2 * radius, 2 * radius]
+    else:
+        if data['type'] == 'rectangle':
+            (x1, y1), (x2, y2) = data['top_left'], data['bottom_right']
+            points = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+        else:
+            points = np.asarray(data['points']).reshape(-1, 2)
+        vertices = points.tolist()
+        low, high = points.min(axis=0), points.max(axis=0)
+        bbox = [float(low[0]), float(low[1]), float(high[0] - low[0]), float(high[1] - low[1])]
+        center = [float(value) for value in points.mean(axis=0)]
+    confidence = getattr(shape, 'confidence', None)
+    return {
+        "type": data['type'],
+        "label": getattr(shape, 'label', None),
+        "bbox": bbox,
+        "center": center,
+        "radius": radius,
+        "vertices": vertices,
+        "confidence": None if confidence is None else float(confidence),
+    }
+
+
+def frame_record(frame_index, timestamp, shapes):
+    """
+    Describes the detections of one frame.
+
+    Args:
+        frame_index (int): The index of the frame.
+        timestamp (float): The time of the frame in seconds, e.g. its position in the video.
+        shapes (list): The detected shapes.
+
+    Returns:
+        dict: {"frame": ..., "timestamp": ..., "shapes": [shape_record, ...]}
+    """
+    return {
+        "frame": int(frame_index),
+        "timestamp": None if timestamp is None else float(timestamp),
+        "shapes": [shape_record(shape) for shape in shapes],
+    }
+
+
+class ResultsWriter:
+    """
+    Base class of the detection result writers. Subclasses implement write_record and close;
+    writers are context managers that close themselves.
+    """
+
+    def write(self, frame_index, timestamp, shapes):
+        """
+        Writes the detections of one frame.
+
+        Args:
+            frame_index (int): The index of the frame.
+            timestamp (float): The time of the frame in seconds.
+            shapes (list): The detected shapes.
+        """
+        self.write_record(frame_record(frame_index, timestamp, shapes))
+
+    def write_record(self, record):
+        """
+        Writes one frame_record. This is an abstract method and must be implemented by
+        subclasses.
+
+        Args:
+            record (dict): The record, as returned by frame_record.
+        """
+
+    def close(self):
+        """
+        Writes what is left and closes the file. This is an abstract method and must be
+        implemented by subclasses.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class JsonLinesWriter(ResultsWriter):
+    """
+    Writes detection results as JSON Lines, one frame_record per line. Every frame is
+    written as soon as it is added, so nothing accumulates in memory and a run that is
+    interrupted keeps everything up to its last frame.
+
+    Usage:
+        with JsonLinesWriter("detections.jsonl") as results:
+            results.write(index, timestamp, shapes)
+    """
+
+    def __init__(self, path, flush_every=30):
+        """
+        Opens the file.
+
+        Args:
+            path (str): The JSON Lines file to write.
+            flush_every (int): Number of frames between flushes to disk.
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.frames_written = 0
+        self._file = open(path, "w")
+
+    def write_record(self, record):
+        """
+        Writes one frame_record.
+
+        Args:
+            record (dict): The record, as returned by frame_record.
+        """
+        self._file.write(json.dumps(record) + "\n")
+        self.frames_written += 1
+        if self.frames_written % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        """Writes what is left and closes the file."""
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetWriter(ResultsWriter):
+    """
+    Writes detection results to a Parquet file with one row per detected shape:
+
+        frame, timestamp, type, label, bbox, center, radius, vertices, confidence
+
+    A frame without detections gets a single row whose shape columns are all null, so every
+    frame written appears in the file, as it does in JSON Lines.
+
+    Rows are collected into a batch and written as one row group once batch_rows are
+    buffered, so memory stays bounded however long the video is. Needs pyarrow.
+    """
+
+    # The columns filled from each shape_record
+    SHAPE_COLUMNS = ("type", "label", "bbox", "center", "radius", "vertices", "confidence")
+
+    def __init__(self, path, batch_rows=10000):
+        """
+        Opens the file.
+
+        Args:
+            path (str): The Parquet file to write.
+            batch_rows (int): Number of rows buffered before they are written as a row group.
+        """
+        try:
+            # only Parquet output needs pyarrow, so it is imported here
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from error
+        self._pa = pyarrow
+        self.path = path
+        self.batch_rows = batch_rows
+        self.frames_written = 0
+        self.rows_written = 0
+        point = pyarrow.list_(pyarrow.float64())
+        self.schema = pyarrow.schema([
+            ("frame", pyarrow.int64()),
+            ("timestamp", pyarrow.float64()),
+            ("type", pyarrow.string()),
+            ("label", pyarrow.string()),
+            ("bbox", point),
+            ("center", point),
+            ("radius", pyarrow.float64()),
+            ("vertices", pyarrow.list_(point)),
+            ("confidence", pyarrow.float64()),
+        ])
+        self._columns = {name: [] for name in self.schema.names}
+        self._rows = 0
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write_record(self, record):
+        """
+        Adds the rows of one frame_record, writing a row group when the batch is full.
+
+        Args:
+            record (dict): The record, as returned by frame_record.
+        """
+        columns = self._columns
+        # the null row of a frame without detections
+        for shape in record["shapes"] or [dict.fromkeys(self.SHAPE_COLUMNS)]:
+            columns["frame"].append(record["frame"])
+            columns["timestamp"].append(record["timestamp"])
+            for name in self.SHAPE_COLUMNS:
+                columns[name].append(shape[name])
+            self._rows += 1
+        self.frames_written += 1
+        if self._rows >= self.batch_rows:
+            self._write_batch()
+
+    def _write_batch(self):
+        """Writes the buffered rows as one row group."""
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table)
+        self.rows_written += self._rows
+        self._columns = {name: [] for name in self.schema.names}
+        self._rows = 0
+
+    def close(self):
+        """Writes the buffered rows and closes the file."""
+        if self._writer is None:
+            return
+        self._write_batch()
+        self._writer.close()
+        self._writer = None
+
+
+def open_results(path, **options):
+    """
+    Opens the results writer that fits the file name: ParquetWriter for .parquet files,
+    JsonLinesWriter for everything else.
+
+    Args:
+        path (str): The results file.
+        **options: Keyword arguments for the writer.
+
+    Returns:
+        ResultsWriter: The writer.
+    """
+    if path.endswith(".parquet"):
+        return ParquetWriter(path, **options)
+    return JsonLinesWriter(path, **options)
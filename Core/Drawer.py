@@ -0,0 +1,459 @@
+import math
+import cv2 as cv
+import numpy as np
+from Core.Shapes import Circle, Rectangle, Polygon
+from Core.UndoRedoManager import DrawAction, EraseAction, ShapeAction, TransformAction
+
+
+class DrawingTool:
+    """
+    A class for managing drawing actions (circle, rectangle, polygon) and other canvas interactions 
+    like erasing, cropping, and rotating.
+
+    The raster eraser paints over pixels, while the vector eraser removes parts of shapes and
+    re-renders the area of the shapes it touches from the shape manager. Marks of the raster
+    eraser inside that area are not shapes, so a vector erase repaints the shapes under them.
+    """
+
+    # cv.rotate codes for clockwise angles
+    ROTATIONS = {
+        90: cv.ROTATE_90_CLOCKWISE,
+        180: cv.ROTATE_180,
+        270: cv.ROTATE_90_COUNTERCLOCKWISE,
+    }
+
+    def __init__(self, canvas, shape_manager, undo_redo_manager, draw_color=(0, 0, 0)):
+        """
+        Initializes the DrawingTool with the given canvas, shape manager, undo-redo manager, and draw color.
+
+        Args:
+            canvas (Canvas): The canvas to draw on.
+            shape_manager (ShapeManager): The manager for storing shapes.
+            undo_redo_manager (UndoRedoManager): The manager for undo/redo operations.
+            draw_color (tuple, optional): the color to use when drawing shapes, Defaults to (0, 0, 0).
+        """
+        self.canvas = canvas
+        self.shape_manager = shape_manager
+        self.undo_redo_manager = undo_redo_manager
+        self.draw_color = draw_color
+        self.temp_canvas = self.canvas.view().copy()
+        # canvas array temp_canvas was copied from, and the area the last preview drew over
+        self._preview_source = self.canvas.view()
+        self._preview_resets = self.canvas.reset_count
+        self._preview_rect = None
+        self.start_point = None
+        self.drawing = False
+        self.polygon_points = []
+        self.crop_points = []
+        self.eraser_size = 20
+        self.is_erasing = False
+        self.erase_stroke = []
+        self.erase_changed = False
+        self.rotation_angle = 0
+
+    def draw_circle(self, event, x, y):
+        """
+        handels drawing a circle based on mouse events: starts drawing on left click, shows preview on mouse move, 
+        and finalizes the circle on left release.
+
+        Args:
+            event (int): The type of mouse event (click, move, release).
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+        """
+        if event == cv.EVENT_LBUTTONDOWN:
+            self.drawing = True
+            self.start_point = (x, y)
+            self._start_preview()
+        elif event == cv.EVENT_MOUSEMOVE and self.drawing:
+            self._restore_preview()
+            # Calculate the distance between the startpoint and Curpoint
+            radius = int(
+                math.sqrt((x - self.start_point[0])**2 + (y - self.start_point[1])**2))
+            # Draw temp preview circle for the current size
+            cv.circle(self.temp_canvas, self.start_point,
+                      radius, self.draw_color, 2)
+            cx, cy = self.start_point
+            self._show_preview([(cx - radius, cy - radius), (cx + radius, cy + radius)])
+
+        elif event == cv.EVENT_LBUTTONUP:
+            self.drawing = False
+            radius = int(
+                math.sqrt((x - self.start_point[0])**2 + (y - self.start_point[1])**2))
+            new_circle = Circle(self.start_point, radius, self.draw_color)
+            self.shape_manager.add_shape(new_circle)
+            self.canvas.reset_canvas()
+            self.shape_manager.draw_all(self.canvas)
+            self.undo_redo_manager.add_action(DrawAction(
+                self.shape_manager.get_shapes(), self.canvas.snapshot()))
+
+    def draw_rectangle(self, event, x, y):
+        """
+        Draws a rectangle based on mouse events: starts drawing on left click, shows preview on mouse move, 
+        and finalizes the rectangle on left release.
+
+        Args:
+            event (int): The type of mouse event (click, move, release).
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+        """
+        if event == cv.EVENT_LBUTTONDOWN:
+            self.drawing = True
+            self.start_point = (x, y)
+            self._start_preview()
+        elif event == cv.EVENT_MOUSEMOVE and self.drawing:
+            self._restore_preview()
+            cv.rectangle(self.temp_canvas, self.start_point,
+                         (x, y), self.draw_color, 2)
+            self._show_preview([self.start_point, (x, y)])
+        elif event == cv.EVENT_LBUTTONUP:
+            self.drawing = False
+            new_rect = Rectangle(self.start_point, (x, y), self.draw_color)
+            self.shape_manager.add_shape(new_rect)
+            self.canvas.reset_canvas()
+            self.shape_manager.draw_all(self.canvas)
+            self.undo_redo_manager.add_action(DrawAction(
+                self.shape_manager.get_shapes(), self.canvas.snapshot()))
+
+    def draw_polygon(self, event, x, y):
+        """
+        Draws a polygon based on mouse events: adds points on left click and shows preview on mouse move.
+
+        Args:
+            event (int): The type of mouse event (click, move).
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+        """
+        if event == cv.EVENT_LBUTTONDOWN:
+            self.polygon_points.append((x, y))
+            self.drawing = True
+            if len(self.polygon_points) == 1:
+                self._start_preview()
+        elif event == cv.EVENT_MOUSEMOVE and len(self.polygon_points) > 0 and self.drawing:
+            self._restore_preview()
+            if len(self.polygon_points) > 1:
+                points = np.array(self.polygon_points,
+                                  dtype=np.int32).reshape((-1, 1, 2))
+                cv.polylines(self.temp_canvas, [
+                             points], isClosed=False, color=self.draw_color, thickness=2)
+            cv.line(self.temp_canvas,
+                    self.polygon_points[-1], (x, y), self.draw_color, 2)
+            self._show_preview(self.polygon_points + [(x, y)])
+
+    def finalize_polygon(self):
+        """
+        Finalizes and adds the polygon to the canvas after closing the shape.
+        """
+        if len(self.polygon_points) > 2:
+            self.drawing = False
+            self.polygon_points.append(self.polygon_points[0])
+            polygon_shape = Polygon(self.polygon_points, self.draw_color)
+            self.shape_manager.add_shape(polygon_shape)
+            self.shape_manager.draw_all(self.canvas)
+            # the canvas was drawn on in place, the preview copy is out of date
+            self._preview_source = None
+            self.undo_redo_manager.add_action(DrawAction(
+                self.shape_manager.get_shapes(), self.canvas.snapshot()))
+        self.polygon_points = []
+
+    def handle_erase_mode(self, event, x, y):
+        """
+        Handles the eraser mode, allowing the user to erase parts of the canvas by drawing over them.
+
+        Args:
+            event (int): The type of mouse event (click, move, release).
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+        """
+        # center the eraser rect around the mouse
+        top_left, bottom_right = EraseAction.eraser_bounds(
+            x, y, self.eraser_size, self.canvas.width, self.canvas.height)
+
+        if event == cv.EVENT_LBUTTONDOWN:
+            self.is_erasing = True
+            self.erase_stroke = []
+        elif event == cv.EVENT_LBUTTONUP and self.is_erasing:
+            self.is_erasing = False
+            self._add_erase_action()
+
+        if self.is_erasing and event in (cv.EVENT_LBUTTONDOWN, cv.EVENT_MOUSEMOVE):
+            # simply fill the eraser area with the background color
+            self.canvas.fill_rect(top_left, bottom_right,
+                                  self.canvas.backgroundColor)
+            self.erase_stroke.append((x, y))
+
+        self._show_eraser_preview(top_left, bottom_right)
+
+    def handle_vector_erase_mode(self, event, x, y):
+        """
+        Handles the vector eraser mode: instead of painting over pixels, the parts of shapes
+        under the eraser are removed from the shape manager, so the erase survives redraws
+        and is undone by restoring the previous shapes.
+
+        Args:
+            event (int): The type of mouse event (click, move, release).
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+        """
+        top_left, bottom_right = EraseAction.eraser_bounds(
+            x, y, self.eraser_size, self.canvas.width, self.canvas.height)
+
+        if event == cv.EVENT_LBUTTONDOWN:
+            self.is_erasing = True
+            self.erase_changed = False
+        elif event == cv.EVENT_LBUTTONUP and self.is_erasing:
+            self.is_erasing = False
+            if self.erase_changed:
+                self.undo_redo_manager.add_action(
+                    ShapeAction(self.shape_manager.get_shapes(),
+                                (self.canvas.width, self.canvas.height)))
+
+        if self.is_erasing and event in (cv.EVENT_LBUTTONDOWN, cv.EVENT_MOUSEMOVE):
+            rect = (top_left[0], top_left[1],
+                    bottom_right[0] - 1, bottom_right[1] - 1)
+            hits = self.shape_manager.query(rect)
+            redraw_rect = None
+            thickness = 0
+            for shape in hits:
+                remaining = shape.erase(rect)
+                if len(remaining) == 1 and remaining[0] is shape:
+                    continue
+                self.shape_manager.replace_shape(shape, remaining)
+                redraw_rect = self._union_rect(redraw_rect, shape.bounds())
+                thickness = max(thickness, shape.thickness)
+            if redraw_rect is not None:
+                self.erase_changed = True
+                self._redraw_region(redraw_rect, thickness + 1)
+
+        self._show_eraser_preview(top_left, bottom_right)
+
+    def _redraw_region(self, rect, padding=0):
+        """
+        Re-renders the shapes inside a region of the canvas on a blank background, with the
+        same pixels a full redraw gives: every shape is rendered whole into a scratch image
+        and only the region is copied back, as lines that are clipped at the region edge
+        would be rasterized differently.
+
+        Args:
+            rect (tuple): The (x1, y1, x2, y2) region, inclusive.
+            padding (int, optional): Pixels added on every side of the region, Defaults to 0.
+        """
+        x1, y1 = max(0, rect[0] - padding), max(0, rect[1] - padding)
+        x2 = min(self.canvas.width, rect[2] + padding + 1)
+        y2 = min(self.canvas.height, rect[3] + padding + 1)
+        if x1 >= x2 or y1 >= y2:
+            return
+        shapes = self.shape_manager.query((x1, y1, x2 - 1, y2 - 1))
+        # the scratch covers the region and the shapes reaching into it, within the canvas
+        sx1, sy1, sx2, sy2 = x1, y1, x2 - 1, y2 - 1
+        for shape in shapes:
+            sx1, sy1, sx2, sy2 = self._union_rect((sx1, sy1, sx2, sy2), shape.bounds())
+        sx1, sy1 = max(0, sx1), max(0, sy1)
+        sx2, sy2 = min(self.canvas.width, sx2 + 1), min(self.canvas.height, sy2 + 1)
+        scratch = np.full((sy2 - sy1, sx2 - sx1, 3), self.canvas.backgroundColor, dtype=np.uint8)
+        for shape in shapes:
+            shape.render(scratch, (sx1, sy1))
+        self.canvas.paste((x1, y1), scratch[y1 - sy1:y2 - sy1, x1 - sx1:x2 - sx1])
+        # the redrawn area can be larger than the eraser, so bring the preview copy up to date
+        if self._preview_is_current():
+            self.temp_canvas[y1:y2, x1:x2] = self.canvas.view()[y1:y2, x1:x2]
+
+    @staticmethod
+    def _union_rect(a, b):
+        """Returns the bounding box of two (x1, y1, x2, y2) rectangles; a may be None."""
+        if a is None:
+            return b
+        return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+    def _show_eraser_preview(self, top_left, bottom_right):
+        """
+        Shows the canvas with a translucent square marking the eraser.
+        Only the cursor area of the preview copy is touched.
+
+        Args:
+            top_left (tuple): The (x1, y1) corner of the eraser.
+            bottom_right (tuple): The (x2, y2) corner of the eraser, exclusive.
+        """
+        self._restore_preview()
+        (x1, y1), (x2, y2) = top_left, bottom_right
+        # the eraser may reach past the shown area of a large canvas
+        x2, y2 = min(x2, self.temp_canvas.shape[1]), min(y2, self.temp_canvas.shape[0])
+        if x1 >= x2 or y1 >= y2:
+            self.canvas.show(self.temp_canvas)
+            return
+        view = self.canvas.view()
+        cv.addWeighted(view[y1:y2, x1:x2], 0.5, view[y1:y2, x1:x2], 0,
+                       100, dst=self.temp_canvas[y1:y2, x1:x2])
+
+        # Display the canvas with preview
+        self._show_preview([top_left, (x2 - 1, y2 - 1)], thickness=0)
+
+    def _add_erase_action(self):
+        """
+        Records the finished eraser stroke for undo as its path, replayed on the state it was
+        drawn on. After several strokes in a row a full snapshot is stored instead, so undo
+        never has to replay a long chain.
+        """
+        base = self.undo_redo_manager.current_action()
+        if base is None or getattr(base, "depth", 0) >= EraseAction.MAX_REPLAY_DEPTH:
+            action = DrawAction(self.shape_manager.get_shapes(),
+                                self.canvas.snapshot())
+        else:
+            action = EraseAction(self.shape_manager.get_shapes(), base, self.erase_stroke,
+                                 self.eraser_size, self.canvas.backgroundColor)
+        self.undo_redo_manager.add_action(action)
+        self.erase_stroke = []
+
+    def rotate_canvas(self, angle):
+        """
+        Rotates the canvas and the shapes on it by the given angle (a multiple of 90,
+        positive is clockwise).
+
+        Args:
+            angle (int): The angle to rotate the canvas by (90, -90 or 180).
+        """
+        angle %= 360
+        last_x, last_y = self.canvas.width - 1, self.canvas.height - 1
+        # pixel (x, y) moves to (last_y - y, x) clockwise, to (y, last_x - x) counterclockwise
+        # and to (last_x - x, last_y - y) when turned around
+        if angle == 90:
+            matrix = np.array([[0, -1, last_y], [1, 0, 0]], dtype=np.float64)
+        elif angle == 270:
+            matrix = np.array([[0, 1, 0], [-1, 0, last_x]], dtype=np.float64)
+        elif angle == 180:
+            matrix = np.array([[-1, 0, last_x], [0, -1, last_y]], dtype=np.float64)
+        else:
+            return
+        self._apply_transform(matrix, rotation=self.ROTATIONS[angle])
+
+    def rotate_view(self):
+        """
+        Rotates the canvas pixels by rotation_angle without moving the shapes or recording an
+        undo step. The video recorder calls this on every frame after drawing the shapes, so
+        only the shown and recorded image is turned.
+        """
+        self.rotation_angle %= 360
+        # cv.rotate writes a new array, so the frame is neither copied first nor at 0 degrees
+        rotation = self.ROTATIONS.get(self.rotation_angle)
+        if rotation is not None:
+            self.canvas.rotate(rotation)
+
+    def _apply_transform(self, matrix, rotation=None, crop=None):
+        """
+        Applies a rotation or crop to the shapes and the canvas and records it for undo.
+        The shapes are moved in one batch by the affine matrix; the pixels are rotated or
+        sliced exactly, so nothing has to be redrawn and raster-only edits like erased
+        areas are kept.
+
+        Args:
+            matrix (np.ndarray): The 2x3 affine matrix mapping old canvas coordinates to new ones.
+            rotation (int, optional): The matching cv.ROTATE_* code.
+            crop (tuple, optional): The matching (x1, y1, x2, y2) region, x2 and y2 exclusive.
+        """
+        self.shape_manager.transform(matrix)
+        base = self.undo_redo_manager.current_action()
+        action = TransformAction(self.shape_manager.get_shapes(), base, rotation, crop)
+        action.transform_canvas(self.canvas)
+        if base is None or action.depth > EraseAction.MAX_REPLAY_DEPTH:
+            action = DrawAction(self.shape_manager.get_shapes(),
+                                self.canvas.snapshot())
+        self.undo_redo_manager.add_action(action)
+
+    def handle_crop_mode(self, event, x, y):
+        """
+        Handles cropping mode, allowing the user to define a rectangular region to crop.
+
+        Args:
+            event (int): The type of mouse event (click, move).
+            x (int): The x-coordinate of the mouse.
+            y (int): The y-coordinate of the mouse.
+        """
+        if event == cv.EVENT_LBUTTONDOWN:
+            # record the first point
+            if len(self.crop_points) == 0:
+                self.crop_points = [(x, y)]
+                self._start_preview()
+            # record the second point and apply the crop
+            elif len(self.crop_points) == 1:
+                self.crop_points.append((x, y))
+                self.apply_crop()
+
+        elif event == cv.EVENT_MOUSEMOVE and len(self.crop_points) == 1:
+            # temp canvas for preview
+            self._restore_preview()
+            cv.rectangle(self.temp_canvas, self.crop_points[0], (x, y),
+                         color=(0, 0, 255), thickness=2)
+            self._show_preview([self.crop_points[0], (x, y)])
+        else:
+            # restore the original canvas
+            self.canvas.draw_canvas()
+
+    def apply_crop(self):
+        """
+        Applies the cropping operation, cutting the canvas based on the selected crop points.
+        The shapes are moved along, so they keep their place in the cropped canvas.
+        """
+        if len(self.crop_points) == 2:
+            (x1, y1), (x2, y2) = self.crop_points
+
+            # ensure the coordinates are ordered correctly
+            x1, x2 = sorted([x1, x2])
+            y1, y2 = sorted([y1, y2])
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(self.canvas.width, x2), min(self.canvas.height, y2)
+            if x2 > x1 and y2 > y1:
+                matrix = np.array([[1, 0, -x1], [0, 1, -y1]], dtype=np.float64)
+                self._apply_transform(matrix, crop=(x1, y1, x2, y2))
+                self.canvas.draw_canvas()
+            # Reset crop points
+            self.crop_points = []
+
+    def _start_preview(self):
+        """
+        Copies the canvas into temp_canvas as the base for a new preview.
+        Called once per drag; mouse moves then only restore the area their preview covered.
+        """
+        self.temp_canvas = self.canvas.view().copy()
+        self._preview_source = self.canvas.view()
+        self._preview_resets = self.canvas.reset_count
+        self._preview_rect = None
+
+    def _preview_is_current(self):
+        """
+        Tells whether temp_canvas was copied from the canvas as it is now, apart from the
+        changes the tools copied over themselves. A reset may clear the array in place,
+        so resets are counted as well.
+
+        Returns:
+            bool: False if the preview has to start over from a fresh copy.
+        """
+        return self._preview_source is self.canvas.view() and \
+            self._preview_resets == self.canvas.reset_count
+
+    def _restore_preview(self):
+        """
+        Removes the previous preview from temp_canvas by copying back the area it covered.
+        Falls back to a full copy if the canvas was replaced or reset since the preview started
+        (for example by a new camera frame).
+        """
+        if not self._preview_is_current():
+            self._start_preview()
+        elif self._preview_rect is not None:
+            x1, y1, x2, y2 = self._preview_rect
+            self.temp_canvas[y1:y2, x1:x2] = self.canvas.view()[y1:y2, x1:x2]
+
+    def _show_preview(self, points, thickness=2):
+        """
+        Remembers the area covered by the preview just drawn and shows temp_canvas.
+
+        Args:
+            points (list): Points whose bounding box contains the preview.
+            thickness (int, optional): The line thickness of the preview, Defaults to 2.
+        """
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        pad = thickness + 1
+        height, width = self.temp_canvas.shape[:2]
+        self._preview_rect = (max(0, min(xs) - pad), max(0, min(ys) - pad),
+                              min(width, max(xs) + pad + 1), min(height, max(ys) + pad + 1))
+        self.canvas.show(self.temp_canvas)
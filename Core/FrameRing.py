@@ -0,0 +1,317 @@
+import os
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class FrameRing:
+    """
+    A ring of frame slots in shared memory that moves frames from one producer process to
+    any number of consumer processes without pickling or copying them through a pipe.
+
+    The producer numbers its frames 1, 2, 3, ... and frame n goes into slot n % slots. Every
+    slot carries a stamp that works as a seqlock: it is odd while the producer writes the
+    slot and 2 * n once frame n is complete, so a consumer can tell whether what it copied is
+    whole and still the frame it asked for. There are no locks; each word of the header has
+    exactly one writer.
+
+    Consumers read through FrameReader. A reader created with a cursor index publishes how
+    far it has got, and a blocking put waits for all such readers before overwriting a frame
+    they still need. Readers without a cursor never hold the producer up; they skip the
+    frames they were too slow for and count them as dropped.
+
+    Header layout (int64 words): frames written, closed flag, one stamp per slot and one
+    cursor per reader; then one float64 timestamp per slot, then the pixels.
+    """
+
+    WRITTEN, CLOSED, STAMPS = 0, 1, 2
+    # Sleep between polls while waiting for a frame or for slow readers
+    POLL_SECONDS = 0.0002
+
+    def __init__(self, shape, slots=8, max_readers=4, dtype=np.uint8, name=None):
+        """
+        Creates the ring, or attaches to one created by another process.
+
+        Args:
+            shape (tuple): The shape of one frame, e.g. (1080, 1920, 3).
+            slots (int): Number of frames the ring holds.
+            max_readers (int): Number of cursor places for readers that must not miss frames.
+            dtype (np.dtype): The pixel type.
+            name (str, optional): The name of an existing ring to attach to. The other
+                arguments must match the ones it was created with.
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.max_readers = max_readers
+        self.dtype = np.dtype(dtype)
+        header_words = self.STAMPS + slots + max_readers
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        # pixels start on a cache line so slot copies stay aligned
+        pixels_offset = -(-(header_words + slots) * 8 // 64) * 64
+        size = pixels_offset + slots * frame_bytes
+
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # processes started by the creator share its resource tracker, so attaching
+            # does not make them owners; only the creator unlinks the block
+            self.block = shared_memory.SharedMemory(name=name)
+        # a forked child inherits this object, but not the ownership
+        self._owner_pid = os.getpid() if name is None else None
+        self.name = self.block.name
+
+        buffer = self.block.buf
+        self._header = np.ndarray((header_words,), dtype=np.int64, buffer=buffer)
+        self._stamps = self._header[self.STAMPS:self.STAMPS + slots]
+        self._cursors = self._header[self.STAMPS + slots:]
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buffer,
+                                      offset=header_words * 8)
+        self._frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=buffer,
+                                  offset=pixels_offset)
+        if name is None:
+            self._header[:] = 0
+            self._cursors[:] = -1
+
+    def __reduce__(self):
+        # a ring sent to another process attaches to the same block
+        return (_attach_ring, (self.shape, self.slots, self.max_readers, self.dtype.str, self.name))
+
+    @property
+    def owner(self):
+        """bool: True in the process that created the ring."""
+        return self._owner_pid == os.getpid()
+
+    @property
+    def written(self):
+        """int: The number of the last complete frame, 0 before the first one."""
+        return int(self._header[self.WRITTEN])
+
+    @property
+    def closed(self):
+        """bool: True once the producer has called close_stream."""
+        return bool(self._header[self.CLOSED])
+
+    def reserve(self, block=False, timeout=None):
+        """
+        Gives the producer the slot of the next frame to fill in place, for example with
+        cv.VideoCapture.read(image=...), which avoids even the copy into the ring.
+        The frame becomes visible to readers with publish().
+
+        Args:
+            block (bool): If True, wait until every reader with a cursor is done with the
+                frame the slot still holds.
+            timeout (float, optional): Longest wait in seconds when blocking.
+
+        Returns:
+            np.ndarray: A view of the slot, or None if the wait timed out.
+        """
+        sequence = self.written + 1
+        if block and not self._wait_for_readers(sequence - self.slots, timeout):
+            return None
+        slot = sequence % self.slots
+        self._stamps[slot] = 2 * sequence - 1
+        return self._frames[slot]
+
+    def publish(self, timestamp=None):
+        """
+        Makes the frame filled through reserve() visible to the readers.
+
+        Args:
+            timestamp (float, optional): The capture time of the frame. Defaults to now.
+
+        Returns:
+            int: The number of the frame.
+        """
+        sequence = self.written + 1
+        slot = sequence % self.slots
+        self._timestamps[slot] = time.monotonic() if timestamp is None else timestamp
+        self._stamps[slot] = 2 * sequence
+        self._header[self.WRITTEN] = sequence
+        return sequence
+
+    def put(self, frame, timestamp=None, block=False, timeout=None):
+        """
+        Copies a frame into the next slot and publishes it.
+
+        Args:
+            frame (np.ndarray): The frame, of the ring's shape.
+            timestamp (float, optional): The capture time of the frame. Defaults to now.
+            block (bool): If True, wait for slow readers with a cursor instead of
+                overwriting a frame they still need.
+            timeout (float, optional): Longest wait in seconds when blocking.
+
+        Returns:
+            int: The number of the frame, or None if the wait timed out.
+        """
+        slot = self.reserve(block, timeout)
+        if slot is None:
+            return None
+        slot[...] = frame
+        return self.publish(timestamp)
+
+    def close_stream(self):
+        """Tells the readers that no more frames will come."""
+        self._header[self.CLOSED] = 1
+
+    def _wait_for_readers(self, sequence, timeout):
+        """
+        Waits until every reader with a cursor no longer needs a frame.
+
+        Args:
+            sequence (int): The number of the frame about to be overwritten.
+            timeout (float, optional): Longest wait in seconds.
+
+        Returns:
+            bool: True once the frame is free, False if the wait timed out.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            cursors = self._cursors[self._cursors >= 0]
+            if sequence < 1 or not len(cursors) or cursors.min() >= sequence:
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(self.POLL_SECONDS)
+
+    def reader(self, cursor=None, stride=1, offset=0, start="next"):
+        """
+        Creates a reader of this ring, see FrameReader.
+        """
+        return FrameReader(self, cursor, stride, offset, start)
+
+    def close(self):
+        """Detaches from the ring; its creator also removes it."""
+        del self._header, self._stamps, self._cursors, self._timestamps, self._frames
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+
+def _attach_ring(shape, slots, max_readers, dtype, name):
+    return FrameRing(shape, slots, max_readers, dtype, name)
+
+
+class FrameReader:
+    """
+    One consumer's position in a FrameRing.
+
+    Readers of a worker pool can split the frames between them without talking to each
+    other: with stride n and offset k a reader only takes the frames whose number is k modulo
+    n, so n readers with offsets 0 to n-1 see every frame exactly once.
+    """
+
+    def __init__(self, ring, cursor=None, stride=1, offset=0, start="next"):
+        """
+        Initializes the reader.
+
+        Args:
+            ring (FrameRing): The ring to read.
+            cursor (int, optional): Index of the cursor place this reader publishes its position
+                in, so a blocking producer waits for it. Each reader needs its own index. Without
+                one, the reader may miss frames.
+            stride (int): Take every stride-th frame.
+            offset (int): The frame numbers taken are offset modulo stride.
+            start (str): "next" to begin with the next frame the producer writes, "oldest" to
+                begin with the oldest frame still in the ring.
+        """
+        self.ring = ring
+        self.cursor = cursor
+        self.stride = stride
+        self.offset = offset % stride
+        self.dropped = 0
+        self.received = 0
+        self._held = None
+        first = ring.written + 1
+        if start == "oldest":
+            first = max(1, first - ring.slots)
+        self._next = self._align(first)
+        self._release(self._next - 1)
+
+    def _align(self, sequence):
+        """Returns the first frame number from sequence on that belongs to this reader."""
+        return sequence + (self.offset - sequence) % self.stride
+
+    def _release(self, sequence):
+        """Publishes that this reader needs no frame up to and including sequence."""
+        if self.cursor is not None:
+            self.ring._cursors[self.cursor] = sequence
+
+    def get(self, timeout=None, copy=True):
+        """
+        Waits for this reader's next frame.
+
+        Args:
+            timeout (float, optional): Longest wait in seconds. Defaults to waiting until the
+                producer closes the stream.
+            copy (bool): If False, a view of the slot is returned instead of a copy. With a
+                cursor, the slot is kept for the reader until its next get or release call;
+                without one, the producer may overwrite it at any time.
+
+        Returns:
+            tuple: (frame number, timestamp, frame), or None if the wait timed out or the
+            stream was closed and read to the end.
+        """
+        self.release()
+        ring = self.ring
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sequence = self._next
+            written = ring.written
+            if written >= sequence:
+                oldest = written - ring.slots + 1
+                if sequence < oldest:
+                    # the producer has lapped this reader, continue with the oldest frame left
+                    self._next = self._align(oldest + 1)
+                    self.dropped += (self._next - sequence) // self.stride
+                    continue
+                slot = sequence % ring.slots
+                if ring._stamps[slot] == 2 * sequence:
+                    timestamp = float(ring._timestamps[slot])
+                    frame = ring._frames[slot].copy() if copy else ring._frames[slot]
+                    # a copy is only whole if the slot was not rewritten meanwhile
+                    if not copy or ring._stamps[slot] == 2 * sequence:
+                        self._next = sequence + self.stride
+                        self.received += 1
+                        if copy:
+                            self._release(self._next - 1)
+                        else:
+                            self._held = sequence
+                        return sequence, timestamp, frame
+                continue
+            if ring.closed:
+                return None
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            time.sleep(ring.POLL_SECONDS)
+
+    def release(self):
+        """Gives back the slot of the last frame returned by get(copy=False)."""
+        if self._held is not None:
+            self._held = None
+            self._release(self._next - 1)
+
+    def latest(self, out, last_sequence=0):
+        """
+        Copies the newest complete frame, skipping everything before it; meant for previews.
+
+        Args:
+            out (np.ndarray): Array of the ring's frame shape to copy into.
+            last_sequence (int): The frame number returned by the previous call.
+
+        Returns:
+            int: The number of the copied frame, or None if there was no newer complete
+            frame; out may then hold a torn frame and should be read again.
+        """
+        ring = self.ring
+        sequence = ring.written
+        if sequence <= last_sequence:
+            return None
+        slot = sequence % ring.slots
+        if ring._stamps[slot] != 2 * sequence:
+            return None
+        out[...] = ring._frames[slot]
+        if ring._stamps[slot] != 2 * sequence:
+            return None
+        self._next = sequence + 1
+        self.received += 1
+        return sequence
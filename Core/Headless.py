@@ -0,0 +1,257 @@
+import itertools
+import json
+import os
+import time
+import cv2 as cv
+import numpy as np
+
+
+def load_events(path):
+    """
+    Reads a scripted session from a JSON Lines file.
+
+    Each line is one event scheduled at a frame index, for example:
+        {"frame": 10, "key": "c"}
+        {"frame": 12, "mouse": "LBUTTONDOWN", "x": 100, "y": 80}
+        {"frame": 13, "mouse": "MOUSEMOVE", "x": 140, "y": 90}
+        {"frame": 20, "crop": [0, 0, 320, 240]}
+
+    Args:
+        path (str): Path of the event file.
+
+    Returns:
+        dict: Lists of events keyed by frame index, in file order.
+    """
+    events = {}
+    with open(path) as event_file:
+        for line_number, line in enumerate(event_file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            event = json.loads(line)
+            if "frame" not in event:
+                raise ValueError(f"{path}:{line_number}: event has no frame index")
+            events.setdefault(int(event["frame"]), []).append(event)
+    return events
+
+
+def save_events(path, events):
+    """
+    Writes events in the format read by load_events.
+
+    Args:
+        path (str): Path of the event file.
+        events (list): Event dictionaries, each with a "frame" key.
+    """
+    with open(path, "w") as event_file:
+        for event in events:
+            event_file.write(json.dumps(event) + "\n")
+
+
+class SyntheticCapture:
+    """
+    A stand-in for cv.VideoCapture that generates moving test frames, so scripted runs
+    need neither a camera nor a video file.
+    """
+
+    def __init__(self, width=640, height=480, frame_count=300):
+        """
+        Initializes the synthetic capture.
+
+        Args:
+            width (int): The width of the generated frames.
+            height (int): The height of the generated frames.
+            frame_count (int): The number of frames to deliver before read() fails.
+        """
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+        self.position = 0
+        # A horizontal gradient that scrolls one pixel per frame
+        self._gradient = np.tile(
+            np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        """
+        Returns the next generated frame.
+
+        Returns:
+            tuple: (True, frame) while frames remain, (False, None) afterwards.
+        """
+        if self.position >= self.frame_count:
+            return False, None
+        shifted = np.roll(self._gradient, self.position, axis=1)
+        frame = cv.merge((shifted, np.flipud(shifted), np.full_like(shifted, 64)))
+        self.position += 1
+        return True, frame
+
+    def get(self, prop):
+        if prop == cv.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv.CAP_PROP_FRAME_COUNT:
+            return self.frame_count
+        if prop == cv.CAP_PROP_POS_FRAMES:
+            return self.position
+        return 0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        pass
+
+
+class ScriptedRun:
+    """
+    Drives an application (Program or Drawer) without a window, replaying scripted mouse and
+    key events through the same _mouse_callback and dispatch_key methods a user would reach.
+    """
+
+    def __init__(self, app, events, frame_count=None, fps=30, output_dir=None, save_frames=False,
+                 video_path=None):
+        """
+        Initializes the scripted run.
+
+        Args:
+            app (Program or Drawer): A headless application exposing step, dispatch_key and _mouse_callback.
+            events (dict): Events keyed by frame index, as returned by load_events.
+            frame_count (int, optional): Number of frames to run. By default the run lasts until the
+                application's input runs out or a scripted key quits it.
+            fps (int): Simulated frame rate used for timestamps and the output video.
+            output_dir (str, optional): Directory for the saved frames and output video.
+            save_frames (bool): If True, every shown frame is saved as a PNG in output_dir.
+            video_path (str, optional): File to write the shown frames to as a video.
+        """
+        self.app = app
+        self.events = events
+        self.frame_count = frame_count
+        self.fps = fps
+        self.output_dir = output_dir
+        self.save_frames = save_frames
+        self.video_path = video_path
+        self.video_writer = None
+        self.frame_index = 0
+        self.frame_times = []
+
+        # Timestamps follow the simulated frame rate so recordings are reproducible
+        for owner in (app, getattr(app, "video_recorder", None)):
+            if owner is not None and hasattr(owner, "clock"):
+                owner.clock = self._simulated_clock
+
+    def _simulated_clock(self):
+        return self.frame_index / self.fps
+
+    def run(self):
+        """
+        Replays all frames and events.
+
+        Returns:
+            dict: Throughput and per-frame latency statistics of the run.
+        """
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+        frame_indices = itertools.count() if self.frame_count is None else range(self.frame_count)
+        started = time.perf_counter()
+        for self.frame_index in frame_indices:
+            frame_started = time.perf_counter()
+            if not self.app.step():
+                break
+            keep_running = self._dispatch_events(self.events.get(self.frame_index, []))
+            if hasattr(self.app, "input"):
+                # render the last coalesced mouse move of this frame
+                self.app.input.flush()
+            self.frame_times.append(time.perf_counter() - frame_started)
+            if hasattr(self.app, "profiler"):
+                self.app.profiler.end_frame()
+            self._write_output(self.app.canvas.last_shown)
+            if not keep_running:
+                break
+        elapsed = time.perf_counter() - started
+
+        if hasattr(self.app, "cleanup"):
+            self.app.cleanup()
+        if self.video_writer is not None:
+            self.video_writer.release()
+        return self._report(elapsed)
+
+    def _dispatch_events(self, events):
+        """
+        Delivers the events of one frame to the application.
+
+        Args:
+            events (list): The event dictionaries scheduled for the current frame.
+
+        Returns:
+            bool: False if a key event asked the application to quit.
+        """
+        for event in events:
+            if "mouse" in event:
+                event_code = getattr(cv, "EVENT_" + event["mouse"].upper())
+                self.app._mouse_callback(
+                    event_code, int(event["x"]), int(event["y"]), event.get("flags", 0), None)
+            elif "key" in event:
+                key = event["key"]
+                key_code = ord(key) if isinstance(key, str) else int(key)
+                if not self.app.dispatch_key(key_code):
+                    return False
+            elif "crop" in event:
+                self.app.cropper.crop_points = tuple(event["crop"])
+            else:
+                raise ValueError(f"Unknown event: {event}")
+        return True
+
+    def _write_output(self, frame):
+        """
+        Saves the frame shown at the end of the current step.
+
+        Args:
+            frame (np.ndarray): The shown frame.
+        """
+        if frame is None or not self.output_dir:
+            return
+        if self.save_frames:
+            cv.imwrite(os.path.join(self.output_dir,
+                       f"frame_{self.frame_index:05d}.png"), frame)
+        if self.video_path:
+            if self.video_writer is None:
+                self._video_size = (frame.shape[1], frame.shape[0])
+                self.video_writer = cv.VideoWriter(
+                    os.path.join(self.output_dir, self.video_path),
+                    cv.VideoWriter_fourcc(*'XVID'), self.fps, self._video_size)
+            # rotation and cropping change the frame size, the video size is fixed
+            if (frame.shape[1], frame.shape[0]) != self._video_size:
+                frame = cv.resize(frame, self._video_size)
+            self.video_writer.write(frame)
+
+    def _report(self, elapsed):
+        """
+        Summarizes the timings of the run.
+
+        Args:
+            elapsed (float): The wall time of the whole run in seconds.
+
+        Returns:
+            dict: Frame count, throughput and latency percentiles in milliseconds.
+        """
+        times_ms = np.array(self.frame_times) * 1000
+        if len(times_ms) == 0:
+            times_ms = np.zeros(1)
+        return {
+            "frames": len(self.frame_times),
+            "seconds": elapsed,
+            "fps": len(self.frame_times) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": {
+                "mean": float(times_ms.mean()),
+                "p50": float(np.percentile(times_ms, 50)),
+                "p95": float(np.percentile(times_ms, 95)),
+                "p99": float(np.percentile(times_ms, 99)),
+                "max": float(times_ms.max()),
+            },
+        }
+
@@ -0,0 +1,218 @@
+import cv2 as cv
+import os
+import time
+from collections import deque
+
+
+class _StageTimer:
+    """
+    Context manager that measures one stage and reports it to its profiler.
+    One instance is reused for every measurement of the same stage.
+    """
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """Context manager used while profiling is disabled; it does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageProfiler:
+    """
+    Measures how long each stage of a frame loop takes (read, crop, draw, show, ...),
+    keeps a rolling window of timings per stage, and reports p50/p95/p99 latencies on an
+    on-screen overlay or in a metrics file.
+
+    Usage:
+        with profiler.stage("read"):
+            ret, frame = cap.read()
+        ...
+        profiler.end_frame()
+    """
+
+    def __init__(self, enabled=True, window=300, show_hud=False, dump_path=None, dump_interval=5.0):
+        """
+        Initializes the profiler.
+
+        Args:
+            enabled (bool): If False, stage() returns a shared no-op timer and nothing is recorded.
+            window (int): Number of most recent timings kept per stage.
+            show_hud (bool): Whether draw_hud should draw the overlay.
+            dump_path (str, optional): Metrics file; '.csv' appends CSV rows, anything else appends
+                JSON lines.
+            dump_interval (float): Seconds between two periodic dumps.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.show_hud = show_hud
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.samples = {}  # stage name -> deque of durations in seconds
+        self._timers = {}
+        self._frame_start = None
+        self._last_dump = time.monotonic()
+
+    def stage(self, name):
+        """
+        Returns a context manager that times the enclosed block as the given stage.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            A context manager; a shared no-op one while the profiler is disabled.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _StageTimer(self, name)
+        return timer
+
+    def record(self, name, seconds):
+        """
+        Adds one timing of a stage.
+
+        Args:
+            name (str): The stage name.
+            seconds (float): The measured duration.
+        """
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def end_frame(self):
+        """
+        Marks the end of a loop iteration: records the whole frame time as the 'frame' stage
+        and writes the metrics file when the dump interval has passed.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.record("frame", now - self._frame_start)
+        self._frame_start = now
+
+        if self.dump_path and time.monotonic() - self._last_dump >= self.dump_interval:
+            self.dump()
+
+    def percentiles(self, name):
+        """
+        Computes statistics of the recent timings of a stage.
+
+        Args:
+            name (str): The stage name.
+
+        Returns:
+            dict: count, mean, p50, p95, p99 and max in milliseconds, or None if the stage has no timings.
+        """
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+
+        def at(fraction):
+            return ordered[round(fraction * last)] * 1000
+
+        return {
+            "count": len(ordered),
+            "mean": sum(ordered) / len(ordered) * 1000,
+            "p50": at(0.50),
+            "p95": at(0.95),
+            "p99": at(0.99),
+            "max": ordered[-1] * 1000,
+        }
+
+    def summary(self):
+        """
+        Returns the statistics of all stages.
+
+        Returns:
+            dict: Stage name -> statistics as returned by percentiles.
+        """
+        return {name: self.percentiles(name) for name in list(self.samples)}
+
+    def draw_hud(self, image):
+        """
+        Draws the p50/p95/p99 latency of every stage in the top-left corner of the image.
+
+        Args:
+            image (np.ndarray): The image to draw on; it is modified in place.
+
+        Returns:
+            np.ndarray: The same image.
+        """
+        if not (self.enabled and self.show_hud):
+            return image
+        y = 20
+        for name, stats in self.summary().items():
+            if stats is None:
+                continue
+            text = f"{name:>8}: {stats['p50']:6.2f} / {stats['p95']:6.2f} / {stats['p99']:6.2f} ms"
+            # dark outline keeps the text readable on any background
+            cv.putText(image, text, (10, y), cv.FONT_HERSHEY_SIMPLEX,
+                       0.45, (0, 0, 0), 3, cv.LINE_AA)
+            cv.putText(image, text, (10, y), cv.FONT_HERSHEY_SIMPLEX,
+                       0.45, (255, 255, 255), 1, cv.LINE_AA)
+            y += 18
+        return image
+
+    def dump(self, path=None):
+        """
+        Appends the current statistics to a metrics file.
+
+        Args:
+            path (str, optional): The metrics file. Defaults to dump_path.
+        """
+        path = path or self.dump_path
+        if not path:
+            return
+        self._last_dump = time.monotonic()
+        timestamp = time.time()
+        summary = self.summary()
+
+        if path.endswith(".csv"):
+            # metrics are written by few runs, so the writers are only imported here
+            import csv
+            write_header = not os.path.exists(path)
+            with open(path, "a", newline="") as metrics_file:
+                writer = csv.writer(metrics_file)
+                if write_header:
+                    writer.writerow(["time", "stage", "count", "mean_ms",
+                                    "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+                for name, stats in summary.items():
+                    if stats is None:
+                        continue
+                    writer.writerow([f"{timestamp:.3f}", name, stats["count"]] +
+                                    [f"{stats[key]:.3f}" for key in ("mean", "p50", "p95", "p99", "max")])
+        else:
+            import json
+            with open(path, "a") as metrics_file:
+                metrics_file.write(json.dumps(
+                    {"time": timestamp, "stages": summary}) + "\n")
@@ -0,0 +1,168 @@
+import cv2 as cv
+import numpy as np
+
+
+class ShapeManager:
+    """
+    Manages a collection of shapes and provides functionality
+    to add, remove, and draw shapes on a canvas.
+
+    For hit-testing, shapes are indexed in a uniform grid of CELL_SIZE pixel cells by their
+    bounding boxes. The grid is only built on the first query, so managers that never query
+    pay nothing for it. Every indexed shape also gets a drawing order key, so the hits of a
+    query are sorted without looking at the other shapes.
+    """
+
+    CELL_SIZE = 64
+
+    def __init__(self):
+        self.shapes = []
+        self._grid = None  # (cell x, cell y) -> set of shapes, built on demand
+        # shape -> drawing order key, a tuple: the pieces that replace a shape get its key
+        # extended by their position, which sorts them between its neighbours
+        self._order = {}
+        self._next_order = 0
+
+    def add_shape(self, Shape):
+        """
+        Adds a shape to the shape manager.
+
+        Parameters:
+            Shape (Shape): The shape object to be added.
+        """
+        self.shapes.append(Shape)
+        if self._grid is not None:
+            self._index(Shape, (self._next_order,))
+            self._next_order += 1
+
+    def remove_shape(self, Shape):
+        """
+        Removes a shape from the shape manager if it exists.
+
+        Parameters:
+            Shape (Shape): The shape object to be removed.
+        """
+        if Shape in self.shapes:
+            self.shapes.remove(Shape)
+            if self._grid is not None:
+                self._unindex(Shape)
+
+    def draw_all(self, canvas):
+        """
+        Draws all the shapes in the shape manager on the provided canvas.
+
+        Parameters:
+            canvas (Canvas): The canvas where shapes will be drawn.
+        """
+        for shape in self.shapes:
+            shape.draw(canvas)
+
+    def set_shapes(self, shapes):
+        """
+        Sets a new list of shapes.
+
+        Parameters:
+            shapes (list): A list of Shape objects to replace the current ones.
+        """
+        self.shapes = shapes
+        self._grid = None
+        self._order = {}
+
+    def get_shapes(self):
+        """
+        Returns a copy of the current list of shapes.
+
+        Returns: list: A copy of the list of shapes.
+        """
+        return self.shapes.copy()
+
+    def transform(self, matrix):
+        """
+        Moves every shape by an affine transform. The coordinates of all shapes are gathered
+        into one array and transformed with a single matrix product; each shape is then
+        replaced by a moved copy, so shape lists kept in the undo history stay valid.
+
+        Parameters:
+            matrix (np.ndarray): A 2x3 affine matrix, as used by cv.warpAffine.
+        """
+        if not self.shapes:
+            return
+        coordinates = [shape.coordinates() for shape in self.shapes]
+        points = np.vstack(coordinates)
+        moved = points @ matrix[:, :2].T + matrix[:, 2]
+        splits = np.cumsum([len(c) for c in coordinates])[:-1]
+        self.set_shapes([shape.transformed(shape_points) for shape, shape_points
+                         in zip(self.shapes, np.split(moved, splits))])
+
+    def replace_shape(self, shape, new_shapes):
+        """
+        Replaces a shape with zero or more shapes at the same position in the drawing order.
+
+        Parameters:
+            shape (Shape): The shape to replace.
+            new_shapes (list): The shapes to put in its place.
+        """
+        position = self.shapes.index(shape)
+        self.shapes[position:position + 1] = new_shapes
+        if self._grid is not None:
+            order = self._order[shape]
+            self._unindex(shape)
+            for i, new_shape in enumerate(new_shapes):
+                self._index(new_shape, order + (i,))
+
+    def query(self, rect):
+        """
+        Finds the shapes whose bounding boxes overlap a rectangle.
+
+        Parameters:
+            rect (tuple): The (x1, y1, x2, y2) rectangle.
+
+        Returns:
+            list: The overlapping shapes, in drawing order.
+        """
+        if self._grid is None:
+            self._grid = {}
+            for i, shape in enumerate(self.shapes):
+                self._index(shape, (i,))
+            self._next_order = len(self.shapes)
+
+        candidates = set()
+        for cell in self._cells(rect):
+            candidates.update(self._grid.get(cell, ()))
+        x1, y1, x2, y2 = rect
+        hits = []
+        for shape in candidates:
+            bx1, by1, bx2, by2 = shape.bounds()
+            if bx1 <= x2 and x1 <= bx2 and by1 <= y2 and y1 <= by2:
+                hits.append(shape)
+        if len(hits) > 1:
+            hits.sort(key=self._order.__getitem__)
+        return hits
+
+    def _cells(self, rect):
+        """
+        Lists the grid cells covered by a rectangle.
+
+        Parameters:
+            rect (tuple): The (x1, y1, x2, y2) rectangle.
+
+        Returns:
+            list: The (cell x, cell y) keys.
+        """
+        size = self.CELL_SIZE
+        x1, y1, x2, y2 = (int(v) // size for v in rect)
+        return [(cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1)]
+
+    def _index(self, shape, order):
+        """Adds a shape with its drawing order key to every grid cell its bounding box covers."""
+        self._order[shape] = order
+        for cell in self._cells(shape.bounds()):
+            self._grid.setdefault(cell, set()).add(shape)
+
+    def _unindex(self, shape):
+        """Removes a shape and its drawing order key from the grid cells it covers."""
+        self._order.pop(shape, None)
+        for cell in self._cells(shape.bounds()):
+            bucket = self._grid.get(cell)
+            if bucket is not None:
+                bucket.discard(shape)
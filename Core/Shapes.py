@@ -0,0 +1,623 @@
+
+import cv2 as cv
+import numpy as np
+
+
+def _clip_segment(p, q, rect):
+    """
+    Finds the part of the segment p-q that lies inside an axis-aligned rectangle
+    (Liang-Barsky clipping).
+
+    Parameters:
+        p (tuple): The (x, y) start of the segment.
+        q (tuple): The (x, y) end of the segment.
+        rect (tuple): The (x1, y1, x2, y2) rectangle, inclusive.
+
+    Returns:
+        tuple or None: The (t0, t1) parameters of the inside part, or None if the segment misses the rectangle.
+    """
+    x1, y1, x2, y2 = rect
+    dx, dy = q[0] - p[0], q[1] - p[1]
+    t0, t1 = 0.0, 1.0
+    for denominator, numerator in ((-dx, p[0] - x1), (dx, x2 - p[0]), (-dy, p[1] - y1), (dy, y2 - p[1])):
+        if denominator == 0:
+            if numerator < 0:
+                return None
+            continue
+        t = numerator / denominator
+        if denominator < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return None
+    return t0, t1
+
+
+def _rects_overlap(a, b):
+    """Returns True if two (x1, y1, x2, y2) rectangles overlap (edges inclusive)."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class Shape:
+    """
+    Abstract base class representing a geometric shape. 
+    Subclasses must implement the draw and get_data methods.
+    """
+
+    # Drawings hold many small shapes; slots keep them compact and their attributes fast
+    __slots__ = ("color", "thickness", "confidence", "label", "label_position")
+
+    def __init__(self, color, thickness=2):
+        """
+        Initializes the shape with the specified color and default thickness.
+
+        Parameters:
+            color (tuple): The RGB color of the shape.
+        """
+        self.color = color
+        self.thickness = thickness
+        # how sure a detector is of the shape, between 0 and 1; None for drawn shapes
+        self.confidence = None
+        # the name a detector gave the shape and the (x, y) position of its text
+        self.label = None
+        self.label_position = None
+
+    def draw(self, canvas):
+        """
+        Draws the shape on the specified canvas. This is an abstract method
+        and must be implemented by subclasses.
+
+        Parameters:
+            canvas (Canvas): The canvas to draw the shape on.
+        """
+        pass
+
+    def get_data(self):
+        """
+        Returns the data associated with the shape. This is an abstract method
+        and must be implemented by subclasses.
+
+        Returns:
+            dict: A dictionary containing the shape's data.
+        """
+        pass
+
+    def bounds(self):
+        """
+        Returns the bounding box of the shape, including its line thickness. This is an
+        abstract method and must be implemented by subclasses.
+
+        Returns:
+            tuple: The (x1, y1, x2, y2) bounding box.
+        """
+        pass
+
+    def outline(self):
+        """
+        Returns the outline of the shape as a path. Used when erasing cuts the shape into pieces.
+
+        Returns:
+            tuple: (points, closed), with points an (N, 2) float array.
+        """
+        pass
+
+    def coordinates(self):
+        """
+        Returns the points that define the shape's position, so a transform can move many
+        shapes in one array operation. This is an abstract method and must be implemented by subclasses.
+
+        Returns:
+            np.ndarray: An (N, 2) float array.
+        """
+        pass
+
+    def transformed(self, points):
+        """
+        Creates a copy of the shape placed at new coordinates. This is an abstract method
+        and must be implemented by subclasses.
+
+        Parameters:
+            points (np.ndarray): The transformed result of coordinates(), same shape.
+
+        Returns:
+            Shape: A new shape; the original is not modified, so undo history can keep it.
+        """
+        pass
+
+    def erase(self, rect):
+        """
+        Erases the part of the shape's outline inside a rectangle.
+
+        Parameters:
+            rect (tuple): The (x1, y1, x2, y2) eraser rectangle.
+
+        Returns:
+            list: The shapes that remain: [self] if the outline was not touched, otherwise the
+            Polyline pieces left over (possibly none). The shape itself is never modified.
+        """
+        # widen the eraser by half the line width so it also takes the edges of the stroke
+        pad = self.thickness / 2
+        rect = (rect[0] - pad, rect[1] - pad, rect[2] + pad, rect[3] + pad)
+        if not _rects_overlap(rect, self.bounds()):
+            return [self]
+        points, closed = self.outline()
+        pieces = Polyline.split_path(points, closed, rect)
+        if pieces is None:
+            return [self]
+        return [Polyline(piece, self.color, self.thickness) for piece in pieces]
+
+
+class Circle(Shape):
+    """
+    Represents a circle shape with a specified center, radius, and color.
+    """
+
+    __slots__ = ("center", "radius")
+    # Fractional bits used to draw circles with sub-pixel centers or radii
+    SUBPIXEL_BITS = 4
+
+    def __init__(self, center, radius, color):
+        """
+        Initializes the circle with the given center, radius, and color.
+
+        Parameters:
+            center (tuple): The (x, y) coordinates of the center.
+            radius (int): The radius of the circle.
+            color (tuple): The RGB color of the circle.
+        """
+        super().__init__(color)
+        self.center = center
+        self.radius = radius
+
+    def draw(self, Canvas):
+        """
+        Draws the circle on the canvas.
+
+        Parameters:
+            Canvas (Canvas): The canvas to draw the circle on.
+        """
+        Canvas.draw_shape(self)
+
+    def render(self, image, offset=(0, 0)):
+        """
+        Draws the circle on an image whose top-left corner is at offset in canvas coordinates.
+
+        Parameters:
+            image (np.ndarray): The image to draw on.
+            offset (tuple): The canvas (x, y) position of the image's top-left pixel.
+        """
+        if self.center and self.radius > 0:
+            x, y = self.center[0] - offset[0], self.center[1] - offset[1]
+            if x % 1 or y % 1 or self.radius % 1:
+                # detected circles keep their sub-pixel position, drawn in fixed point
+                scale = 1 << self.SUBPIXEL_BITS
+                cv.circle(image, (round(x * scale), round(y * scale)), round(self.radius * scale),
+                          self.color, self.thickness, cv.LINE_8, self.SUBPIXEL_BITS)
+            else:
+                cv.circle(image, (int(x), int(y)), int(self.radius), self.color, self.thickness)
+
+    def get_data(self):
+        """
+        Returns the data of the circle.
+
+        Returns:
+            dict: A dictionary containing the circle's center and radius.
+        """
+        return {
+            'type': 'circle',
+            'center': self.center,
+            'radius': self.radius,
+        }
+
+    def bounds(self):
+        """
+        Returns the bounding box of the circle.
+
+        Returns:
+            tuple: The (x1, y1, x2, y2) bounding box.
+        """
+        reach = int(self.radius) + self.thickness
+        cx, cy = int(self.center[0]), int(self.center[1])
+        return cx - reach, cy - reach, cx + reach, cy + reach
+
+    def outline(self):
+        """
+        Returns the circle approximated by a closed path.
+
+        Returns:
+            tuple: (points, closed) with one point every 5 degrees.
+        """
+        points = cv.ellipse2Poly(tuple(int(c) for c in self.center),
+                                 (int(self.radius), int(self.radius)), 0, 0, 360, 5)
+        return points.astype(np.float64), True
+
+    def coordinates(self):
+        """
+        Returns the center of the circle.
+
+        Returns:
+            np.ndarray: A (1, 2) array.
+        """
+        return np.array([self.center], dtype=np.float64)
+
+    def transformed(self, points):
+        """
+        Creates a copy of the circle at a new center. The radius is kept, as the drawer
+        only applies rotations and translations.
+
+        Parameters:
+            points (np.ndarray): The new center as a (1, 2) array.
+
+        Returns:
+            Circle: The moved circle.
+        """
+        center = tuple(int(v) for v in np.rint(points[0]))
+        circle = Circle(center, self.radius, self.color)
+        circle.thickness = self.thickness
+        return circle
+
+    def erase(self, rect):
+        """
+        Erases the part of the circle inside a rectangle, leaving arcs as Polylines.
+
+        Parameters:
+            rect (tuple): The (x1, y1, x2, y2) eraser rectangle.
+
+        Returns:
+            list: The remaining shapes, see Shape.erase.
+        """
+        # skip the path conversion unless the ring actually crosses the rectangle
+        cx, cy = float(self.center[0]), float(self.center[1])
+        nearest_x = min(max(cx, rect[0]), rect[2])
+        nearest_y = min(max(cy, rect[1]), rect[3])
+        farthest_x = max(abs(cx - rect[0]), abs(cx - rect[2]))
+        farthest_y = max(abs(cy - rect[1]), abs(cy - rect[3]))
+        nearest = np.hypot(cx - nearest_x, cy - nearest_y)
+        farthest = np.hypot(farthest_x, farthest_y)
+        pad = self.thickness / 2
+        if nearest > self.radius + pad or farthest < self.radius - pad:
+            return [self]
+        return super().erase(rect)
+
+
+class Rectangle(Shape):
+    """
+    Represents a rectangle shape with specified top-left and bottom-right corners.
+    """
+
+    __slots__ = ("top_left", "bottom_right")
+
+    def __init__(self, top_left, bottom_right, color):
+        """
+        Initializes the rectangle with the given corners and color.
+
+        Parameters:
+            top_left (tuple): The (x, y) coordinates of the top-left corner.
+            bottom_right (tuple): The (x, y) coordinates of the bottom-right corner.
+            color (tuple): The RGB color of the rectangle.
+        """
+        super().__init__(color)
+        self.top_left = top_left
+        self.bottom_right = bottom_right
+
+    def draw(self, Canvas):
+        """
+        Draws the rectangle on the canvas.
+
+        Parameters:
+            Canvas (Canvas): The canvas to draw the rectangle on.
+        """
+        Canvas.draw_shape(self)
+
+    def render(self, image, offset=(0, 0)):
+        """
+        Draws the rectangle on an image whose top-left corner is at offset in canvas coordinates.
+
+        Parameters:
+            image (np.ndarray): The image to draw on.
+            offset (tuple): The canvas (x, y) position of the image's top-left pixel.
+        """
+        if self.top_left and self.bottom_right:
+            cv.rectangle(image, (self.top_left[0] - offset[0], self.top_left[1] - offset[1]),
+                         (self.bottom_right[0] - offset[0],
+                          self.bottom_right[1] - offset[1]),
+                         self.color, self.thickness)
+
+    def get_data(self):
+        """
+        Returns the data of the rectangle.
+
+        Returns:
+            dict: A dictionary containing the top-left and bottom-right corners.
+        """
+        return {
+            'type': 'rectangle',
+            'top_left': self.top_left,
+            'bottom_right': self.bottom_right,
+        }
+
+    def bounds(self):
+        """
+        Returns the bounding box of the rectangle.
+
+        Returns:
+            tuple: The (x1, y1, x2, y2) bounding box.
+        """
+        (x1, y1), (x2, y2) = self.top_left, self.bottom_right
+        return (min(x1, x2) - self.thickness, min(y1, y2) - self.thickness,
+                max(x1, x2) + self.thickness, max(y1, y2) + self.thickness)
+
+    def outline(self):
+        """
+        Returns the four corners of the rectangle as a closed path.
+
+        Returns:
+            tuple: (points, closed).
+        """
+        (x1, y1), (x2, y2) = self.top_left, self.bottom_right
+        return np.array([(x1, y1), (x2, y1), (x2, y2), (x1, y2)], dtype=np.float64), True
+
+    def coordinates(self):
+        """
+        Returns the two corners of the rectangle.
+
+        Returns:
+            np.ndarray: A (2, 2) array.
+        """
+        return np.array([self.top_left, self.bottom_right], dtype=np.float64)
+
+    def transformed(self, points):
+        """
+        Creates a copy of the rectangle with new corners. After a 90 degree rotation the
+        corners are swapped around, so they are ordered again.
+
+        Parameters:
+            points (np.ndarray): The new corners as a (2, 2) array.
+
+        Returns:
+            Rectangle: The moved rectangle.
+        """
+        corners = np.rint(points).astype(int)
+        (x1, y1), (x2, y2) = corners.min(axis=0), corners.max(axis=0)
+        rectangle = Rectangle((int(x1), int(y1)), (int(x2), int(y2)), self.color)
+        rectangle.thickness = self.thickness
+        return rectangle
+
+
+class Polygon(Shape):
+    """
+    Represents a polygon shape with a list of points and a specified color.
+    """
+
+    __slots__ = ("points",)
+
+    def __init__(self, points, color):
+        """
+        Initializes the polygon with the given points and color.
+
+        Parameters:
+            points (list): A list of (x, y) points defining the polygon's vertices.
+            color (tuple): The RGB color of the polygon.
+        """
+        super().__init__(color)
+        self.points = np.array(points, dtype=np.int32).reshape((-1, 1, 2))
+
+    def draw(self, canvas):
+        """
+        Draws the polygon on the canvas.
+
+        Parameters:
+            canvas (Canvas): The canvas to draw the polygon on.
+        """
+        canvas.draw_shape(self)
+
+    def render(self, image, offset=(0, 0)):
+        """
+        Draws the polygon on an image whose top-left corner is at offset in canvas coordinates.
+
+        Parameters:
+            image (np.ndarray): The image to draw on.
+            offset (tuple): The canvas (x, y) position of the image's top-left pixel.
+        """
+        points = self.points
+        if offset != (0, 0):
+            points = points - np.array(offset, dtype=np.int32)
+        cv.polylines(image, [points],
+                     isClosed=True, color=self.color, thickness=2)
+
+    def get_data(self):
+        """
+        Returns the data of the polygon.
+
+        Returns:
+            dict: A dictionary containing the list of points defining the polygon.
+        """
+        if len(self.points) > 0:
+            return {
+                'type': 'polygon',
+                'points': np.array(self.points.tolist()),
+            }
+
+    def bounds(self):
+        """
+        Returns the bounding box of the polygon.
+
+        Returns:
+            tuple: The (x1, y1, x2, y2) bounding box.
+        """
+        xs, ys = self.points[:, 0, 0], self.points[:, 0, 1]
+        return (int(xs.min()) - self.thickness, int(ys.min()) - self.thickness,
+                int(xs.max()) + self.thickness, int(ys.max()) + self.thickness)
+
+    def outline(self):
+        """
+        Returns the vertices of the polygon as a closed path.
+
+        Returns:
+            tuple: (points, closed).
+        """
+        return self.points.reshape(-1, 2).astype(np.float64), True
+
+    def coordinates(self):
+        """
+        Returns the vertices of the polygon.
+
+        Returns:
+            np.ndarray: An (N, 2) array.
+        """
+        return self.points.reshape(-1, 2).astype(np.float64)
+
+    def transformed(self, points):
+        """
+        Creates a copy of the polygon with new vertices.
+
+        Parameters:
+            points (np.ndarray): The new vertices as an (N, 2) array.
+
+        Returns:
+            Polygon: The moved polygon.
+        """
+        polygon = Polygon(np.rint(points), self.color)
+        polygon.thickness = self.thickness
+        return polygon
+
+
+class Polyline(Shape):
+    """
+    Represents an open path, such as the pieces left over after part of a shape was erased.
+    """
+
+    __slots__ = ("points",)
+
+    def __init__(self, points, color, thickness=2):
+        """
+        Initializes the polyline with the given points and color.
+
+        Parameters:
+            points (list): A list of (x, y) points along the path.
+            color (tuple): The RGB color of the polyline.
+            thickness (int): The line thickness.
+        """
+        super().__init__(color, thickness)
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    def draw(self, canvas):
+        """
+        Draws the polyline on the canvas.
+
+        Parameters:
+            canvas (Canvas): The canvas to draw the polyline on.
+        """
+        canvas.draw_shape(self)
+
+    def render(self, image, offset=(0, 0)):
+        """
+        Draws the polyline on an image whose top-left corner is at offset in canvas coordinates.
+
+        Parameters:
+            image (np.ndarray): The image to draw on.
+            offset (tuple): The canvas (x, y) position of the image's top-left pixel.
+        """
+        # rounded before the offset is applied: np.round rounds halves to even, so rounding
+        # after it would put a point on different pixels depending on the offset
+        points = (np.round(self.points) - offset).astype(np.int32)
+        cv.polylines(image, [points.reshape(-1, 1, 2)],
+                     isClosed=False, color=self.color, thickness=self.thickness)
+
+    def get_data(self):
+        """
+        Returns the data of the polyline.
+
+        Returns:
+            dict: A dictionary containing the points of the path.
+        """
+        return {
+            'type': 'polyline',
+            'points': self.points.copy(),
+        }
+
+    def bounds(self):
+        """
+        Returns the bounding box of the polyline.
+
+        Returns:
+            tuple: The (x1, y1, x2, y2) bounding box.
+        """
+        x1, y1 = np.floor(self.points.min(axis=0)) - self.thickness
+        x2, y2 = np.ceil(self.points.max(axis=0)) + self.thickness
+        return int(x1), int(y1), int(x2), int(y2)
+
+    def outline(self):
+        """
+        Returns the points of the polyline as an open path.
+
+        Returns:
+            tuple: (points, closed).
+        """
+        return self.points, False
+
+    def coordinates(self):
+        """
+        Returns the points of the polyline.
+
+        Returns:
+            np.ndarray: An (N, 2) array.
+        """
+        return self.points
+
+    def transformed(self, points):
+        """
+        Creates a copy of the polyline with new points.
+
+        Parameters:
+            points (np.ndarray): The new points as an (N, 2) array.
+
+        Returns:
+            Polyline: The moved polyline.
+        """
+        return Polyline(points, self.color, self.thickness)
+
+    @staticmethod
+    def split_path(points, closed, rect):
+        """
+        Cuts the part of a path that lies inside a rectangle.
+
+        Parameters:
+            points (np.ndarray): The (N, 2) points of the path.
+            closed (bool): Whether the path returns from the last point to the first.
+            rect (tuple): The (x1, y1, x2, y2) rectangle to cut out.
+
+        Returns:
+            list or None: The remaining pieces as (M, 2) arrays, or None if the rectangle
+            does not touch the path.
+        """
+        if closed:
+            points = np.vstack([points, points[:1]])
+        pieces = []
+        current = [points[0]]
+        touched = False
+        for p, q in zip(points[:-1], points[1:]):
+            inside = _clip_segment(p, q, rect)
+            if inside is None:
+                current.append(q)
+                continue
+            touched = True
+            t0, t1 = inside
+            if t0 > 0:
+                current.append(p + (q - p) * t0)
+            if len(current) > 1:
+                pieces.append(current)
+            current = [p + (q - p) * t1]
+            if t1 < 1:
+                current.append(q)
+        if not touched:
+            return None
+        if len(current) > 1:
+            pieces.append(current)
+
+        # on a closed path the piece through the starting point wraps around
+        if closed and len(pieces) > 1 and np.array_equal(pieces[0][0], points[0]) \
+                and np.array_equal(pieces[-1][-1], points[-1]):
+            pieces[0] = pieces.pop()[:-1] + pieces[0]
+        return [np.array(piece) for piece in pieces]
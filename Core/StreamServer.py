@@ -0,0 +1,276 @@
+import json
+import threading
+import cv2 as cv
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _json_default(value):
+    """Lets json.dumps write the NumPy values found in shape data."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class StreamServer:
+    """
+    A small HTTP server for watching the annotated frames and detection results from another
+    machine, built on the standard library.
+
+    Routes:
+        /             a page showing the stream
+        /stream.mjpg  the frames as an MJPEG stream (multipart/x-mixed-replace)
+        /frame.jpg    the latest frame
+        /detections   the latest detection results as JSON
+        /events       detection results as server-sent events
+
+    Publishing never waits for the network. The application only hands over a reference to
+    its frame; an encoder thread turns the newest frame into a JPEG once, and only while
+    someone is watching, and every client is sent that same JPEG. Each client always gets the
+    newest frame when it is ready for one, so a slow client skips frames instead of holding
+    up the others or the application.
+    """
+
+    BOUNDARY = "frame"
+    PAGE = ("<html><head><title>{title}</title></head><body style=\"margin:0;background:#222\">"
+            "<img src=\"/stream.mjpg\" style=\"max-width:100%\"></body></html>")
+    # How often waiting client threads wake up to notice that the server stopped
+    WAIT_SECONDS = 1.0
+
+    def __init__(self, host="127.0.0.1", port=8080, jpeg_quality=80, title="Stream"):
+        """
+        Initializes the server; start() opens the port.
+
+        Args:
+            host (str): The address to listen on. Defaults to localhost only.
+            port (int): The port to listen on, 0 for any free port.
+            jpeg_quality (int): JPEG quality of the streamed frames.
+            title (str): The title of the viewer page.
+        """
+        self.host = host
+        self.port = port
+        self.jpeg_quality = jpeg_quality
+        self.title = title
+        self.frames_published = 0
+        self.frames_encoded = 0
+        self.running = False
+        self._condition = threading.Condition()
+        self._frame = None
+        self._frame_sequence = 0
+        self._jpeg = None
+        self._jpeg_sequence = 0
+        self._detections = None
+        self._detections_sequence = 0
+        self._viewers = 0
+        self._server = None
+        self._threads = []
+
+    @property
+    def url(self):
+        """str: The address of the viewer page."""
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """
+        Opens the port and starts serving and encoding on background threads.
+
+        Returns:
+            StreamServer: The server itself.
+        """
+        server = ThreadingHTTPServer((self.host, self.port), _StreamHandler)
+        server.daemon_threads = True
+        server.stream = self
+        self._server = server
+        self.port = server.server_address[1]
+        self.running = True
+        self._threads = [
+            threading.Thread(target=server.serve_forever, name="stream-http", daemon=True),
+            threading.Thread(target=self._encode_loop, name="stream-encoder", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the port."""
+        if not self.running:
+            return
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def publish_frame(self, frame):
+        """
+        Makes a frame the newest one. Returns at once; encoding happens on the encoder thread.
+
+        Args:
+            frame (np.ndarray): The BGR frame. The server keeps a reference to it, so the caller
+                must not change it afterwards; pass a copy or a Canvas snapshot.
+        """
+        with self._condition:
+            self._frame = frame
+            self._frame_sequence += 1
+            self.frames_published += 1
+            self._condition.notify_all()
+
+    def publish_detections(self, detections):
+        """
+        Makes a detection result the newest one.
+
+        Args:
+            detections (object): Anything json.dumps accepts, NumPy values included, e.g.
+                a DetectionLog.frame_record.
+        """
+        payload = json.dumps(detections, default=_json_default).encode()
+        with self._condition:
+            self._detections = payload
+            self._detections_sequence += 1
+            self._condition.notify_all()
+
+    def _encode_loop(self):
+        """Encodes the newest frame whenever there is a new one and someone is watching."""
+        encoded = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: not self.running or (
+                    self._viewers and self._frame_sequence != encoded))
+                if not self.running:
+                    return
+                frame, sequence = self._frame, self._frame_sequence
+            ok, jpeg = cv.imencode(".jpg", frame, [cv.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            encoded = sequence
+            if not ok:
+                continue
+            with self._condition:
+                self._jpeg = jpeg.tobytes()
+                self._jpeg_sequence = sequence
+                self.frames_encoded += 1
+                self._condition.notify_all()
+
+    def _next(self, kind, last_sequence):
+        """
+        Waits for a JPEG or detection result newer than the one a client was sent last.
+
+        Args:
+            kind (str): "jpeg" or "detections".
+            last_sequence (int): The sequence number of the last one sent.
+
+        Returns:
+            tuple: (sequence, payload), or None once the server stops.
+        """
+        with self._condition:
+            while self.running:
+                sequence = self._jpeg_sequence if kind == "jpeg" else self._detections_sequence
+                if sequence != last_sequence:
+                    payload = self._jpeg if kind == "jpeg" else self._detections
+                    return sequence, payload
+                self._condition.wait(self.WAIT_SECONDS)
+            return None
+
+    def _latest_jpeg(self):
+        """
+        Waits until the frame that is the newest one now has been encoded. The encoder only
+        runs while someone is watching, so the JPEG it made last may be of an older frame.
+
+        Returns:
+            bytes: The JPEG, or None once the server stops.
+        """
+        self._watch(1)
+        try:
+            with self._condition:
+                # without any frame yet, the first one is waited for
+                wanted = max(1, self._frame_sequence)
+                while self.running:
+                    if self._jpeg_sequence >= wanted:
+                        return self._jpeg
+                    self._condition.wait(self.WAIT_SECONDS)
+                return None
+        finally:
+            self._watch(-1)
+
+    def _watch(self, delta):
+        """Counts clients waiting for frames; the encoder only runs while there are any."""
+        with self._condition:
+            self._viewers += delta
+            self._condition.notify_all()
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    """Serves the routes of a StreamServer."""
+
+    def log_message(self, format, *args):
+        # one line per request would flood the console of a frame loop
+        pass
+
+    def do_GET(self):
+        stream = self.server.stream
+        path = self.path.split("?")[0]
+        if path == "/":
+            self._send(200, "text/html", stream.PAGE.format(title=stream.title).encode())
+        elif path == "/stream.mjpg":
+            self._stream_frames(stream)
+        elif path == "/frame.jpg":
+            jpeg = stream._latest_jpeg()
+            if jpeg is None:
+                self._send(503, "text/plain", b"Server stopped")
+            else:
+                self._send(200, "image/jpeg", jpeg)
+        elif path == "/detections":
+            self._send(200, "application/json", stream._detections or b"null")
+        elif path == "/events":
+            self._stream_events(stream)
+        else:
+            self._send(404, "text/plain", b"Not found")
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_frames(self, stream):
+        self.send_response(200)
+        self.send_header("Content-Type",
+                         f"multipart/x-mixed-replace; boundary={stream.BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        stream._watch(1)
+        try:
+            sequence = 0
+            while True:
+                item = stream._next("jpeg", sequence)
+                if item is None:
+                    break
+                sequence, jpeg = item
+                self.wfile.write(
+                    f"--{stream.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            stream._watch(-1)
+
+    def _stream_events(self, stream):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            sequence = 0
+            while True:
+                item = stream._next("detections", sequence)
+                if item is None:
+                    break
+                sequence, payload = item
+                self.wfile.write(b"data: " + payload + b"\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
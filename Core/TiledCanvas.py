@@ -0,0 +1,412 @@
+import cv2 as cv
+import numpy as np
+
+
+class TiledCanvas:
+    """
+    A drawing canvas stored as square tiles instead of one contiguous array, for drawings
+    too large to keep in memory as a whole. It has the same interface as Canvas.
+
+    Tiles are only allocated once something is drawn on them; a missing tile is background.
+    Copies made with get_canvas share their tiles with the original, and a shared tile is
+    copied the first time either side writes to it (copy-on-write), so undo snapshots cost
+    one dictionary copy instead of a full image copy.
+
+    Only the visible area (view_size, from the top-left corner) is assembled into an array
+    for display; it is kept up to date as tiles change instead of being rebuilt.
+    """
+
+    # Shapes whose area on the canvas is at most this many pixels are drawn into one scratch
+    # array, which gives the same pixels as drawing on a single-array canvas. Larger shapes
+    # are drawn into each tile separately; OpenCV clips slanted lines at the tile borders,
+    # so they can be a pixel off there.
+    SCRATCH_AREA = 2048 * 2048
+
+    def __init__(self, width, height, backgroundColor=(255, 255, 255), canvas_name="Canvas",
+                 headless=False, tile_size=256, view_size=None):
+        """
+        Initializes an empty tiled canvas.
+
+        Parameters:
+            width (int): The width of the canvas.
+            height (int): The height of the canvas.
+            backgroundColor (tuple): The RGB color tuple for the background color.
+            canvas_name (str): The name of the window the canvas is shown in.
+            headless (bool, optional): If True, nothing is shown in a window; the last shown image
+                is only kept in last_shown.
+            tile_size (int): The side length of a tile in pixels.
+            view_size (tuple, optional): The (width, height) of the area shown in the window.
+                Defaults to the whole canvas.
+        """
+        self.width = width
+        self.height = height
+        self.backgroundColor = backgroundColor
+        self.canvas_name = canvas_name
+        self.headless = headless
+        self.tile_size = tile_size
+        self.view_size = view_size
+        self.last_shown = None
+        self.tiles = {}  # (tile x, tile y) -> tile_size x tile_size x 3 array
+        self._owned = set()  # tiles not shared with any copy, safe to write in place
+        self._view = None  # assembled visible area, built on demand
+        self.generation = 0  # incremented on every change made through the canvas methods
+        self.reset_count = 0
+
+    @property
+    def canvas(self):
+        """The visible area as a read-only array; draw through the canvas methods instead."""
+        return self.view()
+
+    def _blank_tile(self):
+        """Creates a tile filled with the background color."""
+        return np.full((self.tile_size, self.tile_size, 3), self.backgroundColor, dtype=np.uint8)
+
+    def _tile_keys(self, x1, y1, x2, y2):
+        """
+        Lists the tiles overlapping a region, clipped to the canvas.
+
+        Parameters:
+            x1 (int): The left edge of the region.
+            y1 (int): The top edge of the region.
+            x2 (int): The right edge of the region, exclusive.
+            y2 (int): The bottom edge of the region, exclusive.
+
+        Returns:
+            list: The (tile x, tile y) keys.
+        """
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.width, x2), min(self.height, y2)
+        if x1 >= x2 or y1 >= y2:
+            return []
+        size = self.tile_size
+        return [(tx, ty) for ty in range(y1 // size, (y2 - 1) // size + 1)
+                for tx in range(x1 // size, (x2 - 1) // size + 1)]
+
+    def _writable_tile(self, key):
+        """
+        Returns a tile that may be written in place, allocating it or copying it away from
+        the canvases it is shared with first.
+
+        Parameters:
+            key (tuple): The (tile x, tile y) key.
+
+        Returns:
+            np.ndarray: The tile.
+        """
+        tile = self.tiles.get(key)
+        if tile is not None and key in self._owned:
+            return tile
+        tile = self._blank_tile() if tile is None else tile.copy()
+        self.tiles[key] = tile
+        self._owned.add(key)
+        return tile
+
+    def _changed(self, x1, y1, x2, y2):
+        """
+        Updates the assembled view after the pixels in a region changed.
+
+        Parameters:
+            x1 (int): The left edge of the region.
+            y1 (int): The top edge of the region.
+            x2 (int): The right edge of the region, exclusive.
+            y2 (int): The bottom edge of the region, exclusive.
+        """
+        if self._view is None:
+            return
+        view_height, view_width = self._view.shape[:2]
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(view_width, x2), min(view_height, y2)
+        if x1 < x2 and y1 < y2:
+            self._view.setflags(write=True)
+            self._view[y1:y2, x1:x2] = self.region(x1, y1, x2, y2)
+            self._view.setflags(write=False)
+
+    def _write_region(self, x1, y1, image):
+        """
+        Copies an image into the tiles it covers. Tiles that do not exist yet are only
+        allocated if the image differs from the background there.
+
+        Parameters:
+            x1 (int): The canvas x-coordinate of the image's left edge.
+            y1 (int): The canvas y-coordinate of the image's top edge.
+            image (np.ndarray): The pixels to write.
+        """
+        x2, y2 = x1 + image.shape[1], y1 + image.shape[0]
+        size = self.tile_size
+        background = np.array(self.backgroundColor, dtype=np.uint8)
+        for tx, ty in self._tile_keys(x1, y1, x2, y2):
+            left, top = max(x1, tx * size), max(y1, ty * size)
+            right = min(x2, (tx + 1) * size, self.width)
+            bottom = min(y2, (ty + 1) * size, self.height)
+            piece = image[top - y1:bottom - y1, left - x1:right - x1]
+            if (tx, ty) not in self.tiles and (piece == background).all():
+                continue
+            self._writable_tile((tx, ty))[top - ty * size:bottom - ty * size,
+                                          left - tx * size:right - tx * size] = piece
+
+    def region(self, x1, y1, x2, y2):
+        """
+        Assembles a region of the canvas from the tiles it overlaps.
+
+        Parameters:
+            x1 (int): The left edge of the region.
+            y1 (int): The top edge of the region.
+            x2 (int): The right edge of the region, exclusive.
+            y2 (int): The bottom edge of the region, exclusive.
+
+        Returns:
+            np.ndarray: A new array of the region; parts outside the canvas are background.
+        """
+        image = np.full((y2 - y1, x2 - x1, 3), self.backgroundColor, dtype=np.uint8)
+        size = self.tile_size
+        for tx, ty in self._tile_keys(x1, y1, x2, y2):
+            tile = self.tiles.get((tx, ty))
+            if tile is None:
+                continue
+            # overlap of the tile and the region, clipped to the canvas
+            left, top = max(x1, tx * size), max(y1, ty * size)
+            right = min(x2, (tx + 1) * size, self.width)
+            bottom = min(y2, (ty + 1) * size, self.height)
+            image[top - y1:bottom - y1, left - x1:right - x1] = \
+                tile[top - ty * size:bottom - ty * size, left - tx * size:right - tx * size]
+        return image
+
+    def view(self):
+        """
+        Returns the pixels shown in the window, assembled from the visible tiles.
+
+        Returns:
+            np.ndarray: A read-only array of the visible area. The same array is returned
+            until the whole canvas is replaced (reset, set, rotated or cropped).
+        """
+        if self._view is None:
+            width, height = self.view_size or (self.width, self.height)
+            self._view = self.region(0, 0, min(width, self.width), min(height, self.height))
+            self._view.setflags(write=False)
+        return self._view
+
+    def draw_canvas(self):
+        """Displays the visible area of the canvas in a window."""
+
+        self.show(self.view())
+
+    def show(self, image):
+        """
+        Displays an image (the canvas or a preview of it) in the canvas window.
+
+        Parameters:
+            image (np.ndarray): The image to display.
+        """
+        self.last_shown = image
+        if not self.headless:
+            cv.imshow(self.canvas_name, image)
+
+    def reset_canvas(self):
+        """Resets the canvas to a blank state with the initial background color."""
+
+        self.tiles = {}
+        self._owned = set()
+        self._view = None
+        self.generation += 1
+        self.reset_count += 1
+
+    def get_canvas(self):
+        """
+        Returns a copy of the current canvas. The copy shares all tiles with this canvas
+        until one of them is written.
+
+        Returns:
+            TiledCanvas: The copy.
+        """
+        copy = TiledCanvas(self.width, self.height, self.backgroundColor, self.canvas_name,
+                           self.headless, self.tile_size, self.view_size)
+        copy.tiles = self.tiles.copy()
+        # every tile is shared now, so neither side may write one in place
+        self._owned = set()
+        return copy
+
+    def snapshot(self):
+        """
+        Returns the current state of the canvas for reading, like Canvas.snapshot. The tiles are
+        shared copy-on-write, so this costs one dictionary copy.
+
+        Returns:
+            TiledCanvas: A copy sharing the tiles of this canvas.
+        """
+        return self.get_canvas()
+
+    def copy(self):
+        """
+        Returns a copy of the canvas, like get_canvas. Lets stored states be copied the same
+        way as canvas arrays.
+
+        Returns:
+            TiledCanvas: The copy.
+        """
+        return self.get_canvas()
+
+    def set_canvas(self, newCanvas):
+        """
+        Sets the canvas value to new canvas.
+
+        Parameters:
+            newCanvas (TiledCanvas or np.ndarray): The new canvas. A TiledCanvas is adopted
+                without copying its tiles; an array is cut into tiles.
+        """
+        if isinstance(newCanvas, TiledCanvas):
+            self.width, self.height = newCanvas.width, newCanvas.height
+            self.tiles = newCanvas.tiles.copy()
+            newCanvas._owned = set()
+            self._owned = set()
+        else:
+            self.height, self.width = newCanvas.shape[:2]
+            self.tiles = {}
+            self._owned = set()
+            self._write_region(0, 0, newCanvas)
+        self._view = None
+        self.generation += 1
+
+    def fill_rect(self, top_left, bottom_right, color):
+        """
+        Fills a rectangular area of the canvas with a color. Tiles that are completely
+        filled with the background color are dropped instead.
+
+        Parameters:
+            top_left (tuple): The (x1, y1) corner.
+            bottom_right (tuple): The (x2, y2) corner, exclusive.
+            color (tuple): The color to fill with.
+        """
+        (x1, y1), (x2, y2) = top_left, bottom_right
+        self.generation += 1
+        size = self.tile_size
+        is_background = tuple(color) == tuple(self.backgroundColor)
+        for tx, ty in self._tile_keys(x1, y1, x2, y2):
+            left, top = max(x1, tx * size) - tx * size, max(y1, ty * size) - ty * size
+            right, bottom = min(x2, (tx + 1) * size) - tx * size, min(y2, (ty + 1) * size) - ty * size
+            if is_background:
+                if (tx, ty) not in self.tiles:
+                    continue
+                if left == 0 and top == 0 and right == size and bottom == size:
+                    del self.tiles[(tx, ty)]
+                    self._owned.discard((tx, ty))
+                    continue
+            self._writable_tile((tx, ty))[top:bottom, left:right] = color
+        self._changed(x1, y1, x2, y2)
+
+    def paste(self, top_left, image):
+        """
+        Copies an image onto the canvas.
+
+        Parameters:
+            top_left (tuple): The (x, y) canvas position of the image's top-left pixel.
+            image (np.ndarray): The pixels to copy; it must lie inside the canvas.
+        """
+        x1, y1 = top_left
+        self.generation += 1
+        self._write_region(x1, y1, image)
+        self._changed(x1, y1, x1 + image.shape[1], y1 + image.shape[0])
+
+    def draw_shape(self, shape, rect=None):
+        """
+        Draws a shape into the tiles its bounding box overlaps, optionally limited to a region.
+
+        Parameters:
+            shape (Shape): The shape to draw.
+            rect (tuple, optional): The (x1, y1, x2, y2) region to draw in, x2 and y2 exclusive.
+                Pixels outside it are left untouched.
+        """
+        x1, y1, x2, y2 = shape.bounds()
+        x2, y2 = x2 + 1, y2 + 1
+        if rect is not None:
+            x1, y1 = max(x1, rect[0]), max(y1, rect[1])
+            x2, y2 = min(x2, rect[2]), min(y2, rect[3])
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.width, x2), min(self.height, y2)
+        if x1 >= x2 or y1 >= y2:
+            return
+        self.generation += 1
+
+        if rect is not None:
+            # clip the drawing at the region edges, the same as drawing into a region of an array
+            x1, y1 = max(0, rect[0]), max(0, rect[1])
+            x2, y2 = min(self.width, rect[2]), min(self.height, rect[3])
+        if (x2 - x1) * (y2 - y1) <= self.SCRATCH_AREA:
+            scratch = self.region(x1, y1, x2, y2)
+            shape.render(scratch, (x1, y1))
+            self._write_region(x1, y1, scratch)
+            self._changed(x1, y1, x2, y2)
+            return
+
+        size = self.tile_size
+        for tx, ty in self._tile_keys(x1, y1, x2, y2):
+            tile = self._writable_tile((tx, ty))
+            if rect is None:
+                shape.render(tile, (tx * size, ty * size))
+            else:
+                left, top = max(x1, tx * size), max(y1, ty * size)
+                right, bottom = min(x2, (tx + 1) * size), min(y2, (ty + 1) * size)
+                shape.render(tile[top - ty * size:bottom - ty * size,
+                                  left - tx * size:right - tx * size], (left, top))
+        self._changed(x1, y1, x2, y2)
+
+    def rotate(self, rotation):
+        """
+        Rotates the canvas by a multiple of 90 degrees. Each new tile is assembled from the
+        area of the old canvas it comes from; areas without tiles stay unallocated.
+
+        Parameters:
+            rotation (int): A cv.ROTATE_* code.
+        """
+        size = self.tile_size
+        width, height = self.width, self.height
+        new_width, new_height = (width, height) if rotation == cv.ROTATE_180 else (height, width)
+        tiles = {}
+        for tx in range((new_width + size - 1) // size):
+            for ty in range((new_height + size - 1) // size):
+                a, b = tx * size, ty * size
+                # the area of the old canvas that ends up in this tile
+                if rotation == cv.ROTATE_90_CLOCKWISE:
+                    source = (b, height - a - size, b + size, height - a)
+                elif rotation == cv.ROTATE_90_COUNTERCLOCKWISE:
+                    source = (width - b - size, a, width - b, a + size)
+                else:
+                    source = (width - a - size, height - b - size, width - a, height - b)
+                if any(key in self.tiles for key in self._tile_keys(*source)):
+                    tiles[(tx, ty)] = cv.rotate(self.region(*source), rotation)
+        self.width, self.height = new_width, new_height
+        self.tiles = tiles
+        self._owned = set(tiles)
+        self._view = None
+        self.generation += 1
+
+    def crop(self, x1, y1, x2, y2):
+        """
+        Keeps only a region of the canvas. When the region starts on a tile boundary the
+        tiles are reused as they are; otherwise each new tile is assembled from the old ones.
+
+        Parameters:
+            x1 (int): The left edge of the region.
+            y1 (int): The top edge of the region.
+            x2 (int): The right edge of the region, exclusive.
+            y2 (int): The bottom edge of the region, exclusive.
+        """
+        size = self.tile_size
+        tiles = {}
+        if x1 % size == 0 and y1 % size == 0:
+            for tx, ty in self._tile_keys(x1, y1, x2, y2):
+                if (tx, ty) in self.tiles:
+                    tiles[(tx - x1 // size, ty - y1 // size)] = self.tiles[(tx, ty)]
+            owned = set()
+        else:
+            for tx in range((x2 - x1 + size - 1) // size):
+                for ty in range((y2 - y1 + size - 1) // size):
+                    source = (x1 + tx * size, y1 + ty * size,
+                              x1 + (tx + 1) * size, y1 + (ty + 1) * size)
+                    if any(key in self.tiles for key in self._tile_keys(*source)):
+                        tiles[(tx, ty)] = self.region(*source)
+            owned = set(tiles)
+        self.width, self.height = x2 - x1, y2 - y1
+        self.tiles = tiles
+        self._owned = owned
+        self._view = None
+        self.generation += 1
@@ -0,0 +1,246 @@
+import cv2 as cv
+
+
+class UndoRedoManager:
+    """ A class to manage undo and redo actions for a canvas and shape manager."""
+
+    def __init__(self, max_history=10):
+        """
+        Initializes the UndoRedoManager with an optional maximum history limit.
+
+        Parameters:
+            max_history (int): The maximum number of actions to store. Default is 10.
+        """
+        self.undo_stack = []
+        self.redo_stack = []
+        self.max_history = max_history
+
+    def add_action(self, action):
+        """
+        Adds an action to the undo stack. If the stack exceeds the max history,
+        the oldest action is removed, and the redo stack is cleared.
+
+        Parameters:
+            action (DrawAction): The action to be added to the undo stack.
+        """
+        self.undo_stack.append(action)
+        if len(self.undo_stack) > self.max_history:
+            self.undo_stack.pop(0)
+        self.redo_stack.clear()
+
+    def undo(self, canvas, shape_manager):
+        """
+        Undoes the most recent action, restoring the previous state of the canvas and shape manager.
+
+        Parameters:
+            canvas (Canvas): The canvas to restore.
+            shape_manager (ShapeManager): The shape manager to restore.
+        """
+        if len(self.undo_stack) > 1:  # Need at least 2 states to undo
+            # Pop current state
+            current_state = self.undo_stack.pop()
+            # Store it in redo stack
+            self.redo_stack.append(current_state)
+
+            # Get previous state
+            prev_state = self.undo_stack[-1]
+
+            # Restore previous state
+            prev_state.restore(canvas, shape_manager)
+
+    def redo(self, canvas, shape_manager):
+        """
+        Redoes the most recent undone action, restoring the next state of the canvas and shape manager.
+
+        Parameters:
+            canvas (Canvas): The canvas to restore.
+            shape_manager (ShapeManager): The shape manager to restore.
+        """
+        if self.redo_stack:
+           # Get next state from redo stack
+            next_state = self.redo_stack.pop()
+            self.undo_stack.append(next_state)
+
+            # Apply the redo state
+            next_state.restore(canvas, shape_manager)
+
+    def current_action(self):
+        """
+        Returns the action describing the current state, if any.
+
+        Returns:
+            DrawAction or None: The top of the undo stack.
+        """
+        return self.undo_stack[-1] if self.undo_stack else None
+
+
+class DrawAction:
+    """
+    A class representing an action that can be undone or redone.
+    """
+
+    def __init__(self, shapemanager=None, canvas=None):
+        """
+        Initializes a DrawAction with the given shape manager and canvas state.
+
+        Parameters:
+            shapemanager (ShapeManager): The current state of the shape manager.
+            canvas (np.ndarray): A snapshot of the canvas, see Canvas.snapshot.
+        """
+        self.shapes_state = shapemanager
+        self.canvas_state = canvas
+
+    def restore(self, canvas, shape_manager):
+        """
+        Restores the canvas and shape manager to this state.
+
+        Parameters:
+            canvas (Canvas): The canvas to restore.
+            shape_manager (ShapeManager): The shape manager to restore.
+        """
+        # the stored state is a read-only snapshot; the canvas copies it before drawing on it
+        canvas.set_canvas(self.canvas_state)
+        shape_manager.set_shapes(self.shapes_state.copy())
+
+
+
+class ShapeAction(DrawAction):
+    """
+    A state that is fully described by its shapes, such as the result of a vector erase.
+    No canvas snapshot is kept; restoring re-renders the shapes on a blank canvas.
+    """
+
+    def __init__(self, shapemanager, size=None):
+        """
+        Initializes a ShapeAction.
+
+        Parameters:
+            shapemanager (list): The shapes of this state.
+            size (tuple, optional): The (width, height) of the canvas in this state.
+        """
+        super().__init__(shapemanager, None)
+        self.size = size
+
+    def restore(self, canvas, shape_manager):
+        """
+        Restores the shapes and redraws them on a blank canvas.
+
+        Parameters:
+            canvas (Canvas): The canvas to restore.
+            shape_manager (ShapeManager): The shape manager to restore.
+        """
+        shape_manager.set_shapes(self.shapes_state.copy())
+        if self.size is not None:
+            canvas.width, canvas.height = self.size
+        canvas.reset_canvas()
+        shape_manager.draw_all(canvas)
+
+
+class TransformAction(DrawAction):
+    """
+    A rotation by 90 degrees or a crop, stored as the operation instead of a canvas snapshot.
+    Both are exact on the raster (a pixel permutation or a slice), so the state is rebuilt by
+    applying the operation again to the state it was made on.
+    """
+
+    def __init__(self, shapemanager, base, rotation=None, crop=None):
+        """
+        Initializes a TransformAction.
+
+        Parameters:
+            shapemanager (list): The transformed shapes.
+            base (DrawAction): The state the transform was applied to.
+            rotation (int, optional): A cv.ROTATE_* code.
+            crop (tuple, optional): The (x1, y1, x2, y2) region kept by a crop, x2 and y2 exclusive.
+        """
+        super().__init__(shapemanager, None)
+        self.base = base
+        self.rotation = rotation
+        self.crop = crop
+        self.depth = getattr(base, "depth", 0) + 1
+
+    def transform_canvas(self, canvas):
+        """
+        Applies the rotation or crop to the pixels of a canvas.
+
+        Parameters:
+            canvas (Canvas): The canvas to transform.
+        """
+        if self.rotation is not None:
+            canvas.rotate(self.rotation)
+        elif self.crop is not None:
+            canvas.crop(*self.crop)
+
+    def restore(self, canvas, shape_manager):
+        """
+        Restores the base state and applies the transform to it again.
+
+        Parameters:
+            canvas (Canvas): The canvas to restore.
+            shape_manager (ShapeManager): The shape manager to restore.
+        """
+        self.base.restore(canvas, shape_manager)
+        self.transform_canvas(canvas)
+        shape_manager.set_shapes(self.shapes_state.copy())
+
+
+class EraseAction(DrawAction):
+    """
+    An eraser stroke stored as its path instead of a canvas snapshot. The canvas state is
+    rebuilt by replaying the stroke on top of the state it was drawn on.
+    """
+
+    # Longest chain of strokes and transforms replayed on undo before a full snapshot is taken instead
+    MAX_REPLAY_DEPTH = 8
+
+    def __init__(self, shapemanager, base, stroke, eraser_size, color):
+        """
+        Initializes an EraseAction.
+
+        Parameters:
+            shapemanager (list): The shapes at the end of the stroke.
+            base (DrawAction): The state the stroke was drawn on.
+            stroke (list): The (x, y) centers of the eraser along the stroke.
+            eraser_size (int): The side length of the square eraser.
+            color (tuple): The color the eraser paints with.
+        """
+        super().__init__(shapemanager, None)
+        self.base = base
+        self.stroke = stroke
+        self.eraser_size = eraser_size
+        self.color = color
+        self.depth = getattr(base, "depth", 0) + 1
+
+    def restore(self, canvas, shape_manager):
+        """
+        Restores the base state and replays the stroke on it.
+
+        Parameters:
+            canvas (Canvas): The canvas to restore.
+            shape_manager (ShapeManager): The shape manager to restore.
+        """
+        self.base.restore(canvas, shape_manager)
+        for x, y in self.stroke:
+            canvas.fill_rect(*self.eraser_bounds(x, y, self.eraser_size,
+                             canvas.width, canvas.height), self.color)
+        shape_manager.set_shapes(self.shapes_state.copy())
+
+    @staticmethod
+    def eraser_bounds(x, y, size, width, height):
+        """
+        Computes the square eraser area centered on (x, y), clipped to the canvas.
+
+        Parameters:
+            x (int): The x-coordinate of the eraser center.
+            y (int): The y-coordinate of the eraser center.
+            size (int): The side length of the eraser.
+            width (int): The width of the canvas.
+            height (int): The height of the canvas.
+
+        Returns:
+            tuple: The (x1, y1) and (x2, y2) corners, with x2 and y2 exclusive.
+        """
+        half_size = size // 2
+        return ((max(0, x - half_size), max(0, y - half_size)),
+                (min(width, x + half_size + 1), min(height, y + half_size + 1)))
+
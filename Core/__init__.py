@@ -0,0 +1,6 @@
+"""
+Shared drawing core used by the drawing canvas (ComputerVisonTask), the video recorder
+(VideoRecoderTask) and the shape detector (ShapeDetector): canvases, shapes, the shape
+manager, undo/redo actions, the drawing tool, the stage profiler and the headless runner,
+plus the frame transport, streaming and detection result writers.
+"""
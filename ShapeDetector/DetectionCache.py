@@ -0,0 +1,153 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+import cv2 as cv
+
+
+class DetectionCache:
+    """
+    Remembers the shapes detected in a frame, addressed by its content, so frames seen
+    before (the same images on every nightly run, static stretches of video) skip detection.
+
+    The key is a BLAKE2 hash of a downscaled grayscale copy of the frame together with the
+    detector settings, so changing a setting never returns stale shapes. Downscaling makes
+    hashing cheap and also lets frames that differ only by sensor noise share an entry.
+
+    Entries live in an in-memory LRU tier and, if a path is given, in an SQLite file that
+    lasts between runs and can be shared by several processes.
+    """
+
+    # Size of the grayscale copy that is hashed; larger means fewer near-identical frames match
+    THUMBNAIL_SIZE = (64, 48)
+    # Number of disk writes between commits
+    COMMIT_EVERY = 64
+
+    def __init__(self, max_entries=1024, path=None):
+        """
+        Initializes the cache.
+
+        Parameters:
+            max_entries (int): Number of frames kept in memory.
+            path (str, optional): SQLite file of the on-disk tier. Without one, the cache
+                only lives in memory.
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._db = None
+        if path:
+            # detection may run on an executor thread, every access holds the lock
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS detections (key TEXT PRIMARY KEY, shapes BLOB)")
+            self._db.commit()
+
+    def key(self, frame, config):
+        """
+        Computes the cache key of a frame.
+
+        Parameters:
+            frame (np.ndarray): The BGR or grayscale frame.
+            config (dict): The detector settings, see ShapeDetector.config.
+
+        Returns:
+            str: The key.
+        """
+        thumbnail = cv.resize(frame, self.THUMBNAIL_SIZE, interpolation=cv.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv.cvtColor(thumbnail, cv.COLOR_BGR2GRAY)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(sorted(config.items())).encode())
+        digest.update(repr(frame.shape).encode())
+        digest.update(thumbnail.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Looks up the shapes of a frame.
+
+        Parameters:
+            key (str): The frame's key.
+
+        Returns:
+            list: The cached shapes, or None on a miss.
+        """
+        with self._lock:
+            shapes = self._entries.get(key)
+            if shapes is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return shapes
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT shapes FROM detections WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    shapes = pickle.loads(row[0])
+                    self._remember(key, shapes)
+                    self.disk_hits += 1
+                    return shapes
+            self.misses += 1
+            return None
+
+    def put(self, key, shapes):
+        """
+        Stores the shapes of a frame.
+
+        Parameters:
+            key (str): The frame's key.
+            shapes (list): The detected shapes.
+        """
+        with self._lock:
+            self._remember(key, shapes)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO detections VALUES (?, ?)",
+                                 (key, pickle.dumps(shapes, pickle.HIGHEST_PROTOCOL)))
+                self._pending += 1
+                if self._pending >= self.COMMIT_EVERY:
+                    self._db.commit()
+                    self._pending = 0
+
+    def _remember(self, key, shapes):
+        """Adds an entry to the memory tier, evicting the least recently used one."""
+        self._entries[key] = shapes
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns the hit and miss counts.
+
+        Returns:
+            dict: memory_hits, disk_hits, misses and hit_ratio.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def commit(self):
+        """Writes the pending entries to disk."""
+        with self._lock:
+            if self._db is not None and self._pending:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self):
+        """Writes the pending entries to disk and closes the file."""
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
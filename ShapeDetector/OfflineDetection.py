@@ -0,0 +1,180 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+# the shared Core package lives next to the application folders
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2 as cv
+from Core.DetectionLog import frame_record, open_results
+from DetectionCache import DetectionCache
+from ShapeDetector import ShapeDetector
+
+# Frames skipped by grabbing rather than seeking; seeking decodes from the previous keyframe,
+# so it only pays off for longer jumps
+SEEK_DISTANCE = 48
+# Chunks per worker; more chunks keep every core busy until the end of the file
+CHUNKS_PER_WORKER = 4
+
+# one detector per worker process and cache file, reused for all its chunks
+_detectors = {}
+
+
+def _detect_chunk(chunk):
+    """
+    Detects the shapes in one chunk of a video file. Runs in a worker process.
+
+    Parameters:
+        chunk (tuple): (path, first frame, end frame, every, fps, cache path): the frames
+            first, first + every, ... before end are detected, using the cache file if any.
+
+    Returns:
+        tuple: (records, cache hits, cache misses) with one DetectionLog.frame_record per
+        detected frame, in order.
+    """
+    path, first, end, every, fps, cache_path = chunk
+    detector = _detectors.get(cache_path)
+    if detector is None:
+        detector = ShapeDetector(cache=DetectionCache(path=cache_path) if cache_path else None)
+        _detectors[cache_path] = detector
+    cache = detector.cache
+    before = cache.stats() if cache else None
+    cap = cv.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video file: {path}")
+    records = []
+    try:
+        position = first
+        cap.set(cv.CAP_PROP_POS_FRAMES, first)
+        for index in range(first, end, every):
+            if index - position > SEEK_DISTANCE:
+                cap.set(cv.CAP_PROP_POS_FRAMES, index)
+            else:
+                # grab() skips a frame without converting it to an image
+                while position < index and cap.grab():
+                    position += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            position = index + 1
+            shapes = detector.detect_frame(frame)
+            records.append(frame_record(index, index / fps, shapes))
+    finally:
+        cap.release()
+    if cache is None:
+        return records, 0, 0
+    # the chunk's entries must be on disk before the pool may end this process
+    cache.commit()
+    after = cache.stats()
+    hits = (after["memory_hits"] + after["disk_hits"] -
+            before["memory_hits"] - before["disk_hits"])
+    return records, hits, after["misses"] - before["misses"]
+
+
+def detect_video(path, results=None, every=1, start=None, end=None, workers=None,
+                 cache_path=None):
+    """
+    Detects the shapes in a video file as fast as the machine allows: no window, no pacing,
+    and the file is split into chunks that worker processes decode and detect in parallel.
+    The records of the chunks are passed on in frame order.
+
+    Parameters:
+        path (str): The video file.
+        results (ResultsWriter, optional): A DetectionLog writer for the detections of every
+            frame. It is closed at the end.
+        every (int): Detect only every n-th frame.
+        start (float, optional): Start of the time range to detect, in seconds.
+        end (float, optional): End of the time range to detect, in seconds.
+        workers (int, optional): Number of worker processes. Defaults to one per core.
+        cache_path (str, optional): SQLite file of a DetectionCache shared by the workers and
+            kept between runs.
+
+    Returns:
+        dict: frames detected, shapes found, run time, video time covered, the speed as a
+        multiple of real time and, with a cache, its hits, misses and hit ratio.
+    """
+    cap = cv.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video file: {path}")
+    fps = cap.get(cv.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    first = int(round(start * fps)) if start else 0
+    last = min(frame_count, int(round(end * fps))) if end is not None else frame_count
+    workers = workers or os.cpu_count() or 1
+    if last <= 0:
+        # the container does not tell its length, so the file is read in one piece
+        chunks = [(path, first, sys.maxsize, every, fps, cache_path)]
+    else:
+        # chunk boundaries fall on detected frames, so every chunk steps the same way
+        steps = math.ceil((last - first) / every)
+        chunk_steps = max(1, math.ceil(steps / (workers * CHUNKS_PER_WORKER)))
+        chunks = [(path, first + step * every, min(last, first + (step + chunk_steps) * every),
+                   every, fps, cache_path)
+                  for step in range(0, steps, chunk_steps)]
+
+    begin = time.perf_counter()
+    frames = shapes = hits = misses = 0
+    pool = None
+    try:
+        if workers == 1 or len(chunks) == 1:
+            chunk_records = map(_detect_chunk, chunks)
+        else:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+            pool = context.Pool(min(workers, len(chunks)))
+            # imap hands the chunks back in order while later ones are still being detected
+            chunk_records = pool.imap(_detect_chunk, chunks)
+        for records, chunk_hits, chunk_misses in chunk_records:
+            hits += chunk_hits
+            misses += chunk_misses
+            for record in records:
+                frames += 1
+                shapes += len(record["shapes"])
+                if results is not None:
+                    results.write_record(record)
+        if pool is not None:
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if results is not None:
+            results.close()
+    seconds = time.perf_counter() - begin
+    video_seconds = frames * every / fps
+    summary = {
+        "frames": frames,
+        "shapes": shapes,
+        "seconds": seconds,
+        "video_seconds": video_seconds,
+        "speed": video_seconds / seconds if seconds else 0.0,
+    }
+    if cache_path:
+        summary.update(cache_hits=hits, cache_misses=misses,
+                       cache_hit_ratio=hits / (hits + misses) if hits + misses else 0.0)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Detect the shapes in a video file without a window, using all cores.")
+    parser.add_argument("video", help="the video file")
+    parser.add_argument("--out", help="results file, .jsonl or .parquet (needs pyarrow)")
+    parser.add_argument("--every", type=int, default=1, help="detect only every n-th frame")
+    parser.add_argument("--start", type=float, help="start of the time range in seconds")
+    parser.add_argument("--end", type=float, help="end of the time range in seconds")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--cache", help="SQLite detection cache file, reused by later runs")
+    args = parser.parse_args()
+
+    results = open_results(args.out) if args.out else None
+    summary = detect_video(args.video, results, every=args.every, start=args.start,
+                           end=args.end, workers=args.workers, cache_path=args.cache)
+    print(json.dumps(summary, indent=2))
@@ -1,12 +1,20 @@
 import cv2 as cv
-from Canvas import *
-from ShapeManager import *
-from Shapes import *
+import numpy as np
+from Core.Canvas import Canvas
+from Core.DetectionLog import frame_record
+from Core.ShapeManager import ShapeManager
+from Core.Shapes import Circle, Rectangle, Polygon
+from Core.Profiler import StageProfiler
 
 
 class ShapeDetector:
     """
     Detects shapes (circles, rectangles, polygons) in images or video streams.
+
+    CIRCLE_METHOD "both" does not make the Hough pass cheaper: HoughCircles still runs over
+    the whole frame, and its circles are only dropped when a round contour already found
+    them. It costs the Hough pass on top of the contour pass, in exchange for also finding
+    circles that do not form a closed contour.
     """
 
     # Constants for thresholds and parameters
@@ -28,7 +36,39 @@ class ShapeDetector:
     BLUR_KERNEL_SIZE_CONTOUR = (5, 5)
     ASPECT_RATIO_THRESHOLD = 0.1  # Threshold to distinguish square from rectangle
 
-    def __init__(self, file_path=None, canvas=None, video_source=None):
+    # How circles are found: "hough" (HoughCircles), "hough_alt" (the more accurate
+    # HOUGH_GRADIENT_ALT), "contour" (round contours of the polygon pass, no Hough pass) or
+    # "both" (round contours, plus the Hough circles that are not duplicates of them)
+    CIRCLE_METHOD = "hough"
+    CIRCLE_MIN_DIST_RATIO = 1 / 8  # Min distance between circle centers, as a share of the height
+    # HOUGH_GRADIENT_ALT parameters: the Canny high threshold, the minimal circle
+    # "perfectness" between 0 and 1, and the accumulator resolution
+    CIRCLE_ALT_PARAM1 = 300
+    CIRCLE_ALT_PARAM2 = 0.85
+    CIRCLE_ALT_DP = 1.5
+    CIRCLE_MIN_VERTICES = 6  # Contours simplified to fewer vertices are never circles
+    CIRCLE_MIN_CIRCULARITY = 0.85  # Minimum 4*pi*area/perimeter^2 of a round contour
+    # Maximum (farthest - nearest) / mean distance of a round contour's points from its
+    # center; about 0.14 for a regular hexagon, 0.08 for an octagon
+    CIRCLE_MAX_RADIAL_SPREAD = 0.06
+    # Minimum share of its minimum-area rectangle a quadrilateral fills to be a rectangle
+    RECTANGLE_MIN_FILL = 0.9
+    # Rectangles tilted by at most this many degrees are kept upright
+    RECTANGLE_MAX_TILT = 2
+    POLYGON_NAMES = {3: "Triangle", 5: "Pentagon", 6: "Hexagon", 7: "Heptagon", 8: "Octagon"}
+    CIRCLE_SUPPORT_SAMPLES = 64  # Outline points checked for the confidence of a Hough circle
+
+    # Preprocessing: "fixed" thresholds at THRESHOLD_BINARY, "otsu" picks the threshold from
+    # the histogram of each frame, "adaptive" thresholds every pixel against its neighbourhood
+    # (for uneven lighting; it keeps only the outlines of filled shapes, found inside and out)
+    THRESHOLD_METHOD = "fixed"
+    ADAPTIVE_BLOCK_SIZE = 31  # Neighbourhood size (odd) of the adaptive threshold
+    ADAPTIVE_C = 5  # Constant subtracted from the neighbourhood mean
+    # Blur once with the contour kernel and let the Hough pass use the same image
+    SHARED_BLUR = False
+
+    def __init__(self, file_path=None, canvas=None, video_source=None, profiler=None, stream=None,
+                 cache=None):
         """
         Initializes the shape detector with an image file, video source, or existing canvas.
 
@@ -36,7 +76,17 @@ class ShapeDetector:
             file_path (str, optional): The file path to an image for shape detection.
             canvas (np.ndarray, optional): A canvas (image) for shape detection.
             video_source (str, optional): The video source (filepath or cam) for real-time shape detection.
+            profiler (StageProfiler, optional): Collects per-stage timings of the video loop.
+                Defaults to a disabled profiler.
+            stream (StreamServer, optional): A started server the annotated frames and the
+                detected shapes are also published to.
+            cache (DetectionCache, optional): Remembers the shapes of frames seen before, so
+                they are not detected again.
         """
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.stream = stream
+        self.cache = cache
+        self.canvas = None
         if file_path:
             self.file_path = file_path
             self.original = cv.imread(file_path)
@@ -50,7 +100,7 @@ class ShapeDetector:
             self.canvas = Canvas(
                 self.width, self.height, canvas=self.original)
             self.shape_manager = ShapeManager()
-        elif video_source:
+        elif video_source is not None:
             self.cap = cv.VideoCapture(video_source)
             if not self.cap.isOpened():
                 raise ValueError("Error: Cannot open video source.")
@@ -58,152 +108,408 @@ class ShapeDetector:
             self.height = int(self.cap.get(cv.CAP_PROP_FRAME_HEIGHT))
             self.canvas = Canvas(self.width, self.height)
             self.shape_manager = ShapeManager()
-        elif canvas:
+        elif canvas is not None:
+            self.original = canvas
             self.height, self.width = canvas.shape[:2]
-            self.canvas = Canvas(self.width, self.height, canvas=canvas)
+            self.canvas = Canvas(self.width, self.height, canvas=self.original)
             self.shape_manager = ShapeManager()
 
     def detect_shapes(self):
         """
-        Detects shapes in the provided image and adds them to the shape manager.
+        Detects shapes in the provided image, adds them to the shape manager
+        and shows them with their labels.
+        """
+        self.find_shapes()
+        self.draw_detected_shapes()
+        self.draw_labels()
+        if self.stream is not None:
+            self.publish(frame_record(0, None, self.shape_manager.get_shapes()))
+        self.show_detected_shapes()
+
+    def detect_frame(self, frame):
+        """
+        Detects the shapes in one frame, which becomes the detector's current image.
+
+        Parameters:
+            frame (np.ndarray): The BGR frame.
+
+        Returns:
+            list: The detected shapes.
+        """
+        # shapes and labels are drawn on a copy, the caller's frame stays untouched
+        self.original = frame
+        self.height, self.width = frame.shape[:2]
+        if self.canvas is None:
+            self.canvas = Canvas(self.width, self.height, canvas=frame.copy())
+        else:
+            self.canvas.set_canvas(frame.copy())
+        self.shape_manager = ShapeManager()
+        self.find_shapes()
+        return self.shape_manager.get_shapes()
+
+    def config(self):
+        """
+        Returns the detector settings, which are part of the cache key of a frame.
+
+        Returns:
+            dict: The value of every setting, keyed by its name.
+        """
+        return {name: getattr(self, name) for name in dir(self) if name.isupper()}
+
+    def find_shapes(self):
+        """
+        Detects shapes in the current image and adds them to the shape manager, without drawing.
+        With a cache, the shapes of an image seen before are taken from it instead.
+        """
+        if self.cache is None:
+            self._find_shapes()
+            return
+        key = self.cache.key(self.original, self.config())
+        shapes = self.cache.get(key)
+        if shapes is None:
+            self._find_shapes()
+            self.cache.put(key, self.shape_manager.get_shapes())
+        else:
+            for shape in shapes:
+                self.shape_manager.add_shape(shape)
+
+    def preprocess(self, image):
+        """
+        Prepares an image for all detection passes at once, so each step runs once per frame:
+        grayscale conversion, the blurs, the threshold of the contour pass and the edges of the
+        Hough pass.
+
+        Parameters:
+            image (np.ndarray): The BGR or grayscale image.
+
+        Returns:
+            dict: "gray", "blurred" (contour pass), "circle_blurred" (Hough pass, None when it
+            does not run), "binary" (the thresholded image) and "edges" (the dilated Canny edges
+            the Hough transform votes with, None when it does not run).
         """
         # Convert to grayscale for shape detection
-        gray_image = cv.cvtColor(self.original, cv.COLOR_BGR2GRAY)
+        if image.ndim == 3:
+            gray_image = cv.cvtColor(image, cv.COLOR_BGR2GRAY)
+        else:
+            gray_image = image
 
         # Blur images for detecting different shapes
-        circle_blurred = cv.GaussianBlur(
-            gray_image, self.BLUR_KERNEL_SIZE_CIRCLE, 2
-        )
         basic_blurred = cv.GaussianBlur(
             gray_image, self.BLUR_KERNEL_SIZE_CONTOUR, 0
         )
+        circle_blurred = edges = None
+        if self.CIRCLE_METHOD != "contour":
+            if self.SHARED_BLUR:
+                circle_blurred = basic_blurred
+            else:
+                circle_blurred = cv.GaussianBlur(
+                    gray_image, self.BLUR_KERNEL_SIZE_CIRCLE, 2
+                )
+            # the same thresholds HoughCircles uses for its Canny pass
+            param1 = (self.CIRCLE_ALT_PARAM1 if self.CIRCLE_METHOD == "hough_alt"
+                      else self.CIRCLE_PARAM1)
+            edges = cv.dilate(cv.Canny(circle_blurred, param1 / 2, param1), None)
 
-        # Detect circles using HoughCircles
-        circles = cv.HoughCircles(
-            circle_blurred,
-            cv.HOUGH_GRADIENT,
-            dp=1,
-            minDist=self.height / 8,  # min dist between centers
-            param1=self.CIRCLE_PARAM1,
-            param2=self.CIRCLE_PARAM2,
-            minRadius=self.CIRCLE_MIN_RADIUS,
-            maxRadius=self.CIRCLE_MAX_RADIUS,
-        )
-        detected_centers = set()
-        if circles is not None:
-            circles = np.uint16(np.around(circles))
-            for x, y, r in circles[0]:
-                detected_centers.add((x, y))
-                self.shape_manager.add_shape(Circle((x, y), r, (0, 0, 255)))
-
-        # Detect contours for polygons and rectangles
-        _, thresh_image = cv.threshold(
-            basic_blurred,
-            self.THRESHOLD_BINARY,
-            255,
-            cv.THRESH_BINARY,
-        )
+        if self.THRESHOLD_METHOD == "adaptive":
+            thresh_image = cv.adaptiveThreshold(
+                basic_blurred,
+                255,
+                cv.ADAPTIVE_THRESH_MEAN_C,
+                cv.THRESH_BINARY,
+                self.ADAPTIVE_BLOCK_SIZE,
+                self.ADAPTIVE_C,
+            )
+        else:
+            flags = cv.THRESH_BINARY
+            if self.THRESHOLD_METHOD == "otsu":
+                flags |= cv.THRESH_OTSU
+            _, thresh_image = cv.threshold(
+                basic_blurred,
+                self.THRESHOLD_BINARY,
+                255,
+                flags,
+            )
+        return {
+            "gray": gray_image,
+            "blurred": basic_blurred,
+            "circle_blurred": circle_blurred,
+            "binary": thresh_image,
+            "edges": edges,
+        }
+
+    def _find_shapes(self):
+        """
+        Runs the circle and contour detection on the current image.
+        """
+        images = self.preprocess(self.original)
 
-        # cv.imshow("Thresholded Image", thresh_image)
+        # Detect contours for polygons, rectangles and (with the contour method) circles
+        # cv.imshow("Thresholded Image", images["binary"])
         contours, _ = cv.findContours(
-            thresh_image,
+            images["binary"],
             cv.RETR_LIST,  # retrieves all contours
             cv.CHAIN_APPROX_SIMPLE,
         )
 
+        circles = []
+        polygons = []
+        find_round = self.CIRCLE_METHOD in ("contour", "both")
         for contour in contours:
             area = cv.contourArea(contour)
             # Ignore small shapes and areas close to the image area
             if self.MIN_AREA_THRESHOLD < area < (self.width * self.height) - 10000:
                 # arclength computes the area of the contour and true for closed contour
-                epsilon = self.TRIANGLE_APPROX_EPSILON_RATIO * \
-                    cv.arcLength(contour, True)
+                perimeter = cv.arcLength(contour, True)
+                epsilon = self.TRIANGLE_APPROX_EPSILON_RATIO * perimeter
                 # approximates the countor to a simple polygon
                 # approx is the number of points
                 approx = cv.approxPolyDP(contour, epsilon, True)
 
-                x, y, w, h = cv.boundingRect(contour)
-                if len(approx) == 3:  # Triangle
-                    tri_points = approx[:, 0].tolist()
-                    self.shape_manager.add_shape(
-                        Polygon(tri_points, (255, 0, 0))
-                    )
-                elif len(approx) == 4:  # Square
-                    self.shape_manager.add_shape(
-                        Rectangle((x, y), (x + w, y + h), (0, 255, 255))
-                    )
+                if len(approx) >= self.CIRCLE_MIN_VERTICES:
+                    circle = self._round_contour(contour, area, perimeter)
+                    if circle is False:
+                        # a circle of a size that is not detected, not an N-gon either
+                        continue
+                    if circle is not None:
+                        # round contours are circles; the Hough pass finds them otherwise
+                        if find_round:
+                            circles.append(circle)
+                        continue
+                polygons.append(self._classify_polygon(contour, approx, area))
 
-        self.draw_detected_shapes()
-        self.draw_labels()
-        self.show_detected_shapes()
+        if images["circle_blurred"] is not None:
+            for cx, cy, r, confidence in self._find_hough_circles(images["circle_blurred"],
+                                                                  images["edges"]):
+                # the contour pass already found this one
+                if any(np.hypot(cx - fx, cy - fy) < max(r, fr) / 2 for fx, fy, fr, _ in circles):
+                    continue
+                circles.append((cx, cy, r, confidence))
 
-    def detect_shapes_in_video(self):
+        for cx, cy, r, confidence in circles:
+            circle = Circle((float(cx), float(cy)), float(r), (0, 0, 255))
+            circle.confidence = float(confidence)
+            circle.label = "Circle"
+            # text goes above the top-left corner of the bounding box
+            circle.label_position = (int(cx - r) - 10, int(cy - r) - 10)
+            self.shape_manager.add_shape(circle)
+        for polygon in polygons:
+            self.shape_manager.add_shape(polygon)
+
+    def _round_contour(self, contour, area, perimeter):
+        """
+        Checks whether a contour is a circle: round (4 pi area / perimeter^2 close to 1) and
+        about equally far from its center everywhere, which tells circles from hexagons and
+        octagons that are nearly as round.
+
+        Parameters:
+            contour (np.ndarray): The contour.
+            area (float): Its area.
+            perimeter (float): Its perimeter.
+
+        Returns:
+            tuple: (x, y, radius, confidence) with the sub-pixel center of mass and the radius
+            of a circle of the same area, None if the contour is not a circle, or False if it
+            is one with a radius outside CIRCLE_MIN_RADIUS to CIRCLE_MAX_RADIUS.
+        """
+        circularity = 4 * np.pi * area / (perimeter * perimeter)
+        if circularity < self.CIRCLE_MIN_CIRCULARITY:
+            return None
+        moments = cv.moments(contour)
+        cx, cy = moments["m10"] / moments["m00"], moments["m01"] / moments["m00"]
+        points = contour[:, 0]
+        distances = np.hypot(points[:, 0] - cx, points[:, 1] - cy)
+        if (distances.max() - distances.min()) / distances.mean() > self.CIRCLE_MAX_RADIAL_SPREAD:
+            return None
+        r = np.sqrt(area / np.pi)
+        if not self.CIRCLE_MIN_RADIUS <= r <= self.CIRCLE_MAX_RADIUS:
+            return False
+        return cx, cy, r, min(1.0, circularity)
+
+    def _classify_polygon(self, contour, approx, area):
+        """
+        Turns a simplified contour into a labelled shape: squares and rectangles (rotated ones
+        from their minimum-area rectangle), other quadrilaterals, triangles, pentagons,
+        hexagons and N-gons.
+
+        Parameters:
+            contour (np.ndarray): The contour.
+            approx (np.ndarray): The contour simplified by approxPolyDP.
+            area (float): The area of the contour.
+
+        Returns:
+            Shape: A Rectangle for upright rectangles, a Polygon otherwise.
+        """
+        vertices = len(approx)
+        shape = None
+        if vertices == 4:
+            (cx, cy), (w, h), angle = cv.minAreaRect(contour)
+            # a rectangle fills its minimum-area rectangle, other quadrilaterals do not
+            fill = area / (w * h) if w and h else 0.0
+            if fill >= self.RECTANGLE_MIN_FILL:
+                label = ("Square" if abs(1 - min(w, h) / max(w, h)) <= self.ASPECT_RATIO_THRESHOLD
+                         else "Rectangle")
+                tilt = angle % 90
+                if min(tilt, 90 - tilt) <= self.RECTANGLE_MAX_TILT:
+                    bx, by, bw, bh = cv.boundingRect(contour)
+                    shape = Rectangle((bx, by), (bx + bw, by + bh), (0, 255, 255))
+                else:
+                    corners = np.rint(cv.boxPoints(((cx, cy), (w, h), angle))).astype(int)
+                    shape = Polygon(corners.tolist(), (0, 255, 255))
+                # the same measure for upright and rotated rectangles
+                shape.confidence = min(1.0, fill)
+            else:
+                label = "Quadrilateral"
+        else:
+            label = self.POLYGON_NAMES.get(vertices, f"{vertices}-gon")
+        if shape is None:
+            color = (255, 0, 0) if vertices == 3 else (0, 255, 0)
+            shape = Polygon(approx[:, 0].tolist(), color)
+        if isinstance(shape, Polygon):
+            x, y = shape.points.reshape(-1, 2).min(axis=0)
+        else:
+            x, y = shape.top_left
+        shape.label = label
+        # text goes above the top-left corner of the bounding box
+        shape.label_position = (int(x) - 10, int(y) - 10)
+        return shape
+
+    def _find_hough_circles(self, blurred, edges):
+        """
+        Finds circles with the Hough transform chosen by CIRCLE_METHOD.
+
+        Parameters:
+            blurred (np.ndarray): The blurred grayscale image.
+            edges (np.ndarray): Its edge image from preprocess, used for the confidences.
+
+        Returns:
+            list: (x, y, radius, confidence) per circle, with sub-pixel centers and radii.
+        """
+        if self.CIRCLE_METHOD == "hough_alt":
+            method, dp = cv.HOUGH_GRADIENT_ALT, self.CIRCLE_ALT_DP
+            param1, param2 = self.CIRCLE_ALT_PARAM1, self.CIRCLE_ALT_PARAM2
+        else:
+            method, dp = cv.HOUGH_GRADIENT, 1
+            param1, param2 = self.CIRCLE_PARAM1, self.CIRCLE_PARAM2
+        circles = cv.HoughCircles(
+            blurred,
+            method,
+            dp=dp,
+            minDist=self.height * self.CIRCLE_MIN_DIST_RATIO,  # min dist between centers
+            param1=param1,
+            param2=param2,
+            minRadius=self.CIRCLE_MIN_RADIUS,
+            maxRadius=self.CIRCLE_MAX_RADIUS,
+        )
+        if circles is None:
+            return []
+        return [(x, y, r, self._edge_support(edges, x, y, r)) for x, y, r in circles[0]]
+
+    def _edge_support(self, edges, x, y, r):
+        """
+        Scores a circle by the share of its outline that lies on an edge.
+
+        Parameters:
+            edges (np.ndarray): The (dilated) edge image.
+            x (float): The x coordinate of the center.
+            y (float): The y coordinate of the center.
+            r (float): The radius.
+
+        Returns:
+            float: The confidence, between 0 and 1.
+        """
+        angles = np.linspace(0, 2 * np.pi, self.CIRCLE_SUPPORT_SAMPLES, endpoint=False)
+        xs = np.rint(x + r * np.cos(angles)).astype(int)
+        ys = np.rint(y + r * np.sin(angles)).astype(int)
+        inside = (xs >= 0) & (xs < edges.shape[1]) & (ys >= 0) & (ys < edges.shape[0])
+        if not inside.any():
+            return 0.0
+        return float(np.count_nonzero(edges[ys[inside], xs[inside]])) / len(angles)
+
+    def detect_shapes_in_video(self, results=None):
         """
         Detects shapes in a video stream and displays the results in real-time.
         The video is processed frame-by-frame to detect shapes and display them.
+        Press 'q' to stop and 'h' to toggle the stage latency overlay.
+
+        Parameters:
+            results (ResultsWriter, optional): A DetectionLog writer the detections of every
+                frame are written to as they are found. It is closed at the end.
         """
         if not hasattr(self, 'cap') or self.cap is None:
             raise ValueError("No video source provided for shape detection.")
 
+        profiler = self.profiler
+        frame_index = 0
         while True:
-            ret, frame = self.cap.read()
+            with profiler.stage("read"):
+                ret, frame = self.cap.read()
             if not ret:  # Break if no frame is captured
                 break
 
             # Use the current frame as the canvas
-            self.original = frame.copy()
-            self.canvas.set_canvas(frame)
-            self.shape_manager = ShapeManager()  # Reset for each frame
-            self.detect_shapes()
+            with profiler.stage("detect"):
+                self.detect_frame(frame)
+            with profiler.stage("draw"):
+                self.draw_detected_shapes()
+                self.draw_labels()
+            if results is not None or self.stream is not None:
+                record = frame_record(frame_index, self.cap.get(cv.CAP_PROP_POS_MSEC) / 1000,
+                                      self.shape_manager.get_shapes())
+                if results is not None:
+                    results.write_record(record)
+                self.publish(record)
+            frame_index += 1
+            with profiler.stage("imshow"):
+                if profiler.enabled and profiler.show_hud:
+                    # the overlay goes on a copy so it never ends up in the streamed snapshot
+                    self.canvas.show(profiler.draw_hud(self.canvas.get_canvas()))
+                else:
+                    self.canvas.draw_canvas()
+
+            with profiler.stage("waitKey"):
+                key = cv.waitKey(1) & 0xFF
+            profiler.end_frame()
 
             # Exit on pressing 'q'
-            if cv.waitKey(1) & 0xFF == ord('q'):
+            if key == ord('q'):
                 break
+            elif key == ord('h'):
+                profiler.show_hud = not profiler.show_hud
 
         # Release video capture and close windows
         self.cap.release()
+        if results is not None:
+            results.close()
+        if self.cache is not None:
+            # the entries stored since the last commit must reach the disk
+            self.cache.commit()
+            print(f"Detection cache: {self.cache.stats()}")
+        self.profiler.dump()
         cv.destroyAllWindows()
 
+    def publish(self, record):
+        """
+        Sends the annotated canvas and the detections to the stream server, if there is one.
+
+        Parameters:
+            record (dict): The detections of the current frame, see DetectionLog.frame_record.
+        """
+        if self.stream is None:
+            return
+        self.stream.publish_frame(self.canvas.snapshot())
+        self.stream.publish_detections(record)
+
     def draw_labels(self):
         """
         Draws labels (e.g., 'Circle', 'Square', 'Triangle') on the detected shapes.
         """
         for shape in self.shape_manager.get_shapes():
-            shape_data = shape.get_data()
-            text_position = None
-
-            if shape_data['type'] == 'rectangle':
-                # Place text near the center of the rectangle
-                top_left = shape_data['top_left']
-                bottom_right = shape_data['bottom_right']
-                text_position = (top_left[0] - 10, top_left[1] - 10)
-                label = "Square"
-
-            elif shape_data['type'] == 'circle':
-                center = shape_data['center']
-                radius = shape_data['radius']
-                # Place text at the center of the circle
-                text_position = (center[0] - radius - 10,
-                                 center[1] - radius - 10)
-                label = "Circle"
-
-            elif shape_data['type'] == 'polygon':
-                points = shape_data['points']
-                # Calculate bounding box for the polygon
-                x, y, w, h = cv.boundingRect(points)
-                # Place the text at the top-left of the bounding box
-                text_position = (x - 10, y - 10)
-                if len(points == 3):
-                    label = "Triangle"
-                else:
-                    label = "Polygon"
-
-            # Draw the text on the canvas
-            if text_position:
+            # the detector stores the label and its position with each shape
+            if shape.label:
                 cv.putText(
                     self.canvas.canvas,
-                    label,
-                    text_position,
+                    shape.label,
+                    shape.label_position,
                     cv.FONT_HERSHEY_SIMPLEX,
                     fontScale=0.5,
                     color=(0, 0, 0),  # Black text
@@ -1,3 +1,9 @@
+import os
+import sys
+
+# the shared Core package lives next to the application folders
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import cv2 as cv
 from ShapeDetector import ShapeDetector
 
@@ -16,3 +22,35 @@ if __name__ == "__main__":
     # detector.detect_shapes_in_video()
     # cv.waitKey(0)
     # cv.destroyAllWindows()
+
+    #! To also watch the annotated video and the detections in a browser
+    # from Core.StreamServer import StreamServer
+    # stream = StreamServer(port=8080, title="Shapes").start()
+    # detector = ShapeDetector(video_source=0, stream=stream)
+    # detector.detect_shapes_in_video()
+    # stream.stop()
+
+    #! To also write the detections of every frame to a file (.jsonl, or .parquet with pyarrow)
+    # from Core.DetectionLog import open_results
+    # detector = ShapeDetector(video_source="video.mp4")
+    # detector.detect_shapes_in_video(results=open_results("detections.jsonl"))
+
+    #! To process a whole video file as fast as possible, without a window, on every core
+    # (also from the command line: python OfflineDetection.py video.mp4 --out detections.jsonl)
+    # from OfflineDetection import detect_video
+    # print(detect_video("video.mp4", open_results("detections.jsonl"), every=5))
+
+    #! To skip detection for images and frames seen before (kept between runs in detections.db)
+    # from DetectionCache import DetectionCache
+    # cache = DetectionCache(path="detections.db")
+    # detector = ShapeDetector(file_path="shapes.png", cache=cache)
+    # detector.detect_shapes()
+    # print(cache.stats())
+    # cache.close()
+
+    #! To find circles from the contours alone (much faster than the Hough transform), or with
+    # the more accurate HOUGH_GRADIENT_ALT; every circle carries a confidence between 0 and 1
+    # detector = ShapeDetector(file_path="shapes.png")
+    # detector.CIRCLE_METHOD = "contour"  # or "hough_alt", "both"
+    # detector.CIRCLE_MIN_DIST_RATIO = 1 / 16
+    # detector.detect_shapes()
@@ -0,0 +1,62 @@
+import os
+import sys
+
+# the shared Core package lives next to the application folders
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import cv2 as cv
+from Core.Headless import ScriptedRun, SyntheticCapture, load_events
+from Core.Profiler import StageProfiler
+from Program import Program
+
+
+def build_app(args):
+    """
+    Creates a headless Program reading from a video file or synthetic frames.
+
+    Args:
+        args (argparse.Namespace): The parsed command line.
+
+    Returns:
+        Program: The application to drive.
+    """
+    if args.video:
+        capture = cv.VideoCapture(args.video)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video file: {args.video}")
+    else:
+        capture = SyntheticCapture(args.width, args.height, args.frames or 300)
+    recorder_options = {"output_dir": os.path.join(args.output_dir, "Records")}
+    profiler = StageProfiler(dump_path=args.metrics) if args.metrics else None
+    return Program(capture=capture, headless=True, recorder_options=recorder_options,
+                   profiler=profiler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a scripted event file against the application without a window.")
+    parser.add_argument("events", help="JSON Lines file of scheduled mouse/key events")
+    parser.add_argument("--video", help="video file to use instead of synthetic frames")
+    parser.add_argument("--frames", type=int, help="number of frames to run")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--output-dir", default="./headless_output")
+    parser.add_argument("--save-frames", action="store_true",
+                        help="save every shown frame as a PNG")
+    parser.add_argument("--video-out", help="file name for a video of the shown frames")
+    parser.add_argument("--report", help="write the timing report to this JSON file")
+    parser.add_argument("--metrics", help="record per-stage timings to this CSV/JSON file")
+    args = parser.parse_args()
+
+    app = build_app(args)
+    run = ScriptedRun(app, load_events(args.events), frame_count=args.frames, fps=args.fps,
+                      output_dir=args.output_dir, save_frames=args.save_frames,
+                      video_path=args.video_out)
+    report = run.run()
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
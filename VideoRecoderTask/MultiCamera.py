@@ -0,0 +1,243 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+import cv2 as cv
+from Core.Canvas import Canvas
+from Core.FrameRing import FrameRing
+from Core.ShapeManager import ShapeManager
+from Cropper import Cropper
+from Recorder import Recorder
+
+
+def _camera_worker(index, source, preview, crop, shapes, recorder_options, commands, events):
+    """
+    Runs the pipeline of one camera in its own process: capture, crop, overlay, record, and
+    publish a downscaled frame for the mosaic.
+
+    Args:
+        index (int): The position of the source in the program's source list.
+        source (int or str): Camera index, video file or stream URL.
+        preview (FrameRing): The ring the downscaled frames go to, or None.
+        crop (tuple): The (x, y, width, height) crop region, or None.
+        shapes (list): Shapes drawn on every frame.
+        recorder_options (dict): Keyword arguments for the Recorder.
+        commands (multiprocessing.Queue): Recording commands from the program.
+        events (multiprocessing.Queue): Status messages to the program.
+    """
+    cap = cv.VideoCapture(source)
+    if not cap.isOpened():
+        events.put(("error", index, f"Cannot open source {source!r}"))
+        return
+    cropper = Cropper()
+    cropper.crop_points = crop
+    shape_manager = ShapeManager()
+    shape_manager.set_shapes(shapes)
+    recorder = Recorder(**recorder_options)
+    canvas = None
+    label = f"{index}: {source}"
+    events.put(("opened", index, None))
+
+    try:
+        running = True
+        while running:
+            ret, frame = cap.read()
+            frame_time = recorder.clock()
+            if not ret:
+                events.put(("finished", index, None))
+                break
+            frame = cropper.apply_crop(frame)
+            if canvas is None:
+                canvas = Canvas(frame.shape[1], frame.shape[0], canvas=frame, headless=True)
+            else:
+                canvas.set_canvas(frame)
+            shape_manager.draw_all(canvas)
+            cv.putText(canvas.canvas, label, (10, 24), cv.FONT_HERSHEY_SIMPLEX, 0.6,
+                       (255, 255, 255), 2, cv.LINE_AA)
+
+            while True:
+                try:
+                    command = commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command == "start":
+                    recorder.start_recording(canvas.width, canvas.height)
+                elif command == "pause":
+                    recorder.pause_recording()
+                elif command == "resume":
+                    recorder.resume_recording()
+                elif command == "stop":
+                    recorder.stop_recording()
+                elif command == "quit":
+                    running = False
+
+            if recorder.is_recording and not recorder.is_paused:
+                recorder.write_frame(canvas.snapshot(), frame_time)
+            elif not recorder.is_recording:
+                recorder.buffer_frame(canvas.canvas, frame_time)
+            if preview is not None:
+                # scaled straight into the ring slot
+                cv.resize(canvas.canvas, (preview.shape[1], preview.shape[0]),
+                          dst=preview.reserve(), interpolation=cv.INTER_AREA)
+                preview.publish(frame_time)
+    finally:
+        recorder.stop_recording()
+        cap.release()
+        if preview is not None:
+            preview.close()
+
+
+class MultiCameraProgram:
+    """
+    Captures and records several cameras, video files or streams at once, each in its own
+    worker process so they run on separate cores, and shows them side by side in a mosaic.
+
+    The workers hand their preview frames to the mosaic through shared memory (see
+    FrameRing); the full-size frames never leave the worker that records them.
+
+    Key Bindings:
+        'q' : Quit the program
+        '1' : Start video recording on every source
+        '2' : Pause video recording
+        '3' : Resume video recording
+        '4' : Stop video recording
+    """
+
+    RECORD_KEYS = {ord('1'): "start", ord('2'): "pause", ord('3'): "resume", ord('4'): "stop"}
+    # How long cleanup waits for a worker to finish its recording before stopping it
+    JOIN_TIMEOUT = 10.0
+
+    def __init__(self, sources, recorder_options=None, crops=None, shapes=None, tile_size=(320, 240),
+                 columns=None, preview=True, headless=False):
+        """
+        Starts one worker process per source.
+
+        Args:
+            sources (list): Camera indices, video files or stream URLs.
+            recorder_options (dict, optional): Keyword arguments for every Recorder. Each source
+                records into its own camera_<index> folder of output_dir.
+            crops (list, optional): An (x, y, width, height) crop region or None per source.
+            shapes (list, optional): Shapes drawn over the frames of every source.
+            tile_size (tuple): The (width, height) of each source in the mosaic.
+            columns (int, optional): Number of mosaic columns. Defaults to a square layout.
+            preview (bool): If False, no mosaic is built and the workers only record.
+            headless (bool): If True, no window is opened; the mosaic is only kept on the canvas.
+        """
+        self.sources = list(sources)
+        self.headless = headless
+        self.preview = preview
+        count = len(self.sources)
+        self.columns = columns or math.ceil(math.sqrt(count))
+        self.rows = math.ceil(count / self.columns)
+        self.tile_shape = (tile_size[1], tile_size[0], 3)
+        self.canvas = Canvas(tile_size[0] * self.columns, tile_size[1] * self.rows,
+                             backgroundColor=(0, 0, 0), canvas_name="Cameras", headless=headless)
+        recorder_options = dict(recorder_options or {})
+        output_dir = recorder_options.pop("output_dir", "./Records")
+        crops = list(crops or [None] * count)
+
+        # Workers are started before any window or camera thread exists, so forking is safe
+        # and spares every worker from importing OpenCV again
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        self.events = context.Queue()
+        self.frames = []
+        self.readers = []
+        self.commands = []
+        self.workers = []
+        self.finished = set()
+        self._sequences = [0] * count
+        for index, source in enumerate(self.sources):
+            # the mosaic only ever shows the newest frame, two slots are enough
+            frame = FrameRing(self.tile_shape, slots=2, max_readers=1) if preview else None
+            commands = context.Queue()
+            options = dict(recorder_options,
+                           output_dir=os.path.join(output_dir, f"camera_{index}"))
+            worker = context.Process(
+                target=_camera_worker, name=f"camera-{index}", daemon=True,
+                args=(index, source, frame, crops[index], list(shapes or []), options, commands,
+                      self.events))
+            worker.start()
+            self.frames.append(frame)
+            self.readers.append(frame.reader() if frame else None)
+            self.commands.append(commands)
+            self.workers.append(worker)
+
+    def run(self):
+        """
+        Shows the mosaic until 'q' is pressed or every source has ended.
+        """
+        if not self.headless:
+            cv.namedWindow(self.canvas.canvas_name)
+        while self.step():
+            if not self.dispatch_key(cv.waitKey(15)):
+                break
+        self.cleanup()
+
+    def step(self):
+        """
+        Collects worker status messages and copies every new preview frame into the mosaic.
+
+        Returns:
+            bool: False once every worker has stopped, True otherwise.
+        """
+        # checked first, so the last frames of workers that just ended still get shown
+        running = any(worker.is_alive() for worker in self.workers)
+        while True:
+            try:
+                kind, index, message = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "error":
+                print(f"Error: {message}")
+            if kind in ("error", "finished"):
+                self.finished.add(index)
+
+        if self.preview:
+            mosaic = self.canvas.canvas
+            height, width = self.tile_shape[:2]
+            for index, reader in enumerate(self.readers):
+                row, column = divmod(index, self.columns)
+                tile = mosaic[row * height:(row + 1) * height, column * width:(column + 1) * width]
+                sequence = reader.latest(tile, self._sequences[index])
+                if sequence is not None:
+                    self._sequences[index] = sequence
+            self.canvas.draw_canvas()
+        return running and len(self.finished) < len(self.workers)
+
+    def dispatch_key(self, key):
+        """
+        Performs the action bound to a key (see the class docstring).
+
+        Args:
+            key (int): The key code returned by cv.waitKey, or -1 for no key.
+
+        Returns:
+            bool: False if the key asks to quit, True otherwise.
+        """
+        if key == ord('q'):
+            return False
+        command = self.RECORD_KEYS.get(key)
+        if command:
+            for commands in self.commands:
+                commands.put(command)
+        return True
+
+    def cleanup(self):
+        """
+        Stops the workers, letting them finish their recordings, and frees the shared frames.
+        """
+        for commands in self.commands:
+            commands.put("quit")
+        deadline = time.monotonic() + self.JOIN_TIMEOUT
+        for worker in self.workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        for frame in self.frames:
+            if frame is not None:
+                frame.close()
+        if not self.headless:
+            cv.destroyAllWindows()
@@ -1,12 +1,14 @@
 import cv2 as cv
-import math
-from ShapeManager import ShapeManager
-from UndoRedoManager import *
-from Shapes import *
+import numpy as np
+import threading
+import time
+from Core.ShapeManager import ShapeManager
+from Core.UndoRedoManager import UndoRedoManager, DrawAction
+from Core.Profiler import StageProfiler
+from Core.Canvas import Canvas
+from Core.Drawer import DrawingTool
 from Cropper import Cropper
 from Recorder import Recorder
-from Canvas import *
-from Drawer import *
 
 
 class Program:
@@ -21,6 +23,7 @@ class Program:
         's' : Finalize polygon drawing (for polygon mode)
         'x' : Enable cropping mode
         'e' : Switch to erase mode
+        'v' : Switch to vector erase mode (cuts drawn shapes instead of painting over pixels)
         'a' : Rotate canvas counterclockwise by 90 degrees
         'd' : Rotate canvas clockwise by 90 degrees
         'z' : Undo the last action
@@ -29,100 +32,242 @@ class Program:
         '2' : Pause video recording
         '3' : Resume video recording
         '4' : Stop video recording    
+        'h' : Toggle the stage latency overlay (needs an enabled profiler)
     """
 
-    def __init__(self, width=None, height=None):
+    # Size of the "connecting" frame shown while the camera opens, if no size was requested
+    PLACEHOLDER_SIZE = (640, 480)
+    # How long cleanup waits for a camera that is still being opened
+    CONNECT_TIMEOUT = 5.0
+
+    def __init__(self, width=None, height=None, recorder_options=None, source=0, capture=None,
+                 headless=False, profiler=None, stream=None):
+        """
+        Sets up the canvas, drawing tools and recorder and starts opening the webcam on a
+        background thread; frames are shown once it is connected.
+
+        Args:
+            width (int, optional): Requested capture width. Defaults to the camera's width.
+            height (int, optional): Requested capture height. Defaults to the camera's height.
+            recorder_options (dict, optional): Extra keyword arguments for the Recorder,
+                e.g. output_dir, segment_seconds, keep_last_minutes or pre_event_seconds.
+            source (int or str, optional): Camera index or video file to capture from. Defaults to 0.
+            capture (object, optional): An already opened capture with the cv.VideoCapture
+                read/get/set/release interface, used instead of opening source.
+            headless (bool, optional): If True, no window is opened; frames are only kept on the canvas.
+            profiler (StageProfiler, optional): Collects per-stage timings of the frame loop.
+                Defaults to a disabled profiler.
+            stream (StreamServer, optional): A started server the shown frames are also
+                streamed to. It is stopped in cleanup.
+        """
         self.width = width
         self.height = height
-        self.cap = cv.VideoCapture(0)
+        self.source = source
+        self.headless = headless
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.stream = stream
+        self.cap = None
+        self._connected = threading.Event()
 
-        if width and height:
-            self.cap.set(cv.CAP_PROP_FRAME_WIDTH, self.width)
-            self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, self.height)
+        # until the camera delivers frames, the window shows a placeholder of the requested size
+        self.canvas = Canvas(width or self.PLACEHOLDER_SIZE[0], height or self.PLACEHOLDER_SIZE[1],
+                             canvas=self._placeholder_frame(), headless=headless)
+        if capture is not None:
+            self._connect(capture)
         else:
-            # get the width of the webcam if the width is not specified
-            self.width = int(self.cap.get(
-                cv.CAP_PROP_FRAME_WIDTH))
-            self.height = int(self.cap.get(
-                cv.CAP_PROP_FRAME_HEIGHT))
-        ret, first_frame = self.cap.read()
-        self.canvas = Canvas(self.width, self.height, canvas=first_frame)
+            # opening a camera can take seconds, so it is not allowed to hold up the window
+            threading.Thread(target=self._connect, name="camera-connect", daemon=True).start()
         self.cropper = Cropper()
         self.shape_manager = ShapeManager()
         self.undo_redo_manager = UndoRedoManager()
         self.draw_color = (255, 255, 255)
-        self.video_recorder = Recorder(output_dir="./Records")
+        recorder_options = dict(recorder_options or {})
+        recorder_options.setdefault("output_dir", "./Records")
+        self.video_recorder = Recorder(**recorder_options)
+        self.video_recorder.profiler = self.profiler
         self.drawer_tool = DrawingTool(
             self.canvas, self.shape_manager, self.undo_redo_manager)
         self.undo_redo_manager.add_action(
-            DrawAction(self.shape_manager.get_shapes(), self.canvas.get_canvas()))
+            DrawAction(self.shape_manager.get_shapes(), self.canvas.snapshot()))
         self.active_mode = None
+        # Source of frame timestamps; scripted runs replace it with a simulated clock
+        self.clock = time.monotonic
+
+    @property
+    def connected(self):
+        """bool: True once the capture is open and its frame size is known."""
+        return self._connected.is_set() and self.cap is not None
+
+    def _connect(self, capture=None):
+        """
+        Opens the capture and reads its frame size. Runs on a background thread unless an
+        already opened capture is passed in.
+
+        Args:
+            capture (object, optional): An already opened capture to use instead of source.
+        """
+        try:
+            cap = capture if capture is not None else cv.VideoCapture(self.source)
+            if self.width and self.height:
+                cap.set(cv.CAP_PROP_FRAME_WIDTH, self.width)
+                cap.set(cv.CAP_PROP_FRAME_HEIGHT, self.height)
+            else:
+                # get the width of the webcam if the width is not specified
+                self.width = int(cap.get(cv.CAP_PROP_FRAME_WIDTH))
+                self.height = int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))
+            # the first frame is only read to wait for the camera to start delivering
+            cap.read()
+            self.cap = cap
+        finally:
+            self._connected.set()
+
+    def _placeholder_frame(self):
+        """
+        Draws the frame shown while the camera is connecting.
+
+        Returns:
+            np.ndarray: A dark frame with a "connecting" message.
+        """
+        width = self.width or self.PLACEHOLDER_SIZE[0]
+        height = self.height or self.PLACEHOLDER_SIZE[1]
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        text = f"Connecting to camera {self.source}..."
+        (text_width, text_height), _ = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        cv.putText(frame, text, ((width - text_width) // 2, (height + text_height) // 2),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2, cv.LINE_AA)
+        return frame
 
     def run(self):
+        """
+        Runs the webcam loop until 'q' is pressed or the camera stops delivering frames.
+        """
         cv.namedWindow(self.canvas.canvas_name)
         cv.setMouseCallback(self.canvas.canvas_name, self._mouse_callback)
 
         while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                print("Error: Unable to read from camera.")
+            if not self.step():
+                break
+
+            with self.profiler.stage("waitKey"):
+                key = cv.waitKey(1)
+            self.profiler.end_frame()
+            if not self.dispatch_key(key):
                 break
+        self.cleanup()
+
+    def step(self):
+        """
+        Processes one camera frame: crops it, draws the shapes, rotates and shows it,
+        and passes it to the recorder.
+
+        Returns:
+            bool: False if no frame could be read, True otherwise.
+        """
+        if not self._connected.is_set():
+            self.canvas.draw_canvas()
+            return True
+        if self.cap is None:
+            print("Error: Unable to open camera.")
+            return False
+        profiler = self.profiler
+        with profiler.stage("read"):
+            ret, frame = self.cap.read()
+        frame_time = self.clock()
+        if not ret:
+            print("Error: Unable to read from camera.")
+            return False
+        with profiler.stage("crop"):
             frame = self.cropper.apply_crop(frame)
             self.canvas.set_canvas(frame)
+        with profiler.stage("draw_all"):
             self.shape_manager.draw_all(self.canvas)
-            self.drawer_tool.rotate_canvas()
-            self.canvas.draw_canvas()
+        with profiler.stage("rotate"):
+            self.drawer_tool.rotate_view()
+        with profiler.stage("imshow"):
+            if profiler.enabled and profiler.show_hud:
+                # the overlay goes on a copy so it never ends up in a recording
+                self.canvas.show(profiler.draw_hud(self.canvas.get_canvas()))
+            else:
+                self.canvas.draw_canvas()
+            if self.stream is not None:
+                # the server only keeps a reference, so it gets a snapshot like the recorder
+                self.stream.publish_frame(self.canvas.snapshot())
 
+        with profiler.stage("record"):
             if self.video_recorder.is_recording and not self.video_recorder.is_paused:
-                self.video_recorder.write_frame(self.canvas.get_canvas())
+                # a snapshot; the canvas copies the frame only if it is drawn on before the next one
+                self.video_recorder.write_frame(
+                    self.canvas.snapshot(), frame_time)
+            elif not self.video_recorder.is_recording:
+                # keep the last seconds around in case a recording is started
+                self.video_recorder.buffer_frame(self.canvas.canvas, frame_time)
+        return True
 
-            key = cv.waitKey(1)
+    def dispatch_key(self, key):
+        """
+        Performs the action bound to a key (see the class docstring).
 
-            if key == ord('q'):
-                break
-            elif key == ord('c'):
-                self.active_mode = "circle"
-            elif key == ord('r'):
-                self.active_mode = "rectangle"
-            elif key == ord('p'):
-                self.active_mode = "polygon"
-            elif key == ord('s') and self.active_mode == "polygon":
-                self.drawer_tool.finalize_polygon()
-            elif key == ord('x'):
-                self.active_mode = "crop"
+        Args:
+            key (int): The key code returned by cv.waitKey, or -1 for no key.
+
+        Returns:
+            bool: False if the key asks to quit, True otherwise.
+        """
+        if key == ord('q'):
+            return False
+        elif key in (ord('x'), ord('1')) and not self.connected:
+            # cropping and recording need the camera's frames and frame size
+            print("The camera is still connecting.")
+        elif key == ord('c'):
+            self.active_mode = "circle"
+        elif key == ord('r'):
+            self.active_mode = "rectangle"
+        elif key == ord('p'):
+            self.active_mode = "polygon"
+        elif key == ord('s') and self.active_mode == "polygon":
+            self.drawer_tool.finalize_polygon()
+        elif key == ord('x'):
+            self.active_mode = "crop"
+            # the crop selection window needs a human; scripted runs set crop_points directly
+            if not self.headless:
                 self.cropper.select_crop_region(self.cap)
-            elif key == ord('e'):
-                self.active_mode = "erase"
-            elif key == ord('a'):
-                self.drawer_tool.rotation_angle -= 90
-            elif key == ord('d'):
-                self.drawer_tool.rotation_angle += 90
-            elif key == ord('z'):
-                self.undo_redo_manager.undo(self.canvas, self.shape_manager)
-            elif key == ord('y'):
-                self.undo_redo_manager.redo(self.canvas, self.shape_manager)
-            elif key == ord('1'):  # Start recording
-                self.video_recorder.start_recording(self.width, self.height)
-            elif key == ord('2'):  # Pause recording
-                self.video_recorder.pause_recording()
-            elif key == ord('3'):  # Resume recording
-                self.video_recorder.resume_recording()
-            elif key == ord('4'):  # Stop recording
-                self.video_recorder.stop_recording()
-        self.cleanup()
+        elif key == ord('e'):
+            self.active_mode = "erase"
+        elif key == ord('v'):
+            self.active_mode = "vector_erase"
+        elif key == ord('a'):
+            self.drawer_tool.rotation_angle -= 90
+        elif key == ord('d'):
+            self.drawer_tool.rotation_angle += 90
+        elif key == ord('z'):
+            self.undo_redo_manager.undo(self.canvas, self.shape_manager)
+        elif key == ord('y'):
+            self.undo_redo_manager.redo(self.canvas, self.shape_manager)
+        elif key == ord('1'):  # Start recording
+            self.video_recorder.start_recording(self.width, self.height)
+        elif key == ord('2'):  # Pause recording
+            self.video_recorder.pause_recording()
+        elif key == ord('3'):  # Resume recording
+            self.video_recorder.resume_recording()
+        elif key == ord('4'):  # Stop recording
+            self.video_recorder.stop_recording()
+        elif key == ord('h'):
+            self.profiler.show_hud = not self.profiler.show_hud
+        return True
 
     def _mouse_callback(self, event, x, y, flags, param):
         # Call the corresponding function for the current mode
         if self.active_mode == "polygon":
             self.drawer_tool.draw_polygon(event, x, y)
-        elif self.active_mode == "crop":
-            self.drawer_tool.handle_crop_mode(event, x, y)
         elif self.active_mode == "erase":
             self.drawer_tool.handle_erase_mode(event, x, y)
+        elif self.active_mode == "vector_erase":
+            self.drawer_tool.handle_vector_erase_mode(event, x, y)
         elif self.active_mode == "circle":
             self.drawer_tool.draw_circle(event, x, y)
         elif self.active_mode == "rectangle":
             self.drawer_tool.draw_rectangle(event, x, y)
+        # crop mode has no mouse handling here: the Cropper selects the region on the frame
 
     def handle_keys(self, key):
         if key == ord('s'):  # Start recording
@@ -139,5 +284,11 @@ class Program:
             self.shape_manager.add_shape('rectangle', (50, 50), (200, 150))
 
     def cleanup(self):
-        self.cap.release()
-        cv.destroyAllWindows()
+        self.video_recorder.stop_recording()
+        self.profiler.dump()
+        if self.stream is not None:
+            self.stream.stop()
+        if self._connected.wait(self.CONNECT_TIMEOUT) and self.cap is not None:
+            self.cap.release()
+        if not self.headless:
+            cv.destroyAllWindows()
@@ -1,19 +1,48 @@
 import cv2 as cv
+import csv
 import os
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime
 
 
 class Recorder:
     """
     A class that provides functionality for recording video from a camera.
+
+    Frames are handed to a background writer thread, which can split the recording into
+    segments by duration or file size and optionally keep only the most recent segments.
+    While not recording, the last few seconds can be kept as JPEGs in memory and written
+    at the start of the next recording.
+
+    Every frame is timestamped with a monotonic clock. The writer duplicates or drops frames so
+    that the file plays back in real time at the constant frame rate it declares, and logs the
+    timing of every frame, pause and segment to a CSV file next to the video.
     """
 
-    def __init__(self, output_dir="./Records"):
+    # Number of frames that may wait for the writer thread before write_frame blocks
+    MAX_QUEUED_FRAMES = 120
+    PRE_EVENT_JPEG_QUALITY = 90
+
+    def __init__(self, output_dir="./Records", segment_seconds=None, segment_max_bytes=None,
+                 keep_last_minutes=None, pre_event_seconds=None, pre_event_max_bytes=64 * 1024 * 1024):
         """
         Initializes the Recorder object.
 
         Args:
             output_dir (str): Directory where recorded videos will be saved. Defaults to './Records'.
+            segment_seconds (float, optional): Start a new segment after this many seconds of video.
+            segment_max_bytes (int, optional): Start a new segment once the current file reaches this size.
+            keep_last_minutes (float, optional): Delete finished segments older than this many minutes,
+                keeping a rolling window of the most recent footage. The window covers one
+                recording: starting a new one never deletes the segments of the previous one.
+                Deleted segments are dropped from segments; the timing log keeps their rows.
+            pre_event_seconds (float, optional): Seconds of footage to keep in memory before
+                recording starts. Disabled by default.
+            pre_event_max_bytes (int, optional): Memory budget of the pre-event buffer in bytes.
+                Defaults to 64 MB.
         """
         os.makedirs(output_dir, exist_ok=True)
         self.output_dir = output_dir
@@ -21,11 +50,30 @@ class Recorder:
         self.is_recording = False
         self.is_paused = False
         self.current_filename = None
+        self.segment_seconds = segment_seconds
+        self.segment_max_bytes = segment_max_bytes
+        self.keep_last_minutes = keep_last_minutes
+        self.segments = []
+        self._finished_segments = deque()  # (filename, finish time) for rolling deletion
+        # Segments are finished on their own threads; the rolling window is pruned under this lock
+        self._segments_lock = threading.Lock()
+        self._frame_queue = None
+        self._writer_thread = None
+        self.pre_event_seconds = pre_event_seconds
+        self.pre_event_max_bytes = pre_event_max_bytes
+        self._pre_event_frames = deque()  # (timestamp, jpeg bytes)
+        self._pre_event_bytes = 0
+        # Source of capture timestamps; scripted runs replace it with a simulated clock
+        self.clock = time.monotonic
+        # Optional StageProfiler; the writer thread reports encoding time to it
+        self.profiler = None
 
     def start_recording(self, width, height, fps=60):
         """
         Starts recording video to a file with the given resolution and frame rate.
 
+        Any frames held in the pre-event buffer are written first, followed by live frames.
+
         Args:
             width (int): The width of the video frame.
             height (int): The height of the video frame.
@@ -33,14 +81,38 @@ class Recorder:
         """
         if not self.is_recording:
             # Generate a unique filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.current_filename = os.path.join(
-                self.output_dir, f"recording_{timestamp}.avi")
+            self._session = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self._frame_size = (width, height)
+            self._fps = fps
+            self._segment_index = 0
+            with self._segments_lock:
+                # the rolling window starts over with every recording
+                self.segments = []
+                self._finished_segments.clear()
+            self._paused_total = 0.0
+            self._paused_at = None
+            self._start_time = None
+            self._frames_written = 0
+            self._last_frame = None
 
-            # Define the codec and create VideoWriter object
-            fourcc = cv.VideoWriter_fourcc(*'XVID')
-            self.video_writer = cv.VideoWriter(
-                self.current_filename, fourcc, fps, (width, height))
+            self.timing_filename = os.path.join(
+                self.output_dir, f"recording_{self._session}.timing.csv")
+            self._timing_file = open(self.timing_filename, "w", newline="")
+            self._timing_log = csv.writer(self._timing_file)
+            self._timing_log.writerow(
+                ["event", "capture_time", "media_time", "frame_index", "duplicates", "file"])
+
+            self.video_writer = self._open_segment()
+
+            # The writer thread decodes the buffered frames so starting never stalls the caller
+            pre_event_frames = list(self._pre_event_frames)
+            self._pre_event_frames.clear()
+            self._pre_event_bytes = 0
+
+            self._frame_queue = queue.Queue(maxsize=self.MAX_QUEUED_FRAMES)
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop, args=(pre_event_frames,), name="RecorderWriter", daemon=True)
+            self._writer_thread.start()
 
             self.is_recording = True
             self.is_paused = False
@@ -50,13 +122,18 @@ class Recorder:
         """
         Stops the video recording and saves the video file.
 
-        If recording is in progress, it releases the VideoWriter object, stops the recording,
-        and prints the location where the video was saved.
+        If recording is in progress, it waits for the queued frames to be written, releases the
+        VideoWriter object, stops the recording, and prints the location where the video was saved.
         """
         if self.is_recording and self.video_writer:
-            self.video_writer.release()
             self.is_recording = False
             self.is_paused = False
+            # The sentinel makes the writer thread drain the queue and release the writer
+            self._frame_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+            self._frame_queue = None
+            self._timing_file.close()
             print(f"Stopped recording. Video saved to {self.current_filename}")
 
     def pause_recording(self):
@@ -68,6 +145,8 @@ class Recorder:
         """
         if self.is_recording and not self.is_paused:
             self.is_paused = True
+            self._paused_at = self.clock()
+            self._frame_queue.put(("pause", self._paused_at, 0.0, None))
             print("Recording paused")
 
     def resume_recording(self):
@@ -79,16 +158,221 @@ class Recorder:
         """
         if self.is_recording and self.is_paused:
             self.is_paused = False
+            now = self.clock()
+            # The gap is cut from the video timeline but stays visible in the timing log
+            self._paused_total += now - self._paused_at
+            self._frame_queue.put(("resume", now, 0.0, None))
             print("Recording resumed")
 
-    def write_frame(self, frame):
+    def write_frame(self, frame, timestamp=None):
         """
-        Writes a single frame to the video file.
+        Queues a single frame to be written to the video file.
 
         Args:
-            frame (numpy.ndarray): The frame to be written to the video file.
+            frame (numpy.ndarray): The frame to be written to the video file. The recorder keeps a
+                reference to it until it is written, so the caller must not modify it afterwards.
+            timestamp (float, optional): The clock() value at which the frame was captured.
+                Defaults to the current time.
 
-        If recording is in progress and not paused, the frame is written to the video file.
+        If recording is in progress and not paused, the frame is passed to the writer thread.
+        Blocks only if the writer has fallen MAX_QUEUED_FRAMES frames behind.
         """
         if self.is_recording and not self.is_paused and self.video_writer:
+            if timestamp is None:
+                timestamp = self.clock()
+            self._frame_queue.put(("frame", timestamp, self._paused_total, frame))
+
+    def buffer_frame(self, frame, timestamp=None):
+        """
+        Keeps a frame in the pre-event buffer while no recording is running.
+
+        Args:
+            frame (numpy.ndarray): The frame to keep. It is JPEG-compressed immediately, so the
+                caller may reuse the array.
+            timestamp (float, optional): The clock() value at which the frame was captured.
+                Defaults to the current time.
+
+        Frames older than pre_event_seconds are discarded, as are the oldest frames whenever the
+        buffer exceeds pre_event_max_bytes.
+        """
+        if not self.pre_event_seconds or self.is_recording:
+            return
+
+        ok, jpeg = cv.imencode(
+            ".jpg", frame, [cv.IMWRITE_JPEG_QUALITY, self.PRE_EVENT_JPEG_QUALITY])
+        if not ok:
+            return
+        now = self.clock() if timestamp is None else timestamp
+        self._pre_event_frames.append((now, jpeg))
+        self._pre_event_bytes += jpeg.nbytes
+
+        cutoff = now - self.pre_event_seconds
+        while self._pre_event_frames and (self._pre_event_frames[0][0] < cutoff
+                                          or self._pre_event_bytes > self.pre_event_max_bytes):
+            _, old_jpeg = self._pre_event_frames.popleft()
+            self._pre_event_bytes -= old_jpeg.nbytes
+
+    def _segment_filename(self):
+        """
+        Builds the file name of the current segment.
+
+        Returns:
+            str: The path of the segment file.
+        """
+        if self.segment_seconds or self.segment_max_bytes:
+            name = f"recording_{self._session}_{self._segment_index:03d}.avi"
+        else:
+            name = f"recording_{self._session}.avi"
+        return os.path.join(self.output_dir, name)
+
+    def _open_segment(self):
+        """
+        Opens a VideoWriter for the next segment and makes it the current file.
+
+        Returns:
+            cv.VideoWriter: The writer for the new segment.
+        """
+        self.current_filename = self._segment_filename()
+        with self._segments_lock:
+            self.segments.append(self.current_filename)
+        self._segment_frames = 0
+
+        # Define the codec and create VideoWriter object
+        fourcc = cv.VideoWriter_fourcc(*'XVID')
+        return cv.VideoWriter(self.current_filename, fourcc, self._fps, self._frame_size)
+
+    def _segment_is_full(self):
+        """
+        Checks whether the current segment has reached its duration or size limit.
+
+        Returns:
+            bool: True if a new segment should be started before the next frame.
+        """
+        if self.segment_seconds and self._segment_frames >= self.segment_seconds * self._fps:
+            return True
+        # Querying the file size once per second of video is plenty for a size limit
+        if self.segment_max_bytes and self._segment_frames % self._fps == 0 and self._segment_frames:
+            try:
+                return os.path.getsize(self.current_filename) >= self.segment_max_bytes
+            except OSError:
+                return False
+        return False
+
+    def _rotate_segment(self):
+        """
+        Switches writing to a new segment without blocking on the old one.
+
+        The next writer is opened before the previous one is released, and the release (which
+        finalizes the file) runs on its own thread, so no queued frame is lost at the boundary.
+        """
+        finished_writer = self.video_writer
+        finished_filename = self.current_filename
+        self._segment_index += 1
+        self.video_writer = self._open_segment()
+        self._timing_log.writerow(
+            ["segment", "", "", self._frames_written, "", self.current_filename])
+
+        threading.Thread(target=self._finish_segment,
+                         args=(finished_writer, finished_filename), daemon=True).start()
+        print(f"Recording continues in {self.current_filename}")
+
+    def _finish_segment(self, writer, filename):
+        """
+        Releases a finished segment and applies the rolling window.
+
+        Args:
+            writer (cv.VideoWriter): The writer of the finished segment.
+            filename (str): The file name of the finished segment.
+        """
+        writer.release()
+        if self.keep_last_minutes is None:
+            return
+
+        with self._segments_lock:
+            if filename not in self.segments:
+                # a segment of an earlier recording, which is outside the window
+                return
+            self._finished_segments.append((filename, time.monotonic()))
+            cutoff = time.monotonic() - self.keep_last_minutes * 60
+            while self._finished_segments and self._finished_segments[0][1] < cutoff:
+                old_filename, _ = self._finished_segments.popleft()
+                self.segments.remove(old_filename)
+                try:
+                    os.remove(old_filename)
+                    print(f"Deleted old segment {old_filename}")
+                except OSError:
+                    pass
+
+    def _writer_loop(self, pre_event_frames):
+        """
+        Writes queued frames on the background thread until the stop sentinel arrives.
+
+        Args:
+            pre_event_frames (list): (timestamp, JPEG bytes) pairs to write before the live frames.
+        """
+        for timestamp, jpeg in pre_event_frames:
+            frame = cv.imdecode(jpeg, cv.IMREAD_COLOR)
+            if frame is not None:
+                self._write_timed(timestamp, 0.0, frame)
+
+        while True:
+            item = self._frame_queue.get()
+            if item is None:
+                break
+            kind, timestamp, paused_total, frame = item
+            if kind == "frame":
+                self._write_timed(timestamp, paused_total, frame)
+            else:
+                self._timing_log.writerow(
+                    [kind, f"{timestamp:.6f}", "", self._frames_written, "", self.current_filename])
+
+        self._finish_segment(self.video_writer, self.current_filename)
+
+    def _write_timed(self, timestamp, paused_total, frame):
+        """
+        Places a captured frame on the constant frame rate timeline of the video.
+
+        The frame's slot is derived from its capture time minus the time spent paused. If the
+        caller delivered frames too slowly the previous frame is repeated to fill the missing
+        slots; if it delivered them too quickly a frame whose slot is already written is dropped.
+
+        Args:
+            timestamp (float): The clock() value at which the frame was captured.
+            paused_total (float): Seconds spent paused before the frame was captured.
+            frame (numpy.ndarray): The captured frame.
+        """
+        media_time = timestamp - paused_total
+        if self._start_time is None:
+            self._start_time = media_time
+        media_time -= self._start_time
+        slot = round(media_time * self._fps)
+
+        if slot < self._frames_written:
+            self._timing_log.writerow(
+                ["drop", f"{timestamp:.6f}", f"{media_time:.6f}", slot, 0, self.current_filename])
+            return
+
+        duplicates = slot - self._frames_written
+        for _ in range(duplicates):
+            self._write(self._last_frame)
+        self._write(frame)
+        self._last_frame = frame
+        self._timing_log.writerow(
+            ["frame", f"{timestamp:.6f}", f"{media_time:.6f}", slot, duplicates, self.current_filename])
+
+    def _write(self, frame):
+        """
+        Writes one frame on the writer thread, starting a new segment first if needed.
+
+        Args:
+            frame (numpy.ndarray): The frame to write.
+        """
+        if self._segment_is_full():
+            self._rotate_segment()
+        if self.profiler is not None:
+            with self.profiler.stage("encode"):
+                self.video_writer.write(frame)
+        else:
             self.video_writer.write(frame)
+        self._segment_frames += 1
+        self._frames_written += 1
@@ -1,5 +1,27 @@
-from Program import Program
+import argparse
+import os
+import sys
+
+# the shared Core package lives next to the application folders
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 if __name__ == "__main__":
-    app = Program()
+    parser = argparse.ArgumentParser(description="Capture, crop, annotate and record video.")
+    parser.add_argument("sources", nargs="*", default=["0"],
+                        help="camera indices, video files or stream URLs, e.g. 0 1 rtsp://...")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="also stream the annotated frames over HTTP on this port (single source)")
+    args = parser.parse_args()
+    sources = [int(source) if source.isdigit() else source for source in args.sources]
+    if len(sources) > 1:
+        from MultiCamera import MultiCameraProgram
+        app = MultiCameraProgram(sources)
+    else:
+        from Program import Program
+        stream = None
+        if args.serve is not None:
+            from Core.StreamServer import StreamServer
+            stream = StreamServer(port=args.serve, title=f"Camera {sources[0]}").start()
+            print(f"Streaming at {stream.url}")
+        app = Program(source=sources[0], stream=stream)
     app.run()